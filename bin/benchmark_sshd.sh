@@ -0,0 +1,55 @@
+#!/usr/bin/env bash
+
+# Compares channel setup time, latency & throughput of each sshd profile
+# against a local bastion container built from this repo using `sab bench`.
+#
+# Usage: bin/benchmark_sshd.sh [channels] [megabytes per channel]
+
+set -e
+
+CHANNELS=${1:-8}
+MEGABYTES=${2:-64}
+IMAGE=serverless-aws-bastion-bench
+PORT=2222
+
+cd "$(dirname "$0")/.."
+
+WORK_DIR=$(mktemp -d)
+cleanup() {
+    docker rm -f ${IMAGE} > /dev/null 2>&1 || true
+    rm -rf ${WORK_DIR}
+}
+trap cleanup EXIT
+
+ssh-keygen -q -t ed25519 -N "" -f ${WORK_DIR}/id_ed25519
+
+echo "Building bastion image..."
+docker build -q -t ${IMAGE} . > /dev/null
+
+for PROFILE in $(ls docker_files/sshd_profiles | sed 's/\.conf$//')
+do
+    docker rm -f ${IMAGE} > /dev/null 2>&1 || true
+    docker run -d --name ${IMAGE} -p ${PORT}:22 \
+        -e AUTHORIZED_SSH_KEYS="$(cat ${WORK_DIR}/id_ed25519.pub)" \
+        -e BASTION_TYPE=original \
+        -e SSHD_PROFILE=${PROFILE} \
+        -e TIMEOUT=3600 \
+        -e AWS_REGION=us-east-1 \
+        ${IMAGE} > /dev/null
+
+    until ssh -q -i ${WORK_DIR}/id_ed25519 -p ${PORT} -o BatchMode=yes \
+        -o StrictHostKeyChecking=no -o UserKnownHostsFile=/dev/null \
+        ssh-user@127.0.0.1 true 2> /dev/null
+    do
+        sleep 1
+    done
+
+    for MULTIPLEX in "" "--multiplex"
+    do
+        echo "Profile: ${PROFILE} ${MULTIPLEX}"
+        sab bench --log-level error \
+            --host 127.0.0.1 --port ${PORT} \
+            --identity-file ${WORK_DIR}/id_ed25519 \
+            --channels ${CHANNELS} --megabytes ${MEGABYTES} ${MULTIPLEX}
+    done
+done
@@ -0,0 +1,4 @@
+from serverless_aws_bastion.agent.client import main
+
+
+main()
@@ -0,0 +1,114 @@
+# The `sab` entry point. This module only imports the standard library so that
+# commands forwarded to a running agent skip loading boto3 & the cli entirely.
+import hashlib
+import json
+import os
+import socket
+import sys
+from typing import List, Optional
+
+from serverless_aws_bastion.config import (
+    AGENT_COMMANDS,
+    AGENT_CONNECT_TIMEOUT,
+    AGENT_ENV_KEYS,
+    AGENT_PATH_OPTIONS,
+    AGENT_SOCKET,
+)
+from serverless_aws_bastion.utils.state_utils import load_state_path
+
+
+def build_env_fingerprint() -> str:
+    """
+    Hashes the aws environment so the agent only serves callers that would
+    resolve the same credentials & region as it does
+    """
+    env = "\n".join(f"{k}={os.environ.get(k, '')}" for k in AGENT_ENV_KEYS)
+    return hashlib.sha256(env.encode()).hexdigest()
+
+
+def should_forward(argv: List[str]) -> bool:
+    return (
+        len(argv) > 0
+        and argv[0] in AGENT_COMMANDS
+        and "--help" not in argv
+        and not os.environ.get("SAB_NO_AGENT")
+    )
+
+
+def resolve_path(value: str, prefix: str) -> str:
+    if not value.startswith(prefix):
+        return value
+    path = os.path.abspath(os.path.expanduser(value[len(prefix) :]))
+    return f"{prefix}{path}"
+
+
+def resolve_path_args(argv: List[str]) -> List[str]:
+    """
+    Makes local paths in the arguments absolute, the agent runs commands
+    from its own working directory rather than the caller's
+    """
+    resolved = []
+    for i, arg in enumerate(argv):
+        option, equals, value = arg.partition("=")
+        if equals and option in AGENT_PATH_OPTIONS:
+            arg = f"{option}={resolve_path(value, AGENT_PATH_OPTIONS[option])}"
+        elif i > 0 and argv[i - 1] in AGENT_PATH_OPTIONS:
+            arg = resolve_path(arg, AGENT_PATH_OPTIONS[argv[i - 1]])
+        resolved.append(arg)
+    return resolved
+
+
+def forward_to_agent(argv: List[str]) -> Optional[int]:
+    """
+    Runs a command in the agent & streams its output back. Returns the exit
+    code or None if the agent isn't running or can't serve this caller.
+    """
+    socket_path = load_state_path(AGENT_SOCKET)
+    if not os.path.exists(socket_path):
+        return None
+
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    conn.settimeout(AGENT_CONNECT_TIMEOUT)
+    try:
+        conn.connect(socket_path)
+        conn.sendall(
+            json.dumps(
+                {
+                    "argv": resolve_path_args(argv),
+                    "env": build_env_fingerprint(),
+                    "color": sys.stdout.isatty(),
+                },
+            ).encode()
+            + b"\n",
+        )
+        conn.settimeout(None)
+    except OSError:
+        conn.close()
+        return None
+
+    with conn, conn.makefile("rb") as responses:
+        for line in responses:
+            message = json.loads(line)
+            if "rejected" in message:
+                return None
+            if "exit" in message:
+                return message["exit"]
+
+            stream = sys.stderr if message["stream"] == "stderr" else sys.stdout
+            stream.write(message["data"])
+            stream.flush()
+
+    # The agent went away mid command, output may be partial
+    return 1
+
+
+def main() -> None:
+    argv = sys.argv[1:]
+    if should_forward(argv):
+        exit_code = forward_to_agent(argv)
+        if exit_code is not None:
+            sys.exit(exit_code)
+
+    from serverless_aws_bastion.cli import main as cli_main
+
+    cli_main()
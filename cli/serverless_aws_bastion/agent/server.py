@@ -0,0 +1,252 @@
+import io
+import json
+import os
+import signal
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import click
+from botocore.exceptions import BotoCoreError, ClientError
+from click import Abort
+
+from serverless_aws_bastion.agent.client import build_env_fingerprint
+from serverless_aws_bastion.config import AGENT_INVENTORY_TTL, AGENT_SOCKET
+from serverless_aws_bastion.utils.aws_utils import (
+    fetch_boto3_client,
+    load_aws_account_id,
+)
+from serverless_aws_bastion.utils.cache_utils import enable_inventory_cache
+from serverless_aws_bastion.utils.click_utils import log_error, log_info
+from serverless_aws_bastion.utils.state_utils import (
+    load_state_path,
+    read_json_state,
+    write_json_state,
+)
+
+
+WARM_SERVICES = ("ecs", "ec2", "ssm", "sts")
+
+
+class ThreadLocalStream(io.TextIOBase):
+    """
+    Stands in for stdout or stderr & sends each thread's writes to the
+    client that thread is serving
+    """
+
+    encoding = "utf-8"
+
+    def __init__(self, name: str, fallback: Any):
+        self.name = name
+        self.fallback = fallback
+        self.local = threading.local()
+
+    def write(self, data: str) -> int:
+        send = getattr(self.local, "send", None)
+        if send:
+            send({"stream": self.name, "data": data})
+        else:
+            self.fallback.write(data)
+        return len(data)
+
+    def flush(self) -> None:
+        if not getattr(self.local, "send", None):
+            self.fallback.flush()
+
+    def isatty(self) -> bool:
+        return False
+
+
+STDOUT = ThreadLocalStream("stdout", sys.stdout)
+STDERR = ThreadLocalStream("stderr", sys.stderr)
+
+
+class AgentRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        request = json.loads(self.rfile.readline())
+        server: AgentServer = self.server  # type: ignore
+
+        if request["env"] != server.env_fingerprint:
+            self.send({"rejected": True})
+            return
+
+        STDOUT.local.send = self.send
+        STDERR.local.send = self.send
+        try:
+            exit_code = server.run_command(request["argv"], request["color"])
+        finally:
+            STDOUT.local.send = None
+            STDERR.local.send = None
+
+        self.send({"exit": exit_code})
+
+    def send(self, message: Dict[str, Any]) -> None:
+        try:
+            self.wfile.write(json.dumps(message).encode() + b"\n")
+            self.wfile.flush()
+        except OSError:
+            pass
+
+
+class AgentServer(socketserver.ThreadingUnixStreamServer):
+    """
+    Serves cli commands from a long lived process so boto3 clients, their
+    connection pools, the caller identity & recent inventory stay warm
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str):
+        super().__init__(socket_path, AgentRequestHandler)
+        os.chmod(socket_path, 0o600)
+
+        self.env_fingerprint = build_env_fingerprint()
+        self.started_at = time.time()
+
+    def run_command(self, argv: list, color: bool) -> int:
+        from serverless_aws_bastion.cli import cli
+
+        try:
+            cli.main(
+                args=argv,
+                prog_name="sab",
+                standalone_mode=False,
+                color=color,
+            )
+        except click.exceptions.Exit as e:
+            return e.exit_code
+        except click.ClickException as e:
+            e.show()
+            return e.exit_code
+        except Abort:
+            click.echo("Aborted!", err=True)
+            return 1
+        except SystemExit as e:
+            return e.code if isinstance(e.code, int) else 1
+        except Exception as e:
+            click.echo(f"Error: {e}", err=True)
+            return 1
+
+        return 0
+
+
+def warm_clients() -> None:
+    """
+    Creates the clients & resolves the caller identity up front so the
+    first forwarded command doesn't pay for it
+    """
+    for service in WARM_SERVICES:
+        fetch_boto3_client(service)
+
+    try:
+        load_aws_account_id()
+    except (BotoCoreError, ClientError) as e:
+        log_error(f"Unable to load the caller identity, {e}")
+
+
+def run_agent() -> None:
+    """
+    Runs the agent in the foreground until it's sent SIGTERM or SIGINT
+    """
+    socket_path = load_state_path(AGENT_SOCKET)
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+
+    enable_inventory_cache(AGENT_INVENTORY_TTL)
+
+    server = AgentServer(socket_path)
+    paths = load_agent_paths()
+    with open(paths["pid"], "w") as f:
+        f.write(str(os.getpid()))
+    write_json_state(
+        paths["json"],
+        {"pid": os.getpid(), "started_at": server.started_at},
+    )
+
+    def stop(*args) -> None:
+        threading.Thread(target=server.shutdown).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    sys.stdout = STDOUT  # type: ignore
+    sys.stderr = STDERR  # type: ignore
+    log_info(f"Agent listening on {socket_path}")
+
+    ctx = click.get_current_context()
+
+    def warm() -> None:
+        with ctx.scope(cleanup=False):
+            warm_clients()
+
+    threading.Thread(target=warm, daemon=True).start()
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        os.remove(socket_path)
+        os.remove(paths["pid"])
+
+
+def load_agent_paths() -> Dict[str, str]:
+    return {ext: load_state_path(f"agent.{ext}") for ext in ("pid", "json", "log")}
+
+
+def load_agent_pid() -> Optional[int]:
+    """
+    Loads the pid of the running agent, cleaning up stale pid files
+    """
+    pid_path = load_agent_paths()["pid"]
+    try:
+        with open(pid_path) as f:
+            pid = int(f.read().strip())
+        os.kill(pid, 0)
+        return pid
+    except (OSError, ValueError):
+        if os.path.exists(pid_path):
+            os.remove(pid_path)
+        return None
+
+
+def start_agent(run_args: list) -> int:
+    """
+    Launches `agent run` as a detached background process and returns its pid
+    """
+    if load_agent_pid():
+        log_error("The agent is already running")
+        raise Abort()
+
+    with open(load_agent_paths()["log"], "a") as log_file:
+        process = subprocess.Popen(
+            [sys.executable, "-m", "serverless_aws_bastion", "agent", "run"] + run_args,
+            stdin=subprocess.DEVNULL,
+            stdout=log_file,
+            stderr=log_file,
+            start_new_session=True,
+        )
+    return process.pid
+
+
+def stop_agent() -> None:
+    pid = load_agent_pid()
+    if not pid:
+        log_error("The agent isn't running")
+        raise Abort()
+
+    os.kill(pid, signal.SIGTERM)
+
+
+def load_agent_status() -> Dict[str, Any]:
+    pid = load_agent_pid()
+    status = read_json_state(load_agent_paths()["json"], {})
+    return {
+        "running": pid is not None,
+        "pid": pid,
+        "uptime_seconds": int(time.time() - status["started_at"])
+        if pid and status
+        else 0,
+        "socket": load_state_path(AGENT_SOCKET),
+    }
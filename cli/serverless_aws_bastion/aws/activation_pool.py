@@ -0,0 +1,187 @@
+import hashlib
+import os
+import subprocess
+import sys
+from time import time
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from serverless_aws_bastion.aws.ssm import create_activation, delete_activation
+from serverless_aws_bastion.config import (
+    ACTIVATION_POOL_EXPIRY_MINUTES,
+    ACTIVATION_POOL_MIN_REMAINING,
+    ACTIVATION_POOL_SCOPE_KEYS,
+    TASK_ROLE_NAME,
+)
+from serverless_aws_bastion.utils.aws_utils import (
+    load_aws_region_name,
+    load_client_scope,
+)
+from serverless_aws_bastion.utils.click_utils import log_info
+from serverless_aws_bastion.utils.state_utils import (
+    hold_state_lock,
+    load_state_path,
+    read_json_state,
+    write_json_state,
+)
+from serverless_aws_bastion.utils.thread_utils import run_in_parallel
+
+
+def load_pool_scope() -> str:
+    """
+    Activations belong to one account & region, so each set of credentials
+    & assumed role gets its own pool in each region. The pool is keyed by the
+    settings that pick the credentials rather than the account id, which
+    would cost the sts call the pool is there to save.
+    """
+    credentials = "\n".join(
+        f"{k}={os.environ.get(k, '')}" for k in ACTIVATION_POOL_SCOPE_KEYS
+    )
+    scope = hashlib.sha256(f"{credentials}\n{load_client_scope()}".encode())
+    return f"{load_aws_region_name()}-{scope.hexdigest()[:16]}"
+
+
+def load_pool_path() -> str:
+    return load_state_path("activations", f"{load_pool_scope()}.json")
+
+
+def load_pool_lock_name() -> str:
+    return f"activations/{load_pool_scope()}.lock"
+
+
+def split_expiring(
+    activations: List[Dict[str, Any]],
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Splits pooled activations into the ones still usable & the ones too close
+    to expiring for a bastion to register with in time
+    """
+    cutoff = time() + ACTIVATION_POOL_MIN_REMAINING
+    usable = [a for a in activations if a["ExpiresAt"] > cutoff]
+    expiring = [a for a in activations if a["ExpiresAt"] <= cutoff]
+    return usable, expiring
+
+
+def retire_activations(activations: List[Dict[str, Any]]) -> None:
+    run_in_parallel(delete_activation, [a["ActivationId"] for a in activations])
+
+
+def take_pooled_activation(instance_name: str) -> Optional[Dict[str, Any]]:
+    """
+    Takes a ready activation for the bastion name out of the pool, returns
+    None if the pool is empty so the caller can create one inline
+    """
+    path = load_pool_path()
+    with hold_state_lock(load_pool_lock_name(), wait=True):
+        pool = read_json_state(path, {})
+        usable, expiring = split_expiring(pool.get(instance_name, []))
+        activation = usable.pop(0) if usable else None
+        pool[instance_name] = usable
+        write_json_state(path, pool)
+
+    retire_activations(expiring)
+    return activation
+
+
+def fill_activation_pool(instance_name: str, size: int) -> int:
+    """
+    Tops the pool for a bastion name up to the given size, retiring any
+    activations close to expiring. Returns how many were created.
+    """
+    path = load_pool_path()
+    with hold_state_lock(f"{load_pool_lock_name()}.fill") as acquired:
+        if not acquired:
+            # Another process is already filling this pool
+            return 0
+
+        with hold_state_lock(load_pool_lock_name(), wait=True):
+            pool = read_json_state(path, {})
+            usable, expiring = split_expiring(pool.get(instance_name, []))
+            pool[instance_name] = usable
+            write_json_state(path, pool)
+
+        retire_activations(expiring)
+        missing = max(size - len(usable), 0)
+        created = run_in_parallel(
+            lambda _: create_pooled_activation(instance_name),
+            range(missing),
+        )
+
+        with hold_state_lock(load_pool_lock_name(), wait=True):
+            pool = read_json_state(path, {})
+            pool[instance_name] = pool.get(instance_name, []) + created
+            write_json_state(path, pool)
+
+    return len(created)
+
+
+def create_pooled_activation(instance_name: str) -> Dict[str, Any]:
+    """
+    Creates an activation tagged exactly as a launch would tag it, so the
+    bastion that takes it looks the same as one launched without the pool
+    """
+    bastion_id = str(uuid4())
+    activation = create_activation(
+        TASK_ROLE_NAME,
+        instance_name,
+        bastion_id,
+        ACTIVATION_POOL_EXPIRY_MINUTES,
+    )
+    return {
+        "ActivationId": activation["ActivationId"],
+        "ActivationCode": activation["ActivationCode"],
+        "BastionId": bastion_id,
+        "ExpiresAt": int(time()) + ACTIVATION_POOL_EXPIRY_MINUTES * 60,
+    }
+
+
+def fill_activation_pool_in_background(instance_name: str, size: int) -> None:
+    """
+    Refills the pool from a detached process so the launch that just took an
+    activation doesn't wait on it
+    """
+    args = [
+        sys.executable,
+        "-m",
+        "serverless_aws_bastion",
+        "activation-pool",
+        "fill",
+        "--bastion-name",
+        instance_name,
+        "--size",
+        str(size),
+        "--region",
+        load_aws_region_name(),
+        "--log-level",
+        "error",
+    ]
+    subprocess.Popen(
+        args,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def load_activation_pool_status() -> Dict[str, Dict[str, int]]:
+    pool = read_json_state(load_pool_path(), {})
+    status = {}
+    for instance_name, activations in pool.items():
+        usable, expiring = split_expiring(activations)
+        status[instance_name] = {"ready": len(usable), "expiring": len(expiring)}
+    return status
+
+
+def clear_activation_pool() -> int:
+    """
+    Deletes every pooled activation in the region, returns how many
+    """
+    with hold_state_lock(load_pool_lock_name(), wait=True):
+        pool = read_json_state(load_pool_path(), {})
+        write_json_state(load_pool_path(), {})
+
+    activations = [a for instance in pool.values() for a in instance]
+    log_info(f"Deleting {len(activations)} pooled activations...")
+    retire_activations(activations)
+    return len(activations)
@@ -0,0 +1,115 @@
+import hashlib
+import os
+import re
+from typing import Dict, Optional
+
+from click import Abort
+from mypy_boto3_ssm.client import SSMClient
+
+from serverless_aws_bastion.config import (
+    AUTHORIZED_KEYS_MAX_PARAMETER_SIZE,
+    AUTHORIZED_KEYS_PARAMETER_PREFIX,
+)
+from serverless_aws_bastion.utils.aws_utils import (
+    fetch_boto3_client,
+    load_aws_account_id,
+    load_aws_region_name,
+)
+from serverless_aws_bastion.utils.click_utils import log_error, log_info
+from serverless_aws_bastion.utils.state_utils import (
+    hold_state_lock,
+    load_state_path,
+    read_json_state,
+    write_json_state,
+)
+
+
+def build_authorized_keys_env(authorized_keys: str) -> Dict[str, str]:
+    """
+    Builds the container environment for the authorized keys. Keys can be
+    passed inline, as an `ssm:<parameter>` or `s3://bucket/key` reference the
+    bastion reads at boot & refreshes, or as a `file://<path>` that's uploaded
+    to an ssm parameter first.
+    """
+    if authorized_keys.startswith("file://"):
+        parameter_name = upload_authorized_keys_file(authorized_keys[7:])
+        return {"AUTHORIZED_KEYS_SOURCE": f"ssm:{parameter_name}"}
+
+    if authorized_keys.startswith(("ssm:", "s3://")):
+        return {"AUTHORIZED_KEYS_SOURCE": authorized_keys}
+
+    return {"AUTHORIZED_SSH_KEYS": authorized_keys}
+
+
+def build_keys_parameter_name(path: str) -> str:
+    """
+    Names the parameter after the file & a hash of its absolute path, so
+    files that share a name in different directories don't overwrite each
+    other's keys
+    """
+    full_path = os.path.abspath(os.path.expanduser(path))
+    name = re.sub(r"[^a-zA-Z0-9_.-]", "-", os.path.splitext(os.path.basename(path))[0])
+    path_hash = hashlib.sha256(full_path.encode()).hexdigest()[:8]
+    return f"{AUTHORIZED_KEYS_PARAMETER_PREFIX}/{name}-{path_hash}"
+
+
+def load_parameter_hash(parameter_name: str) -> Optional[str]:
+    """
+    Hashes the current value of a parameter or returns None if it doesn't
+    exist, so identical keys aren't written again
+    """
+    client: SSMClient = fetch_boto3_client("ssm")
+    try:
+        value = client.get_parameter(Name=parameter_name)["Parameter"]["Value"]
+    except client.exceptions.ParameterNotFound:
+        return None
+    return hashlib.sha256(value.encode()).hexdigest()
+
+
+def upload_authorized_keys_file(path: str) -> str:
+    """
+    Uploads a local authorized keys file to an ssm parameter named after the
+    file. Launches only write the parameter when its value doesn't match the
+    file, the hash of the last upload is kept locally so a parameter that was
+    changed or removed since is reported. Returns the parameter name.
+    """
+    try:
+        with open(os.path.expanduser(path)) as f:
+            content = f.read().strip()
+    except OSError as e:
+        log_error(f"Unable to read authorized keys from {path}, {e}")
+        raise Abort()
+
+    if len(content.encode()) > AUTHORIZED_KEYS_MAX_PARAMETER_SIZE:
+        log_error(
+            f"{path} is too large for an ssm parameter, upload it to s3 & pass "
+            "the s3:// url instead",
+        )
+        raise Abort()
+
+    parameter_name = build_keys_parameter_name(path)
+    content_hash = hashlib.sha256(content.encode()).hexdigest()
+    cache_key = f"{load_aws_account_id()}:{load_aws_region_name()}:{parameter_name}"
+    state_path = load_state_path("authorized_keys.json")
+
+    with hold_state_lock("authorized_keys.lock", wait=True):
+        uploaded = read_json_state(state_path, {})
+
+        # The parameter may have been deleted or edited since the last upload
+        client: SSMClient = fetch_boto3_client("ssm")
+        if load_parameter_hash(parameter_name) != content_hash:
+            if uploaded.get(cache_key) == content_hash:
+                log_info(f"{parameter_name} changed since it was uploaded")
+            log_info(f"Uploading authorized keys to {parameter_name}")
+            client.put_parameter(
+                Name=parameter_name,
+                Value=content,
+                Type="String",
+                Overwrite=True,
+                Tier="Intelligent-Tiering",
+            )
+
+        uploaded[cache_key] = content_hash
+        write_json_state(state_path, uploaded)
+
+    return parameter_name
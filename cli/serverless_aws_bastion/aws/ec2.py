@@ -1,5 +1,6 @@
 from typing import Dict, List
 
+from botocore.exceptions import ClientError
 from mypy_boto3_ec2.client import EC2Client
 from mypy_boto3_ecs.type_defs import TaskTypeDef
 
@@ -7,6 +8,7 @@ from serverless_aws_bastion.utils.aws_utils import (
     fetch_boto3_client,
     get_tag_value,
 )
+from serverless_aws_bastion.utils.click_utils import log_debug
 
 
 def load_public_ips_from_task_data(task_data: List[TaskTypeDef]) -> Dict[str, str]:
@@ -27,6 +29,9 @@ def load_public_ips_for_network_interfaces(
     Loads the public ip addresses for a list of network
     interface ids
     """
+    if not interface_ids:
+        return {}
+
     client: EC2Client = fetch_boto3_client("ec2")
     interfaces = client.describe_network_interfaces(
         NetworkInterfaceIds=interface_ids,
@@ -42,3 +47,19 @@ def load_public_ips_for_network_interfaces(
             pass
 
     return public_ips
+
+
+def load_subnet_zones(subnet_ids: List[str]) -> Dict[str, str]:
+    """
+    Loads the availability zone id of each subnet, zone ids name the same
+    physical zone in every account unlike zone names. If the subnets can't be
+    described each subnet is treated as its own zone.
+    """
+    client: EC2Client = fetch_boto3_client("ec2")
+    try:
+        subnets = client.describe_subnets(SubnetIds=subnet_ids)["Subnets"]
+    except ClientError as e:
+        log_debug(f"Unable to load the subnet zones, {e}")
+        return {s: s for s in subnet_ids}
+
+    return {s["SubnetId"]: s["AvailabilityZoneId"] for s in subnets}
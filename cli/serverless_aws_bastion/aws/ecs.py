@@ -1,9 +1,10 @@
-from time import sleep
-from typing import Dict, List, Optional
+from time import sleep, time
+from typing import Any, ContextManager, Dict, List, Optional, Tuple
 from uuid import uuid4
 
 from click import Abort
 from mypy_boto3_ecs.client import ECSClient
+from mypy_boto3_ecs.literals import AssignPublicIpType
 from mypy_boto3_ecs.type_defs import (
     CreateClusterResponseTypeDef,
     DescribeClustersResponseTypeDef,
@@ -12,27 +13,66 @@ from mypy_boto3_ecs.type_defs import (
     TaskTypeDef,
 )
 
+from serverless_aws_bastion.aws.activation_pool import (
+    fill_activation_pool_in_background,
+    take_pooled_activation,
+)
+from serverless_aws_bastion.aws.authorized_keys import (
+    build_authorized_keys_env,
+)
 from serverless_aws_bastion.aws.ec2 import (
     load_public_ips_for_network_interfaces,
+    load_public_ips_from_task_data,
+)
+from serverless_aws_bastion.aws.placement import place_task
+from serverless_aws_bastion.aws.preflight import run_preflight_checks
+from serverless_aws_bastion.aws.ssm import (
+    create_activation,
+    delete_activation,
+    load_instance_ids,
+    wait_for_instance_registration,
 )
-from serverless_aws_bastion.aws.ssm import create_activation
 from serverless_aws_bastion.config import (
     CLUSTER_PROVISION_TIMEOUT,
     DEFAULT_NAME,
+    ECS_DESCRIBE_BATCH_SIZE,
+    LOG_GROUP_NAME,
+    LOG_STREAM_PREFIX,
     TASK_BOOT_TIMEOUT,
     TASK_CPU,
     TASK_MEMORY,
     TASK_ROLE_NAME,
 )
+from serverless_aws_bastion.dto.instance_info import (
+    InstanceInfo,
+    build_instance_info,
+    has_public_ip,
+    load_bastion_type,
+)
+from serverless_aws_bastion.dto.launch_config import LaunchConfig
 from serverless_aws_bastion.enum.bastion_type import BastionType
 from serverless_aws_bastion.enum.cluster_status import ClusterStatus
+from serverless_aws_bastion.enum.sshd_profile import SshdProfile
 from serverless_aws_bastion.utils.aws_utils import (
     build_tags,
     fetch_boto3_client,
+    find_tag_value,
     get_tag_value,
     load_aws_region_name,
+    load_client_scope,
+)
+from serverless_aws_bastion.utils.cache_utils import (
+    cached_inventory,
+    clear_inventory_cache,
 )
 from serverless_aws_bastion.utils.click_utils import log_error, log_info
+from serverless_aws_bastion.utils.coalesce_utils import Coalescer
+from serverless_aws_bastion.utils.journal_utils import (
+    journal_operation,
+    load_current_operation,
+    record_operation,
+)
+from serverless_aws_bastion.utils.thread_utils import run_in_parallel
 
 
 def create_fargate_cluster(cluster_name: str) -> CreateClusterResponseTypeDef:
@@ -68,12 +108,54 @@ def delete_fargate_cluster(cluster_name: str) -> None:
     wait_for_fargate_cluster_status(cluster_name, ClusterStatus.INACTIVE)
 
 
+def fetch_cluster_descriptions(
+    key: str,
+    cluster_names: List[str],
+) -> Dict[str, Tuple[str, Any]]:
+    """
+    Describes clusters in batches, returning each cluster or failure by both
+    its name & arn since callers may pass either
+    """
+    client: ECSClient = fetch_boto3_client("ecs")
+
+    results: Dict[str, Tuple[str, Any]] = {}
+    for i in range(0, len(cluster_names), ECS_DESCRIBE_BATCH_SIZE):
+        response = client.describe_clusters(
+            clusters=cluster_names[i : i + ECS_DESCRIBE_BATCH_SIZE],
+        )
+        for c in response["clusters"]:
+            results[c["clusterName"]] = results[c["clusterArn"]] = ("clusters", c)
+        for f in response["failures"]:
+            results[f["arn"].split("/")[-1]] = results[f["arn"]] = ("failures", f)
+    return results
+
+
+CLUSTER_DESCRIPTIONS = Coalescer(fetch_cluster_descriptions)
+
+
 def describe_fargate_cluster(cluster_name: str) -> DescribeClustersResponseTypeDef:
     """
-    Fetches the status for a given cluster
+    Fetches the status for a given cluster, concurrent calls share batched
+    describe calls
+    """
+    results = CLUSTER_DESCRIPTIONS.load(load_client_scope(), [cluster_name])
+    response: Dict[str, List[Any]] = {"clusters": [], "failures": []}
+    for kind, result in results.values():
+        response[kind].append(result)
+    return response  # type: ignore
+
+
+@cached_inventory(load_client_scope)
+def list_fargate_clusters() -> List[str]:
+    """
+    Lists the names of every ECS cluster in the current account & region
     """
     client: ECSClient = fetch_boto3_client("ecs")
-    return client.describe_clusters(clusters=[cluster_name])
+
+    cluster_names = []
+    for page in client.get_paginator("list_clusters").paginate():
+        cluster_names += [arn.split("/")[-1] for arn in page["clusterArns"]]
+    return cluster_names
 
 
 def wait_for_fargate_cluster_status(
@@ -95,7 +177,7 @@ def wait_for_fargate_cluster_status(
         if len(cluster_info["failures"]) > 0:
             break
 
-        cluster_provisioned = all(
+        cluster_provisioned = bool(cluster_info["clusters"]) and all(
             [c["status"] == cluster_stats.value for c in cluster_info["clusters"]],
         )
 
@@ -137,9 +219,9 @@ def create_task_definition(task_role_arn: str, execution_role_arn: str) -> None:
                 "logConfiguration": {
                     "logDriver": "awslogs",
                     "options": {
-                        "awslogs-group": "/ecs/ssh-bastion",
+                        "awslogs-group": LOG_GROUP_NAME,
                         "awslogs-region": load_aws_region_name(),
-                        "awslogs-stream-prefix": "ecs",
+                        "awslogs-stream-prefix": LOG_STREAM_PREFIX,
                     },
                 },
             },
@@ -168,85 +250,264 @@ def launch_fargate_task(
     instance_name: str,
     timeout_minutes: int,
     bastion_type: BastionType,
+    sshd_profile: SshdProfile = SshdProfile.default,
+    idle_timeout_minutes: int = 0,
+    activation_pool_size: int = 0,
+    assign_public_ip: bool = True,
+    race_zones: bool = False,
 ) -> RunTaskResponseTypeDef:
     """
     Launches the ssh bastion Fargate task into the proper subnets & security groups,
-    also sends in the authorized keys.
+    also sends in the authorized keys. Zones that are out of Fargate capacity
+    are skipped over, with race_zones the two preferred zones are raced.
     """
     client: ECSClient = fetch_boto3_client("ecs")
+    operation_id = load_current_operation()
 
-    bastion_id = str(uuid4())
+    # Validated before the activation is created so a bad config never
+    # leaves one behind
+    run_preflight_checks(cluster_name, subnet_ids, security_group_ids)
 
     activation: Dict[str, str] = {}
-    if bastion_type == BastionType.ssm:
-        activation = create_activation(TASK_ROLE_NAME, instance_name, bastion_id)  # type: ignore
+    if bastion_type == BastionType.ssm and activation_pool_size:
+        activation = take_pooled_activation(instance_name) or {}
+        record_operation(
+            operation_id,
+            bastion_ids=[activation.get("BastionId", "")],
+            activation_ids=[activation.get("ActivationId", "")],
+        )
+        fill_activation_pool_in_background(instance_name, activation_pool_size)
 
-    log_info("Starting bastion task")
-    try:
-        response = client.run_task(
-            cluster=cluster_name,
-            taskDefinition=DEFAULT_NAME,
-            overrides={
-                "containerOverrides": [
-                    {
-                        "name": DEFAULT_NAME,
-                        "environment": [
-                            {"name": "AUTHORIZED_SSH_KEYS", "value": authorized_keys},
-                            {
-                                "name": "ACTIVATION_ID",
-                                "value": activation.get("ActivationId", ""),
-                            },
-                            {
-                                "name": "ACTIVATION_CODE",
-                                "value": activation.get("ActivationCode", ""),
-                            },
-                            {"name": "AWS_REGION", "value": load_aws_region_name()},
-                            {"name": "TIMEOUT", "value": str(timeout_minutes * 60)},
-                            {"name": "BASTION_TYPE", "value": bastion_type.value},
-                        ],
-                    },
-                ],
-            },
-            count=1,
-            launchType="FARGATE",
-            networkConfiguration={
-                "awsvpcConfiguration": {
-                    "subnets": subnet_ids.split(","),
-                    "securityGroups": security_group_ids.split(","),
-                    "assignPublicIp": "ENABLED",
+    keys_env = build_authorized_keys_env(authorized_keys)
+    assign_public_ip_value: AssignPublicIpType = (
+        "ENABLED" if assign_public_ip else "DISABLED"
+    )
+
+    # Each task gets a bastion id along with an ssm activation for ssm bastions
+    def new_activation() -> Dict[str, str]:
+        bastion_id = str(uuid4())
+        record_operation(operation_id, bastion_ids=[bastion_id])
+        if bastion_type != BastionType.ssm:
+            return {"BastionId": bastion_id}
+
+        created = create_activation(TASK_ROLE_NAME, instance_name, bastion_id)
+        record_operation(operation_id, activation_ids=[created["ActivationId"]])
+        return dict(created, BastionId=bastion_id)  # type: ignore
+
+    def run_in_subnets(
+        subnets: List[str],
+        activation: Dict[str, str],
+    ) -> RunTaskResponseTypeDef:
+        try:
+            response = client.run_task(
+                cluster=cluster_name,
+                taskDefinition=DEFAULT_NAME,
+                overrides={
+                    "containerOverrides": [
+                        {
+                            "name": DEFAULT_NAME,
+                            "environment": [
+                                {
+                                    "name": "AUTHORIZED_SSH_KEYS",
+                                    "value": keys_env.get("AUTHORIZED_SSH_KEYS", ""),
+                                },
+                                {
+                                    "name": "AUTHORIZED_KEYS_SOURCE",
+                                    "value": keys_env.get("AUTHORIZED_KEYS_SOURCE", ""),
+                                },
+                                {
+                                    "name": "ACTIVATION_ID",
+                                    "value": activation.get("ActivationId", ""),
+                                },
+                                {
+                                    "name": "ACTIVATION_CODE",
+                                    "value": activation.get("ActivationCode", ""),
+                                },
+                                {"name": "AWS_REGION", "value": load_aws_region_name()},
+                                {"name": "TIMEOUT", "value": str(timeout_minutes * 60)},
+                                {"name": "BASTION_TYPE", "value": bastion_type.value},
+                                {"name": "SSHD_PROFILE", "value": sshd_profile.value},
+                                {
+                                    "name": "IDLE_TIMEOUT",
+                                    "value": str(idle_timeout_minutes * 60),
+                                },
+                            ],
+                        },
+                    ],
                 },
-            },
-            tags=build_tags(
-                "ecs",
-                {
-                    "Name": f"{DEFAULT_NAME}/{instance_name}",
-                    "BastionId": bastion_id,
-                    "ActivationId": activation.get("ActivationId", ""),
+                count=1,
+                launchType="FARGATE",
+                enableExecuteCommand=bastion_type == BastionType.exec,
+                networkConfiguration={
+                    "awsvpcConfiguration": {
+                        "subnets": subnets,
+                        "securityGroups": security_group_ids.split(","),
+                        "assignPublicIp": assign_public_ip_value,
+                    },
                 },
-            ),
+                tags=build_tags(
+                    "ecs",
+                    {
+                        "Name": f"{DEFAULT_NAME}/{instance_name}",
+                        "BastionId": activation["BastionId"],
+                        "ActivationId": activation.get("ActivationId", ""),
+                        "BastionType": bastion_type.value,
+                        "AssignPublicIp": assign_public_ip_value,
+                    },
+                ),
+            )
+
+        except client.exceptions.ClusterNotFoundException:
+            log_error("Specified cluster to launch bastion task into doesn't exist")
+            raise Abort()
+
+        except (
+            client.exceptions.ClientException,
+            client.exceptions.InvalidParameterException,
+        ) as e:
+            log_error(e.response["Error"]["Message"])
+            raise Abort()
+
+        record_operation(
+            operation_id,
+            task_arns=[t["taskArn"] for t in response["tasks"]],
         )
+        return response
+
+    # A raced launch needs its own activation, which is deleted straight away
+    # if its zone doesn't place a task so it's never left behind
+    def race_in_subnets(subnets: List[str]) -> RunTaskResponseTypeDef:
+        race_activation = new_activation()
+        response = None
+        try:
+            response = run_in_subnets(subnets, race_activation)
+            return response
+        finally:
+            if race_activation.get("ActivationId") and not (
+                response and response["tasks"]
+            ):
+                delete_activation(race_activation["ActivationId"])
+
+    # Retries in other zones reuse the same bastion id & activation since a
+    # failed placement never starts a task
+    activation = activation or new_activation()
 
-    except client.exceptions.ClusterNotFoundException:
-        log_error("Specified cluster to launch bastion task into doesn't exist")
-        raise Abort()
-
-    except (
-        client.exceptions.ClientException,
-        client.exceptions.InvalidParameterException,
-    ) as e:
-        log_error(e.response["Error"]["Message"])
-        raise Abort()
+    log_info("Starting bastion task")
+    response = place_task(
+        cluster_name,
+        subnet_ids.split(","),
+        lambda subnets: run_in_subnets(subnets, activation),
+        race_in_subnets if race_zones else None,
+    )
 
+    clear_inventory_cache()
     wait_for_tasks_to_start(cluster_name, response["tasks"])
     return response
 
 
+def launch_bastion_task(
+    launch_config: LaunchConfig,
+    instance_name: str,
+) -> RunTaskResponseTypeDef:
+    """
+    Launches a bastion task using a shared launch config, journaling what's
+    created so an interrupted launch can be resumed or rolled back
+    """
+    with journal_launch(launch_config, instance_name):
+        return launch_fargate_task(
+            cluster_name=launch_config.cluster_name,
+            subnet_ids=launch_config.subnet_ids,
+            security_group_ids=launch_config.security_group_ids,
+            authorized_keys=launch_config.authorized_keys,
+            instance_name=instance_name,
+            timeout_minutes=launch_config.timeout_minutes,
+            bastion_type=launch_config.bastion_type,
+            sshd_profile=launch_config.sshd_profile,
+            idle_timeout_minutes=launch_config.idle_timeout_minutes,
+            activation_pool_size=launch_config.activation_pool_size,
+            assign_public_ip=launch_config.public_ip,
+            race_zones=launch_config.race_zones,
+        )
+
+
+def journal_launch(
+    launch_config: LaunchConfig,
+    instance_name: str,
+) -> ContextManager[str]:
+    return journal_operation(
+        "launch",
+        cluster_name=launch_config.cluster_name,
+        instance_name=instance_name,
+        bastion_type=launch_config.bastion_type.value,
+        public_ip=launch_config.public_ip,
+    )
+
+
 def stop_fargate_tasks(cluster: str, tasks: List[TaskTypeDef]) -> None:
     client: ECSClient = fetch_boto3_client("ecs")
 
     log_info(f"Stopping {len(tasks)} tasks...")
+    with journal_operation("stop", cluster_name=cluster) as operation_id:
+        record_operation(operation_id, task_arns=[t["taskArn"] for t in tasks])
+        for t in tasks:
+            client.stop_task(cluster=cluster, task=t["taskArn"])
+    clear_inventory_cache()
+
+
+def tag_fargate_tasks(
+    tasks: List[TaskTypeDef],
+    tags: Dict[str, str],
+) -> None:
+    """
+    Adds or updates tags on a group of running tasks
+    """
+    client: ECSClient = fetch_boto3_client("ecs")
+
     for t in tasks:
-        client.stop_task(cluster=cluster, task=t["taskArn"])
+        client.tag_resource(
+            resourceArn=t["taskArn"],
+            tags=[{"key": k, "value": v} for k, v in tags.items()],
+        )
+    clear_inventory_cache()
+
+
+def extend_fargate_tasks(tasks: List[TaskTypeDef], minutes: int) -> int:
+    """
+    Extends the lease of a group of running bastion tasks so they stay alive
+    for the given number of minutes from now. The bastion polls for this tag
+    and only ever uses it to push its shutdown time back.
+
+    Returns the new lease expiry as a unix timestamp
+    """
+    lease_expires_at = int(time()) + minutes * 60
+
+    log_info(f"Extending {len(tasks)} tasks...")
+    tag_fargate_tasks(tasks, {"LeaseExpiresAt": str(lease_expires_at)})
+    return lease_expires_at
+
+
+def fetch_task_descriptions(
+    key: Tuple[str, str],
+    task_arns: List[str],
+) -> Dict[str, Tuple[str, Any]]:
+    """
+    Describes tasks in batches, returning each task or failure by its arn
+    """
+    client: ECSClient = fetch_boto3_client("ecs")
+
+    results: Dict[str, Tuple[str, Any]] = {}
+    for i in range(0, len(task_arns), ECS_DESCRIBE_BATCH_SIZE):
+        response = client.describe_tasks(
+            cluster=key[1],
+            tasks=task_arns[i : i + ECS_DESCRIBE_BATCH_SIZE],
+            include=["TAGS"],
+        )
+        results.update({t["taskArn"]: ("tasks", t) for t in response["tasks"]})
+        results.update({f["arn"]: ("failures", f) for f in response["failures"]})
+    return results
+
+
+TASK_DESCRIPTIONS = Coalescer(fetch_task_descriptions)
 
 
 def describe_task(
@@ -254,18 +515,17 @@ def describe_task(
     task_arns: List[str],
 ) -> Optional[DescribeTasksResponseTypeDef]:
     """
-    Fetches the statuses for a group of tasks
+    Fetches the statuses for a group of tasks, concurrent calls for the same
+    cluster share batched describe calls
     """
-    client: ECSClient = fetch_boto3_client("ecs")
-
     if len(task_arns) == 0:
         return None
 
-    return client.describe_tasks(
-        cluster=cluster_name,
-        tasks=task_arns,
-        include=["TAGS"],
-    )
+    results = TASK_DESCRIPTIONS.load((load_client_scope(), cluster_name), task_arns)
+    response: Dict[str, List[Any]] = {"tasks": [], "failures": []}
+    for kind, result in results.values():
+        response[kind].append(result)
+    return response  # type: ignore
 
 
 def wait_for_tasks_to_start(
@@ -301,6 +561,7 @@ def wait_for_tasks_to_start(
         raise Abort()
 
 
+@cached_inventory(load_client_scope)
 def load_running_task_info(
     cluster_name: str,
     instance_name: Optional[str] = None,
@@ -338,6 +599,160 @@ def load_running_task_info(
     return response
 
 
+def load_running_instance_info(
+    cluster_name: str,
+    instance_name: Optional[str] = None,
+    bastion_id: Optional[str] = None,
+    load_ips: bool = True,
+) -> List[InstanceInfo]:
+    """
+    Loads the running bastion tasks along with their public ips & ssm
+    instance ids and returns them as instance info
+    """
+    task_instance_info = load_running_task_info(cluster_name, instance_name, bastion_id)
+    return build_task_instance_info(
+        task_instance_info,
+        instance_name,
+        [bastion_id] if bastion_id else None,
+        load_ips,
+    )
+
+
+def build_task_instance_info(
+    task_data: List[TaskTypeDef],
+    instance_name: Optional[str] = None,
+    bastion_ids: Optional[List[str]] = None,
+    load_ips: bool = True,
+) -> List[InstanceInfo]:
+    """
+    Enriches bastion tasks with their public ips & ssm instance ids
+    """
+    if not task_data:
+        return []
+
+    # Exec bastions are reached through ecs & private bastions through ssm,
+    # neither has a public ip worth looking up
+    bastion_types = [load_bastion_type(t) for t in task_data]
+    ip_task_data = [
+        t
+        for t, b in zip(task_data, bastion_types)
+        if load_ips and b != BastionType.exec and has_public_ip(t)
+    ]
+
+    def load_task_ips() -> Dict[str, str]:
+        return load_public_ips_from_task_data(ip_task_data) if ip_task_data else {}
+
+    def load_ssm_instance_ids() -> Dict[str, str]:
+        if BastionType.ssm not in bastion_types:
+            return {}
+        return load_instance_ids(instance_name, bastion_ids)
+
+    # The ec2 & ssm lookups don't depend on each other so they run together
+    task_instance_ips, ssm_instance_info = run_in_parallel(
+        lambda load: load(),
+        [load_task_ips, load_ssm_instance_ids],
+    )
+
+    return build_instance_info(
+        task_data,
+        task_instance_ips,
+        ssm_instance_info,
+    )
+
+
+def launch_bastion(
+    launch_config: LaunchConfig,
+    instance_name: str,
+) -> List[InstanceInfo]:
+    """
+    Launches a bastion, waits for it to start & returns its instance info
+    """
+    with journal_launch(launch_config, instance_name):
+        response = launch_bastion_task(launch_config, instance_name)
+        return load_launched_instance_info(
+            launch_config.cluster_name,
+            instance_name,
+            response["tasks"],
+            launch_config.bastion_type,
+            launch_config.public_ip,
+        )
+
+
+def load_launched_instance_info(
+    cluster_name: str,
+    instance_name: str,
+    tasks: List[TaskTypeDef],
+    bastion_type: BastionType,
+    public_ip: bool,
+) -> List[InstanceInfo]:
+    """
+    Loads the instance info for tasks that were just launched & have started
+    """
+    # Without a public ip there's no network interface to look up, ssm
+    # bastions are only reachable by their ssm instance id so wait for them
+    # to register rather than return them unreachable
+    if not public_ip:
+        ssm_instance_ids: Dict[str, str] = {}
+        if bastion_type == BastionType.ssm:
+            ssm_instance_ids = wait_for_instance_registration(
+                [get_tag_value("ecs", t["tags"], "BastionId") for t in tasks],
+            )
+        return build_instance_info(tasks, {}, ssm_instance_ids)
+
+    # The run_task response is taken before the task's network interface
+    # is attached, so the started tasks are described again
+    task_info = describe_task(cluster_name, [t["taskArn"] for t in tasks])
+    tasks = task_info["tasks"] if task_info else []
+    return build_task_instance_info(
+        tasks,
+        instance_name,
+        [get_tag_value("ecs", t["tags"], "BastionId") for t in tasks],
+    )
+
+
+def find_bastion_task_arn(cluster_name: str, bastion_id: str) -> Optional[str]:
+    """
+    Finds the task for a bastion id, including bastions that have recently
+    stopped so their logs can still be found
+    """
+    client: ECSClient = fetch_boto3_client("ecs")
+
+    for desired_status in ("RUNNING", "STOPPED"):
+        task_list = client.list_tasks(
+            cluster=cluster_name,
+            family=DEFAULT_NAME,
+            desiredStatus=desired_status,  # type: ignore
+        )
+        task_response = describe_task(cluster_name, task_list["taskArns"])
+        for task in task_response["tasks"] if task_response else []:
+            if find_tag_value("ecs", task["tags"], "BastionId") == bastion_id:
+                return task["taskArn"]
+
+    return None
+
+
+def build_execute_command(cluster_name: str, task_arn: str) -> List[str]:
+    """
+    Builds the aws cli command that opens a shell on an exec bastion
+    """
+    return [
+        "aws",
+        "ecs",
+        "execute-command",
+        "--cluster",
+        cluster_name,
+        "--task",
+        task_arn,
+        "--container",
+        DEFAULT_NAME,
+        "--interactive",
+        "--command",
+        "/bin/bash",
+        "--region",
+        load_aws_region_name(),
+    ]
+
+
 def load_task_public_ips(cluster_name: str, instance_name: str) -> List[str]:
     """
     Loads all of the public ip addresses for tasks that were
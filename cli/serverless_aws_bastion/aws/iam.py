@@ -1,5 +1,6 @@
 import json
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Sequence
+from urllib.parse import unquote
 
 from mypy_boto3_iam.client import IAMClient
 
@@ -16,72 +17,167 @@ from serverless_aws_bastion.utils.aws_utils import (
 from serverless_aws_bastion.utils.click_utils import log_info
 
 
-def create_deregister_ssm_policy() -> str:
+def build_deregister_ssm_policy(
+    account_id: str,
+    keys_s3_urls: Sequence[str] = (),
+) -> Dict[str, Any]:
+    """
+    Builds the policy document for the bastion task, s3 reads are only
+    granted for the authorized keys locations it's given
+    """
+    statements: List[Dict[str, Any]] = [
+        {
+            "Action": [
+                "ssm:DeregisterManagedInstance",
+                "ssm:DescribeInstanceInformation",
+            ],
+            "Effect": "Allow",
+            "Resource": "*",
+        },
+        {
+            "Action": ["ecs:TagResource", "ecs:ListTagsForResource"],
+            "Effect": "Allow",
+            "Resource": f"arn:aws:ecs:*:{account_id}:task/*",
+        },
+    ]
+
+    s3_paths = [url[len("s3://") :] for url in keys_s3_urls]
+    if s3_paths:
+        statements.append(
+            {
+                "Action": ["s3:GetObject"],
+                "Effect": "Allow",
+                "Resource": [
+                    f"arn:aws:s3:::{path if '/' in path else path + '/'}*"
+                    for path in s3_paths
+                ],
+            },
+        )
+
+    return {"Version": "2012-10-17", "Statement": statements}
+
+
+def load_policy_document(policy_arn: str) -> Dict[str, Any]:
+    client: IAMClient = fetch_boto3_client("iam")
+    policy = client.get_policy(PolicyArn=policy_arn)["Policy"]
+    document: Any = client.get_policy_version(
+        PolicyArn=policy_arn,
+        VersionId=policy["DefaultVersionId"],
+    )["PolicyVersion"]["Document"]
+
+    if isinstance(document, str):
+        document = json.loads(unquote(document))
+    return document
+
+
+def update_policy_document(policy_arn: str, document: Dict[str, Any]) -> None:
+    """
+    Makes the document the policy's default version if it changed, so
+    existing deployments pick up new permissions
+    """
+    if load_policy_document(policy_arn) == document:
+        return
+
+    client: IAMClient = fetch_boto3_client("iam")
+    versions = client.list_policy_versions(PolicyArn=policy_arn)["Versions"]
+
+    # IAM keeps at most five versions of a policy
+    if len(versions) >= 5:
+        oldest = min(
+            [v for v in versions if not v["IsDefaultVersion"]],
+            key=lambda v: v["CreateDate"],
+        )
+        client.delete_policy_version(
+            PolicyArn=policy_arn,
+            VersionId=oldest["VersionId"],
+        )
+
+    log_info(f"Updating {SSM_DEREGISTER_POLICY_NAME} policy")
+    client.create_policy_version(
+        PolicyArn=policy_arn,
+        PolicyDocument=json.dumps(document),
+        SetAsDefault=True,
+    )
+
+
+def create_deregister_ssm_policy(keys_s3_urls: Sequence[str] = ()) -> str:
     """
     Creates an IAM policy that allows the bastion ECS task to
-    deregister itself from SSM.
+    deregister itself from SSM, report its active sessions as a tag,
+    read lease extensions from its tags & fetch authorized keys from the
+    given s3 locations. An existing policy is updated to match.
 
     Returns the policy arn
     """
     client: IAMClient = fetch_boto3_client("iam")
+    account_id = load_aws_account_id()
+    document = build_deregister_ssm_policy(account_id, keys_s3_urls)
+
     try:
         log_info(f"Creating {SSM_DEREGISTER_POLICY_NAME} policy")
         response = client.create_policy(
             Description="Used by serverless-aws-bastion ECS task to "
-            "deregister itself from SSM",
+            "deregister itself from SSM & manage its session and lease tags",
             PolicyName=SSM_DEREGISTER_POLICY_NAME,
-            PolicyDocument=json.dumps(
-                {
-                    "Version": "2012-10-17",
-                    "Statement": [
-                        {
-                            "Action": [
-                                "ssm:DeregisterManagedInstance",
-                                "ssm:DescribeInstanceInformation",
-                            ],
-                            "Effect": "Allow",
-                            "Resource": "*",
-                        },
-                    ],
-                },
-            ),
+            PolicyDocument=json.dumps(document),
         )
         return response["Policy"]["Arn"]
     except client.exceptions.EntityAlreadyExistsException:
-        account_id = load_aws_account_id()
-        return f"arn:aws:iam::{account_id}:policy/{SSM_DEREGISTER_POLICY_NAME}"
+        policy_arn = f"arn:aws:iam::{account_id}:policy/{SSM_DEREGISTER_POLICY_NAME}"
+        update_policy_document(policy_arn, document)
+        return policy_arn
 
 
 def delete_deregister_ssm_policy() -> None:
     """
     Deletes the IAM policy that allows the bastion ECS task to
-    deregister itself from SSM.
+    deregister itself from SSM, along with its old versions.
     """
     client: IAMClient = fetch_boto3_client("iam")
 
     try:
         log_info(f"Deleting {SSM_DEREGISTER_POLICY_NAME} policy")
         account_id = load_aws_account_id()
-        client.delete_policy(
-            PolicyArn=f"arn:aws:iam::{account_id}:policy/{SSM_DEREGISTER_POLICY_NAME}",
-        )
+        policy_arn = f"arn:aws:iam::{account_id}:policy/{SSM_DEREGISTER_POLICY_NAME}"
+
+        versions = client.list_policy_versions(PolicyArn=policy_arn)["Versions"]
+        for version in versions:
+            if not version["IsDefaultVersion"]:
+                client.delete_policy_version(
+                    PolicyArn=policy_arn,
+                    VersionId=version["VersionId"],
+                )
+        client.delete_policy(PolicyArn=policy_arn)
     except client.exceptions.NoSuchEntityException:
         return None
 
 
-def create_bastion_task_role() -> str:
+def create_bastion_task_role(keys_s3_urls: Sequence[str] = ()) -> str:
     """
     Creates the role that will be used by the bastion ECS task.
-    Skips creation if the role already exists.
+    Skips creation if the role already exists, its policies are still
+    brought up to date.
 
     Returns role arn
     """
     client: IAMClient = fetch_boto3_client("iam")
 
-    current_role_arn = fetch_role_arn(TASK_ROLE_NAME)
-    if current_role_arn:
-        return current_role_arn
+    role_arn = fetch_role_arn(TASK_ROLE_NAME)
+    if not role_arn:
+        role_arn = create_task_role(client)
+
+    attach_policies_to_role(
+        TASK_ROLE_NAME,
+        [
+            create_deregister_ssm_policy(keys_s3_urls),
+            "arn:aws:iam::aws:policy/AmazonSSMManagedInstanceCore",
+        ],
+    )
+
+    return role_arn
 
+
+def create_task_role(client: IAMClient) -> str:
     log_info(f"Creating {TASK_ROLE_NAME} role")
     response = client.create_role(
         RoleName=TASK_ROLE_NAME,
@@ -103,16 +199,6 @@ def create_bastion_task_role() -> str:
         ),
         Tags=build_tags("iam"),
     )
-
-    deregister_ssm_arn = create_deregister_ssm_policy()
-    attach_policies_to_role(
-        TASK_ROLE_NAME,
-        [
-            deregister_ssm_arn,
-            "arn:aws:iam::aws:policy/AmazonSSMManagedInstanceCore",
-        ],
-    )
-
     return response["Role"]["Arn"]
 
 
@@ -0,0 +1,92 @@
+import re
+from time import sleep, time
+from typing import Iterator, Optional, Set
+
+from click import Abort
+from mypy_boto3_logs.client import CloudWatchLogsClient
+from mypy_boto3_logs.type_defs import FilteredLogEventTypeDef
+
+from serverless_aws_bastion.config import (
+    DEFAULT_NAME,
+    LOG_GROUP_NAME,
+    LOG_STREAM_PREFIX,
+    LOGS_MAX_POLL_INTERVAL,
+    LOGS_MIN_POLL_INTERVAL,
+)
+from serverless_aws_bastion.utils.aws_utils import fetch_boto3_client
+from serverless_aws_bastion.utils.click_utils import log_error
+
+
+SINCE_UNITS = {"s": 1, "m": 60, "h": 60 * 60, "d": 60 * 60 * 24}
+
+
+def build_log_stream_name(task_arn: str) -> str:
+    """
+    The awslogs driver names streams prefix/container/task id
+    """
+    return f"{LOG_STREAM_PREFIX}/{DEFAULT_NAME}/{task_arn.split('/')[-1]}"
+
+
+def parse_since(since: str) -> int:
+    """
+    Turns a relative time such as `30s`, `10m`, `2h` or `1d` into a unix
+    timestamp in milliseconds
+    """
+    match = re.fullmatch(r"(\d+)([smhd])", since.strip())
+    if not match:
+        raise ValueError(f"Invalid since {since}, expected a number and s, m, h or d")
+
+    seconds = int(match.group(1)) * SINCE_UNITS[match.group(2)]
+    return int((time() - seconds) * 1000)
+
+
+def stream_log_events(
+    log_stream_name: str,
+    start_time: Optional[int] = None,
+    follow: bool = False,
+) -> Iterator[FilteredLogEventTypeDef]:
+    """
+    Yields a log stream's events in order. Each pass pages through everything
+    after the newest timestamp seen so far, events sharing that timestamp are
+    skipped by id so nothing is repeated across pages or polls. When following,
+    the poll interval backs off while the stream is quiet & resets on new events.
+    """
+    client: CloudWatchLogsClient = fetch_boto3_client("logs")
+    paginator = client.get_paginator("filter_log_events")
+
+    last_timestamp = start_time or 0
+    seen_at_last_timestamp: Set[str] = set()
+    poll_interval = LOGS_MIN_POLL_INTERVAL
+
+    while True:
+        found_events = False
+        try:
+            pages = paginator.paginate(
+                logGroupName=LOG_GROUP_NAME,
+                logStreamNames=[log_stream_name],
+                startTime=last_timestamp,
+            )
+            for page in pages:
+                for event in page["events"]:
+                    if event["eventId"] in seen_at_last_timestamp:
+                        continue
+
+                    if event["timestamp"] > last_timestamp:
+                        last_timestamp = event["timestamp"]
+                        seen_at_last_timestamp = set()
+                    seen_at_last_timestamp.add(event["eventId"])
+
+                    found_events = True
+                    yield event
+        except client.exceptions.ResourceNotFoundException:
+            log_error(f"Unable to find logs for {log_stream_name} in {LOG_GROUP_NAME}")
+            raise Abort()
+
+        if not follow:
+            return
+
+        if found_events:
+            poll_interval = LOGS_MIN_POLL_INTERVAL
+        else:
+            poll_interval = min(poll_interval * 2, LOGS_MAX_POLL_INTERVAL)
+        sleep(poll_interval)
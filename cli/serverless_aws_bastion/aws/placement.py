@@ -0,0 +1,250 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from botocore.exceptions import BotoCoreError, ClientError
+from click import Abort
+from mypy_boto3_ecs.client import ECSClient
+from mypy_boto3_ecs.type_defs import (
+    FailureTypeDef,
+    RunTaskResponseTypeDef,
+    TaskTypeDef,
+)
+
+from serverless_aws_bastion.aws.ec2 import load_subnet_zones
+from serverless_aws_bastion.aws.ssm import delete_activation
+from serverless_aws_bastion.config import (
+    PLACEMENT_FAILURE_TTL,
+    PLACEMENT_MEMORY_TTL,
+    TASK_BOOT_TIMEOUT,
+)
+from serverless_aws_bastion.utils.aws_utils import (
+    fetch_boto3_client,
+    find_tag_value,
+)
+from serverless_aws_bastion.utils.click_utils import log_error, log_info
+from serverless_aws_bastion.utils.state_utils import (
+    hold_state_lock,
+    load_state_path,
+    read_json_state,
+    write_json_state,
+)
+from serverless_aws_bastion.utils.thread_utils import run_in_parallel
+
+
+Launch = Callable[[List[str]], RunTaskResponseTypeDef]
+RaceResult = Tuple[Optional[RunTaskResponseTypeDef], Optional[BaseException]]
+
+
+def is_capacity_failure(failure: FailureTypeDef) -> bool:
+    """
+    Fargate reports a zone running out of capacity as a run_task failure
+    rather than an error, trying another zone usually succeeds
+    """
+    return "capacity" in failure.get("reason", "").lower()
+
+
+def load_zone_history() -> Dict[str, Dict[str, float]]:
+    return read_json_state(load_state_path("placement.json"), {})
+
+
+def record_zone_result(zone: str, succeeded: bool) -> None:
+    """
+    Remembers when a zone last accepted or ran out of capacity for a task.
+    Zones are tracked by zone id, which names the same physical zone in every
+    account, so the history is shared safely across profiles.
+    """
+    state_path = load_state_path("placement.json")
+
+    with hold_state_lock("placement.lock", wait=True):
+        now = time.time()
+        history = read_json_state(state_path, {})
+        history.setdefault(zone, {})["succeeded_at" if succeeded else "failed_at"] = now
+        history = {
+            z: times
+            for z, times in history.items()
+            if now - max(times.values()) < PLACEMENT_MEMORY_TTL
+        }
+        write_json_state(state_path, history)
+
+
+def group_subnets_by_zone(subnet_ids: List[str]) -> List[Tuple[str, List[str]]]:
+    """
+    Groups the subnets by availability zone id, zones that recently ran out of
+    capacity go last & the rest are ordered by their most recent success.
+    Zones without any history keep the order the subnets were passed in.
+    """
+    subnet_zones = load_subnet_zones(subnet_ids)
+    zones: Dict[str, List[str]] = OrderedDict()
+    for subnet_id in subnet_ids:
+        zones.setdefault(subnet_zones.get(subnet_id, subnet_id), []).append(subnet_id)
+
+    history = load_zone_history()
+    now = time.time()
+
+    def preference(zone: str) -> Tuple[bool, float]:
+        times = history.get(zone, {})
+        recently_failed = now - times.get("failed_at", 0) < PLACEMENT_FAILURE_TTL
+        return recently_failed, -times.get("succeeded_at", 0)
+
+    return sorted(zones.items(), key=lambda z: preference(z[0]))
+
+
+def launch_in_zone(
+    zone: str,
+    subnets: List[str],
+    launch: Launch,
+) -> Optional[RunTaskResponseTypeDef]:
+    """
+    Launches into one zone, returns None if the zone is out of capacity. Any
+    other failure aborts the launch since retrying elsewhere won't help.
+    """
+    response = launch(subnets)
+    failures = response["failures"]
+    if not failures:
+        record_zone_result(zone, True)
+        return response
+
+    if all(is_capacity_failure(f) for f in failures):
+        log_info(f"{zone} is out of Fargate capacity")
+        record_zone_result(zone, False)
+        return None
+
+    for f in failures:
+        log_error(f"Unable to start the bastion task, {f.get('reason')}")
+    raise Abort()
+
+
+def wait_for_first_task(
+    cluster_name: str,
+    tasks: List[TaskTypeDef],
+    timeout_seconds: int = TASK_BOOT_TIMEOUT,
+) -> Optional[str]:
+    """
+    Waits for any of the tasks to start, returns its arn or None if none
+    of them started in time
+    """
+    # ecs imports this module to place its tasks
+    from serverless_aws_bastion.aws.ecs import describe_task
+
+    task_arns = [t["taskArn"] for t in tasks]
+
+    wait_time = 0
+    while task_arns and wait_time < timeout_seconds:
+        task_info = describe_task(cluster_name, list(task_arns))
+        for t in task_info["tasks"] if task_info else []:
+            if t["lastStatus"] == "RUNNING":
+                return t["taskArn"]
+            if t["lastStatus"] == "STOPPED":
+                task_arns.remove(t["taskArn"])
+
+        time.sleep(2)
+        wait_time += 2
+
+    return None
+
+
+def discard_task(cluster_name: str, task: TaskTypeDef) -> None:
+    """
+    Stops a task that won't be used, such as one that lost a race, along with
+    the activation it was given
+    """
+    client: ECSClient = fetch_boto3_client("ecs")
+    client.stop_task(
+        cluster=cluster_name,
+        task=task["taskArn"],
+        reason="Discarded before it was used",
+    )
+
+    activation_id = find_tag_value("ecs", task.get("tags", []), "ActivationId")
+    if activation_id:
+        delete_activation(activation_id)
+
+
+def discard_tasks(cluster_name: str, tasks: List[TaskTypeDef]) -> None:
+    """
+    Discards every task, a failure to discard one is logged so it can be
+    stopped by hand rather than hiding the rest
+    """
+
+    def discard(task: TaskTypeDef) -> None:
+        try:
+            discard_task(cluster_name, task)
+        except (BotoCoreError, ClientError) as e:
+            log_error(f"Unable to stop {task['taskArn']}, {e}")
+
+    run_in_parallel(discard, tasks)
+
+
+def race_zones(
+    cluster_name: str,
+    zones: List[Tuple[str, List[str]]],
+    launches: List[Launch],
+) -> Optional[RunTaskResponseTypeDef]:
+    """
+    Launches into each zone at once, keeps whichever task starts first &
+    stops the rest. Returns None if no zone had capacity. If any racer fails
+    every task that was placed is stopped before the error is raised.
+    """
+
+    def launch_one(i: int) -> RaceResult:
+        try:
+            return launch_in_zone(zones[i][0], zones[i][1], launches[i]), None
+        except BaseException as e:
+            return None, e
+
+    log_info(f"Racing launches in {', '.join(z for z, _ in zones)}")
+    results = run_in_parallel(launch_one, range(len(zones)))
+    errors = [e for _, e in results if e]
+
+    placed = {
+        t["taskArn"]: (response, t)
+        for response, _ in results
+        if response
+        for t in response["tasks"]
+    }
+
+    winner = None
+    try:
+        if placed and not errors:
+            winner = wait_for_first_task(cluster_name, [t for _, t in placed.values()])
+    finally:
+        discard_tasks(cluster_name, [t for a, (_, t) in placed.items() if a != winner])
+
+    if errors:
+        raise errors[0]
+    if not placed:
+        return None
+    if not winner:
+        log_error("Bastion task failed to start")
+        raise Abort()
+
+    return placed[winner][0]
+
+
+def place_task(
+    cluster_name: str,
+    subnet_ids: List[str],
+    launch: Launch,
+    race_launch: Optional[Launch] = None,
+) -> RunTaskResponseTypeDef:
+    """
+    Launches a task one availability zone at a time in order of preference,
+    moving straight on to the next zone when one is out of capacity. With a
+    race launch the two preferred zones are launched into at once first.
+    """
+    zones = group_subnets_by_zone(subnet_ids)
+
+    if race_launch and len(zones) > 1:
+        response = race_zones(cluster_name, zones[:2], [launch, race_launch])
+        if response:
+            return response
+        zones = zones[2:]
+
+    for zone, subnets in zones:
+        placed_response = launch_in_zone(zone, subnets, launch)
+        if placed_response:
+            return placed_response
+
+    log_error("None of the subnets' availability zones have Fargate capacity")
+    raise Abort()
@@ -0,0 +1,175 @@
+import hashlib
+import time
+from typing import Callable, List
+
+from botocore.exceptions import ClientError
+from click import Abort
+from mypy_boto3_ec2.client import EC2Client
+from mypy_boto3_ecs.client import ECSClient
+
+from serverless_aws_bastion.aws.iam import fetch_role_arn
+from serverless_aws_bastion.config import DEFAULT_NAME, PREFLIGHT_CACHE_TTL
+from serverless_aws_bastion.utils.aws_utils import (
+    fetch_boto3_client,
+    load_aws_account_id,
+    load_client_scope,
+)
+from serverless_aws_bastion.utils.click_utils import log_debug, log_error
+from serverless_aws_bastion.utils.state_utils import (
+    hold_state_lock,
+    load_state_path,
+    read_json_state,
+    write_json_state,
+)
+from serverless_aws_bastion.utils.thread_utils import run_in_parallel
+
+
+# Errors that mean the caller can't check a resource rather than that the
+# resource is wrong, these never block a launch
+UNVERIFIABLE_ERROR_CODES = {
+    "AccessDenied",
+    "AccessDeniedException",
+    "UnauthorizedOperation",
+}
+
+
+def check_network(subnet_ids: List[str], security_group_ids: List[str]) -> List[str]:
+    """
+    Checks the subnets & security groups exist & share a vpc
+    """
+    client: EC2Client = fetch_boto3_client("ec2")
+    errors = []
+
+    try:
+        subnets = client.describe_subnets(SubnetIds=subnet_ids)["Subnets"]
+    except ClientError as e:
+        if e.response["Error"]["Code"] in UNVERIFIABLE_ERROR_CODES:
+            raise
+        return [f"Invalid subnet-ids, {e.response['Error']['Message']}"]
+
+    try:
+        groups = client.describe_security_groups(GroupIds=security_group_ids)
+    except ClientError as e:
+        if e.response["Error"]["Code"] in UNVERIFIABLE_ERROR_CODES:
+            raise
+        return [f"Invalid security-group-ids, {e.response['Error']['Message']}"]
+
+    subnet_vpcs = {s["VpcId"] for s in subnets}
+    group_vpcs = {g["VpcId"] for g in groups["SecurityGroups"]}
+    if len(subnet_vpcs | group_vpcs) > 1:
+        errors.append(
+            "The subnets & security groups must all be in the same vpc, found "
+            f"{', '.join(sorted(subnet_vpcs | group_vpcs))}",
+        )
+    return errors
+
+
+def check_cluster(cluster_name: str) -> List[str]:
+    client: ECSClient = fetch_boto3_client("ecs")
+    clusters = client.describe_clusters(clusters=[cluster_name])["clusters"]
+    if not clusters or clusters[0]["status"] != "ACTIVE":
+        return [f"Cluster {cluster_name} doesn't exist or isn't active"]
+    return []
+
+
+def check_task_definition() -> List[str]:
+    """
+    Checks the task definition exists & that the roles it runs with, which
+    may be custom ones, exist too
+    """
+    client: ECSClient = fetch_boto3_client("ecs")
+    try:
+        task_definition = client.describe_task_definition(
+            taskDefinition=DEFAULT_NAME,
+        )["taskDefinition"]
+    except client.exceptions.ClientException:
+        return ["The bastion task definition doesn't exist, run create-bastion-task"]
+
+    role_arns = [
+        task_definition.get("taskRoleArn"),
+        task_definition.get("executionRoleArn"),
+    ]
+    return check_roles([arn for arn in role_arns if arn])
+
+
+def check_roles(role_arns: List[str]) -> List[str]:
+    """
+    Checks roles in the current account exist, roles in other accounts
+    can't be looked up so are skipped
+    """
+    account_id = load_aws_account_id()
+    return [
+        f"Role {arn} used by the bastion task definition doesn't exist"
+        for arn in role_arns
+        if arn.split(":")[4] == account_id and not fetch_role_arn(arn.split("/")[-1])
+    ]
+
+
+def run_check(check: Callable[[], List[str]]) -> List[str]:
+    try:
+        return check()
+    except ClientError as e:
+        if e.response["Error"]["Code"] in UNVERIFIABLE_ERROR_CODES:
+            log_debug(f"Skipping a preflight check, {e}")
+            return []
+        raise
+
+
+def build_preflight_key(
+    cluster_name: str,
+    subnet_ids: List[str],
+    security_group_ids: List[str],
+) -> str:
+    config = "|".join(
+        [
+            load_aws_account_id(),
+            load_client_scope(),
+            cluster_name,
+            ",".join(sorted(subnet_ids)),
+            ",".join(sorted(security_group_ids)),
+        ],
+    )
+    return hashlib.sha256(config.encode()).hexdigest()
+
+
+def run_preflight_checks(
+    cluster_name: str,
+    subnet_ids: str,
+    security_group_ids: str,
+    ttl: int = PREFLIGHT_CACHE_TTL,
+) -> None:
+    """
+    Validates everything a launch depends on at once before anything is
+    created. A passing config is remembered for the ttl so repeat launches
+    skip the checks, failures are never cached.
+    """
+    subnet_list = subnet_ids.split(",")
+    security_group_list = security_group_ids.split(",")
+    key = build_preflight_key(cluster_name, subnet_list, security_group_list)
+    state_path = load_state_path("preflight.json")
+
+    passed = read_json_state(state_path, {})
+    if time.time() - passed.get(key, 0) < ttl:
+        return
+
+    checks: List[Callable[[], List[str]]] = [
+        lambda: check_network(subnet_list, security_group_list),
+        lambda: check_cluster(cluster_name),
+        check_task_definition,
+    ]
+    errors = [e for result in run_in_parallel(run_check, checks) for e in result]
+    if errors:
+        for error in errors:
+            log_error(error)
+        raise Abort()
+
+    if not ttl:
+        return
+
+    with hold_state_lock("preflight.lock", wait=True):
+        now = time.time()
+        passed = {
+            k: t for k, t in read_json_state(state_path, {}).items() if now - t < ttl
+        }
+        passed[key] = now
+        write_json_state(state_path, passed)
@@ -0,0 +1,86 @@
+from typing import Any, Dict, List
+
+from click import Abort
+
+from serverless_aws_bastion.aws.ecs import (
+    describe_task,
+    load_launched_instance_info,
+    stop_fargate_tasks,
+    wait_for_tasks_to_start,
+)
+from serverless_aws_bastion.aws.ssm import (
+    delete_activation,
+    deregister_managed_instance,
+    load_instance_ids,
+)
+from serverless_aws_bastion.dto.instance_info import InstanceInfo
+from serverless_aws_bastion.enum.bastion_type import BastionType
+from serverless_aws_bastion.utils.click_utils import log_error, log_info
+from serverless_aws_bastion.utils.thread_utils import run_in_parallel
+
+
+def resume_operation(operation: Dict[str, Any]) -> List[InstanceInfo]:
+    """
+    Finishes an interrupted operation from its journal entry. Stops are sent
+    again, launches wait for their task to start & load its instance info.
+    """
+    cluster_name = operation["cluster_name"]
+    task_arns = operation["resources"].get("task_arns", [])
+
+    if operation["kind"] == "stop":
+        stop_fargate_tasks(cluster_name, [{"taskArn": arn} for arn in task_arns])
+        return []
+
+    task_info = describe_task(cluster_name, task_arns)
+    tasks = [
+        t
+        for t in (task_info["tasks"] if task_info else [])
+        if t["lastStatus"] != "STOPPED"
+    ]
+    if not tasks:
+        log_error(
+            f"Operation {operation['id']} has no running task to resume, "
+            "roll it back instead",
+        )
+        raise Abort()
+
+    wait_for_tasks_to_start(cluster_name, tasks)
+    return load_launched_instance_info(
+        cluster_name,
+        operation["instance_name"],
+        tasks,
+        BastionType[operation["bastion_type"]],
+        operation["public_ip"],
+    )
+
+
+def rollback_operation(operation: Dict[str, Any]) -> None:
+    """
+    Removes exactly what an interrupted launch created, the tasks, the ssm
+    instances their activations registered & the activations themselves
+    """
+    if operation["kind"] != "launch":
+        log_error(
+            f"Operation {operation['id']} is a {operation['kind']} which can't be "
+            "rolled back, resume it instead",
+        )
+        raise Abort()
+
+    resources = operation["resources"]
+    task_arns = resources.get("task_arns", [])
+    if task_arns:
+        stop_fargate_tasks(
+            operation["cluster_name"],
+            [{"taskArn": arn} for arn in task_arns],
+        )
+
+    bastion_ids = resources.get("bastion_ids", [])
+    activation_ids = resources.get("activation_ids", [])
+    if activation_ids and bastion_ids:
+        instance_ids = load_instance_ids(bastion_ids=bastion_ids)
+        log_info(f"Deregistering {len(instance_ids)} ssm instances...")
+        run_in_parallel(deregister_managed_instance, list(instance_ids.values()))
+
+    if activation_ids:
+        log_info(f"Deleting {len(activation_ids)} activations...")
+        run_in_parallel(delete_activation, activation_ids)
@@ -1,23 +1,40 @@
 from datetime import datetime, timedelta
+from time import sleep
 from typing import Dict, List
 
+from click import Abort
 from mypy_boto3_ssm.client import SSMClient
 from mypy_boto3_ssm.type_defs import (
+    ActivationTypeDef,
     CreateActivationResultTypeDef,
     InstanceInformationStringFilterTypeDef,
+    InstanceInformationTypeDef,
 )
 
-from serverless_aws_bastion.config import DEFAULT_NAME
+from serverless_aws_bastion.config import (
+    ACTIVATION_EXPIRY_MINUTES,
+    CREATED_BY,
+    DEFAULT_NAME,
+    TASK_BOOT_TIMEOUT,
+)
 from serverless_aws_bastion.utils.aws_utils import (
     build_tags,
     fetch_boto3_client,
+    find_tag_value,
+    load_client_scope,
+)
+from serverless_aws_bastion.utils.cache_utils import (
+    cached_inventory,
+    clear_inventory_cache,
 )
+from serverless_aws_bastion.utils.click_utils import log_error, log_info
 
 
 def create_activation(
     iam_role_name: str,
     instance_name: str,
     bastion_id: str,
+    expiry_minutes: int = ACTIVATION_EXPIRY_MINUTES,
 ) -> CreateActivationResultTypeDef:
     """
     Creates an SSM activation code that is used to connect the agent
@@ -31,12 +48,13 @@ def create_activation(
         DefaultInstanceName=instance_name,
         IamRole=iam_role_name,
         RegistrationLimit=1,
-        ExpirationDate=datetime.utcnow() + timedelta(minutes=5),
+        ExpirationDate=datetime.utcnow() + timedelta(minutes=expiry_minutes),
         Tags=build_tags("ssm", {"Name": instance_name, "BastionId": bastion_id}),
     )
     return response
 
 
+@cached_inventory(load_client_scope)
 def load_instance_ids(
     instance_name: str = None,
     bastion_ids: List[str] = None,
@@ -50,7 +68,7 @@ def load_instance_ids(
     filters: List[InstanceInformationStringFilterTypeDef] = [
         {
             "Key": "tag:CreatedBy",
-            "Values": ["serverless-aws-bastion:cli"],
+            "Values": [CREATED_BY],
         },
     ]
 
@@ -74,3 +92,93 @@ def load_instance_ids(
     return {
         i["ActivationId"]: i["InstanceId"] for i in response["InstanceInformationList"]
     }
+
+
+def load_active_session_counts(instance_ids: List[str]) -> Dict[str, int]:
+    """
+    Counts the active ssm sessions for each of the given ssm instance ids
+    """
+    client: SSMClient = fetch_boto3_client("ssm")
+    counts = {instance_id: 0 for instance_id in instance_ids}
+    if not instance_ids:
+        return counts
+
+    paginator = client.get_paginator("describe_sessions")
+    for page in paginator.paginate(State="Active"):
+        for session in page["Sessions"]:
+            if session.get("Target") in counts:
+                counts[session["Target"]] += 1
+
+    return counts
+
+
+def wait_for_instance_registration(
+    bastion_ids: List[str],
+    timeout_seconds: int = TASK_BOOT_TIMEOUT,
+) -> Dict[str, str]:
+    """
+    Waits for freshly started bastions to register with ssm, returns the
+    activation id to ssm instance id mapping once they all have
+    """
+    wait_time = 0
+    log_info("Waiting for bastion to register with ssm...")
+    while wait_time < timeout_seconds:
+        clear_inventory_cache()
+        instance_ids = load_instance_ids(bastion_ids=bastion_ids)
+        if len(instance_ids) >= len(bastion_ids):
+            return instance_ids
+
+        sleep(2)
+        wait_time += 2
+
+    log_error("Bastion failed to register with ssm")
+    raise Abort()
+
+
+def load_bastion_activations() -> List[ActivationTypeDef]:
+    """
+    Loads every ssm activation created by this cli
+    """
+    client: SSMClient = fetch_boto3_client("ssm")
+
+    activations: List[ActivationTypeDef] = []
+    for page in client.get_paginator("describe_activations").paginate():
+        activations += [
+            a
+            for a in page["ActivationList"]
+            if find_tag_value("ssm", a.get("Tags", []), "CreatedBy") == CREATED_BY
+        ]
+    return activations
+
+
+@cached_inventory(load_client_scope)
+def load_bastion_managed_instances() -> List[InstanceInformationTypeDef]:
+    """
+    Loads every ssm managed instance registered by a bastion from this cli
+    """
+    client: SSMClient = fetch_boto3_client("ssm")
+
+    instances: List[InstanceInformationTypeDef] = []
+    paginator = client.get_paginator("describe_instance_information")
+    for page in paginator.paginate(
+        Filters=[{"Key": "tag:CreatedBy", "Values": [CREATED_BY]}],
+    ):
+        instances += page["InstanceInformationList"]
+    return instances
+
+
+def delete_activation(activation_id: str) -> None:
+    client: SSMClient = fetch_boto3_client("ssm")
+    try:
+        client.delete_activation(ActivationId=activation_id)
+    except client.exceptions.InvalidActivation:
+        # Already gone, another cleanup got to it first
+        pass
+
+
+def deregister_managed_instance(instance_id: str) -> None:
+    client: SSMClient = fetch_boto3_client("ssm")
+    try:
+        client.deregister_managed_instance(InstanceId=instance_id)
+    except client.exceptions.InvalidInstanceId:
+        pass
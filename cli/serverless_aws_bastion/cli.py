@@ -1,16 +1,35 @@
 import json
-from functools import wraps
-from typing import Optional
+import os
+from datetime import datetime
+from functools import partial, wraps
+from time import sleep
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar, cast
 
+import attr
 import click
+from botocore.exceptions import BotoCoreError, ClientError
 
-from serverless_aws_bastion.aws.ec2 import load_public_ips_from_task_data
+from serverless_aws_bastion.agent.server import (
+    load_agent_status,
+    run_agent,
+    start_agent,
+    stop_agent,
+)
+from serverless_aws_bastion.aws.activation_pool import (
+    clear_activation_pool,
+    fill_activation_pool,
+    load_activation_pool_status,
+)
 from serverless_aws_bastion.aws.ecs import (
+    build_execute_command,
     create_fargate_cluster,
     create_task_definition,
     delete_fargate_cluster,
     delete_task_definition,
-    launch_fargate_task,
+    extend_fargate_tasks,
+    find_bastion_task_arn,
+    launch_bastion,
+    load_running_instance_info,
     load_running_task_info,
     stop_fargate_tasks,
 )
@@ -21,12 +40,98 @@ from serverless_aws_bastion.aws.iam import (
     delete_bastion_task_role,
     delete_deregister_ssm_policy,
 )
-from serverless_aws_bastion.aws.ssm import load_instance_ids
-from serverless_aws_bastion.config import TASK_TIMEOUT
-from serverless_aws_bastion.dto.instance_info import build_instance_info
+from serverless_aws_bastion.aws.logs import (
+    build_log_stream_name,
+    parse_since,
+    stream_log_events,
+)
+from serverless_aws_bastion.aws.recovery import (
+    resume_operation,
+    rollback_operation,
+)
+from serverless_aws_bastion.config import (
+    ACCOUNT_MAX_WORKERS,
+    ACCOUNT_ROLE_NAME,
+    BENCH_CHANNELS,
+    BENCH_MEGABYTES,
+    BENCH_PINGS,
+    MAX_REQUEST_RATE,
+    METRICS_CACHE_TTL,
+    METRICS_PORT,
+    REAP_GRACE_MINUTES,
+    RETRY_MAX_ATTEMPTS,
+    SCALE_MAX_COUNT,
+    SCALE_MIN_COUNT,
+    SCALE_TARGET_SESSIONS,
+    SSH_CONFIG_PATH,
+    TASK_TIMEOUT,
+)
+from serverless_aws_bastion.dto.forward_info import build_forward_info
+from serverless_aws_bastion.dto.instance_info import InstanceInfo
+from serverless_aws_bastion.dto.launch_config import LaunchConfig
 from serverless_aws_bastion.enum.bastion_type import BastionType
 from serverless_aws_bastion.enum.log_level import LogLevel
-from serverless_aws_bastion.utils.click_utils import log_info, log_output
+from serverless_aws_bastion.enum.retry_mode import RetryMode
+from serverless_aws_bastion.enum.selection_strategy import SelectionStrategy
+from serverless_aws_bastion.enum.sshd_profile import SshdProfile
+from serverless_aws_bastion.fleet.apply import (
+    apply_fleet_plan,
+    build_fleet_plan,
+    load_fleet_spec,
+)
+from serverless_aws_bastion.fleet.inventory import load_multi_account_inventory
+from serverless_aws_bastion.fleet.metrics import (
+    collect_fleet_metrics,
+    run_metrics_exporter,
+)
+from serverless_aws_bastion.fleet.reap import (
+    build_reap_plan,
+    execute_reap_plan,
+)
+from serverless_aws_bastion.fleet.scale import scale_bastion_group
+from serverless_aws_bastion.ssh.bench import run_benchmark
+from serverless_aws_bastion.ssh.exec_pipeline import (
+    claim_or_launch_bastion,
+    run_through_bastion,
+    stop_bastion_in_background,
+)
+from serverless_aws_bastion.ssh.forward import (
+    ForwardDaemon,
+    load_forward_status,
+    start_forward_daemon,
+    stop_forward_daemon,
+)
+from serverless_aws_bastion.ssh.ssh_config import (
+    build_host_alias,
+    render_direct_ssh_config_block,
+    render_ssh_config_block,
+    write_ssh_config_block,
+)
+from serverless_aws_bastion.utils.aws_utils import load_aws_region_name
+from serverless_aws_bastion.utils.click_utils import (
+    log_error,
+    log_info,
+    log_output,
+)
+from serverless_aws_bastion.utils.journal_utils import (
+    load_interrupted_operations,
+    remove_operation,
+)
+from serverless_aws_bastion.utils.rate_limit_utils import (
+    log_rate_limiter_stats,
+)
+from serverless_aws_bastion.utils.selection_utils import select_bastion
+from serverless_aws_bastion.utils.state_utils import (
+    hold_state_lock,
+    load_state_path,
+)
+from serverless_aws_bastion.utils.thread_utils import (
+    run_in_regions,
+    run_in_scopes,
+)
+
+
+R = TypeVar("R")
 
 
 def common_params(func):
@@ -42,6 +147,123 @@ def common_params(func):
         type=click.STRING,
         default=LogLevel.info.name,
     )
+    @click.option(
+        "--retry-mode",
+        help="The botocore retry mode, the options are `legacy`, `standard` or "
+        "`adaptive`. Default is `standard`.",
+        type=click.STRING,
+        default=RetryMode.standard.value,
+    )
+    @click.option(
+        "--max-attempts",
+        help="The max number of attempts for each aws request",
+        type=click.INT,
+        default=RETRY_MAX_ATTEMPTS,
+    )
+    @click.option(
+        "--max-request-rate",
+        help="The max requests per second shared by every worker calling an "
+        "aws service in a region, backs off automatically when throttled",
+        type=click.FLOAT,
+        default=MAX_REQUEST_RATE,
+    )
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if kwargs.get("retry_mode") not in RetryMode.__members__:
+            raise click.ClickException(
+                "retry-mode must be one of `legacy`, `standard` or `adaptive`",
+            )
+
+        click.get_current_context().call_on_close(log_rate_limiter_stats)
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+def regions_params(func):
+    @click.option(
+        "--regions",
+        help="A comma separated list of aws regions to run this command in "
+        "concurrently, use instead of --region",
+        type=click.STRING,
+        default=None,
+    )
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+def load_regions(region: Optional[str], regions: Optional[str]) -> List[Optional[str]]:
+    if region and regions:
+        raise click.ClickException("Only one of region or regions can be passed")
+
+    if regions:
+        return [r.strip() for r in regions.split(",") if r.strip()]
+    return [region]
+
+
+def run_in_each_region(
+    func: Callable[[], R],
+    regions: List[Optional[str]],
+    action: str,
+) -> Tuple[List[Tuple[str, R]], List[str]]:
+    """
+    Runs the command in every region & reports each on its own so a failure
+    in one doesn't hide the results from the others. Returns the results of
+    the regions that succeeded & the names of the ones that failed
+    """
+
+    def run_in_region() -> Tuple[str, Optional[R], bool]:
+        region = load_aws_region_name()
+        try:
+            return region, func(), True
+        except (BotoCoreError, ClientError) as e:
+            log_error(f"Unable to {action} in {region}, {e}")
+        except click.Abort:
+            pass
+        return region, None, False
+
+    results = run_in_regions(run_in_region, regions)
+    succeeded = [(region, cast(R, r)) for region, r, ok in results if ok]
+    return succeeded, [region for region, _, ok in results if not ok]
+
+
+def load_region_ids(ids: str, regions: List[Optional[str]]) -> Dict[str, str]:
+    """
+    Parses subnet or security group ids given per region as
+    `us-east-1=subnet-1,subnet-2;us-west-2=subnet-3`. Ids only exist in one
+    region, so launches in several regions must give them for each region.
+    Plain ids are kept under an empty region & used for a single region.
+    """
+    if "=" not in ids:
+        if len(regions) > 1:
+            raise click.ClickException(
+                "Subnets & security groups only exist in one region, pass them "
+                "per region as `us-east-1=subnet-1,subnet-2;us-west-2=subnet-3`",
+            )
+        return {"": ids}
+
+    region_ids = {}
+    for entry in ids.split(";"):
+        region, _, entry_ids = entry.partition("=")
+        region_ids[region.strip()] = entry_ids.strip()
+
+    missing = [r for r in regions if r and r not in region_ids]
+    if missing:
+        raise click.ClickException(f"No ids were given for {', '.join(missing)}")
+    return region_ids
+
+
+def selection_params(func):
+    @click.option(
+        "--strategy",
+        help="How to pick between multiple running bastions with the same name, "
+        "options are `consistent_hash`, `least_recent` or `least_sessions`",
+        type=click.STRING,
+        default=SelectionStrategy.consistent_hash.value,
+    )
     @wraps(func)
     def wrapper(*args, **kwargs):
         return func(*args, **kwargs)
@@ -49,6 +271,160 @@ def common_params(func):
     return wrapper
 
 
+def load_selection_strategy(strategy: str) -> SelectionStrategy:
+    try:
+        return SelectionStrategy[strategy]
+    except KeyError:
+        raise click.ClickException(
+            "strategy must be one of `consistent_hash`, `least_recent` "
+            "or `least_sessions`",
+        )
+
+
+def launch_params(required: bool = True):
+    """
+    The options needed to launch a bastion, commands that only launch one when
+    there isn't already a bastion running pass required=False
+    """
+
+    def decorator(func):
+        @click.option(
+            "--subnet-ids",
+            help="A comma separated list of VPC subnet ids to launch the bastion "
+            "into, with --regions pass them per region as "
+            "`us-east-1=subnet-1,subnet-2;us-west-2=subnet-3`",
+            required=required,
+            type=click.STRING,
+        )
+        @click.option(
+            "--security-group-ids",
+            help="A comma separated list of security group ids to launch the "
+            "bastion into, with --regions pass them per region the same way as "
+            "subnet-ids",
+            required=required,
+            type=click.STRING,
+        )
+        @click.option(
+            "--authorized-keys",
+            help="All of the public keys that the bastion should allow, or where "
+            "to load them from with `ssm:<parameter>`, `s3://<bucket>/<key>` or "
+            "`file://<path>`. Referenced keys are refreshed on running bastions, "
+            "s3 locations must be granted with create-bastion-task "
+            "--authorized-keys-s3. Not needed for exec bastions.",
+            type=click.STRING,
+        )
+        @click.option(
+            "--bastion-timeout",
+            help="How many minutes that the bastion should stay alive for, "
+            "the default is 8 hours",
+            type=click.INT,
+            default=TASK_TIMEOUT,
+        )
+        @click.option(
+            "--bastion-type",
+            help="The type of bastion that this task should run, options are "
+            "`original`, `ssm` or `exec`",
+            type=click.STRING,
+            default=BastionType.ssm.value,
+        )
+        @click.option(
+            "--sshd-profile",
+            help="The sshd crypto & concurrency profile the bastion should run with, "
+            "options are either `default` or `performance`",
+            type=click.STRING,
+            default=SshdProfile.default.value,
+        )
+        @click.option(
+            "--idle-timeout",
+            help="Shut the bastion down after this many minutes without an active "
+            "session, the default of 0 keeps it running until its timeout",
+            type=click.INT,
+            default=0,
+        )
+        @click.option(
+            "--activation-pool",
+            help="Keep this many ssm activations for the bastion name created "
+            "ahead of time so launches skip creating one, the default of 0 "
+            "disables the pool",
+            type=click.INT,
+            default=0,
+        )
+        @click.option(
+            "--no-public-ip",
+            help="Launch without a public ip for private subnets, ssm & exec "
+            "bastions are reached through ssm so don't need one",
+            is_flag=True,
+            default=False,
+        )
+        @click.option(
+            "--race-zones",
+            help="Launch into the two preferred availability zones at once & keep "
+            "whichever bastion starts first",
+            is_flag=True,
+            default=False,
+        )
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def build_launch_config(
+    cluster_name: str,
+    subnet_ids: str,
+    security_group_ids: str,
+    authorized_keys: Optional[str],
+    bastion_timeout: int,
+    bastion_type: str,
+    sshd_profile: str,
+    idle_timeout: int,
+    activation_pool: int,
+    no_public_ip: bool,
+    race_zones: bool,
+) -> LaunchConfig:
+    try:
+        bastion_type_enum = BastionType[bastion_type]
+    except KeyError:
+        raise click.ClickException(
+            "bastion-type must be one of `original`, `ssm` or `exec`",
+        )
+
+    if not authorized_keys and bastion_type_enum != BastionType.exec:
+        raise click.ClickException(
+            "authorized-keys is required for original & ssm bastions",
+        )
+
+    if no_public_ip and bastion_type_enum == BastionType.original:
+        raise click.ClickException(
+            "original bastions are reached over their public ip, use an ssm "
+            "or exec bastion with no-public-ip",
+        )
+
+    try:
+        sshd_profile_enum = SshdProfile[sshd_profile]
+    except KeyError:
+        raise click.ClickException(
+            "sshd-profile must be one of `default` or `performance`",
+        )
+
+    return LaunchConfig(
+        cluster_name=cluster_name,
+        subnet_ids=subnet_ids,
+        security_group_ids=security_group_ids,
+        authorized_keys=authorized_keys or "",
+        timeout_minutes=bastion_timeout,
+        bastion_type=bastion_type_enum,
+        sshd_profile=sshd_profile_enum,
+        idle_timeout_minutes=idle_timeout,
+        activation_pool_size=activation_pool,
+        public_ip=not no_public_ip,
+        race_zones=race_zones,
+    )
+
+
 @click.group()
 def cli():
     pass
@@ -104,12 +480,28 @@ def handle_delete_fargate_cluster(cluster_name: str, **kwargs):
     type=click.STRING,
     default=None,
 )
+@click.option(
+    "--authorized-keys-s3",
+    help="An s3://<bucket>/<prefix> the default task role may read authorized "
+    "keys from, can be passed multiple times",
+    type=click.STRING,
+    multiple=True,
+)
 @common_params
 def handle_create_bastion_task(
-    task_role_arn: str = None, execution_role_arn: str = None, **kwargs
+    task_role_arn: str = None,
+    execution_role_arn: str = None,
+    authorized_keys_s3: Tuple[str, ...] = (),
+    **kwargs,
 ):
+    invalid = [url for url in authorized_keys_s3 if not url.startswith("s3://")]
+    if invalid:
+        raise click.ClickException(
+            f"authorized-keys-s3 must be s3:// urls, got {', '.join(invalid)}",
+        )
+
     if not task_role_arn:
-        task_role_arn = create_bastion_task_role()
+        task_role_arn = create_bastion_task_role(authorized_keys_s3)
 
     if not execution_role_arn:
         execution_role_arn = create_bastion_task_execution_role()
@@ -143,80 +535,75 @@ def handle_delete_bastion_task(**kwargs):
     required=True,
     type=click.STRING,
 )
-@click.option(
-    "--subnet-ids",
-    help="A comma separated list of VPC subnet ids to launch the bastion into",
-    required=True,
-    type=click.STRING,
-)
-@click.option(
-    "--security-group-ids",
-    help="A comma separated list of security group ids to launch the bastion into",
-    required=True,
-    type=click.STRING,
-)
-@click.option(
-    "--authorized-keys",
-    help="All of the public keys that the bastion should allow",
-    required=True,
-    type=click.STRING,
-)
 @click.option(
     "--bastion-name",
     help="A unique name for the bastion instance",
     required=True,
     type=click.STRING,
 )
-@click.option(
-    "--bastion-timeout",
-    help="How many minutes that the bastion should stay alive for, "
-    "the default is 8 hours",
-    type=click.INT,
-    default=TASK_TIMEOUT,
-)
-@click.option(
-    "--bastion-type",
-    help="The type of bastion that this task should run, options are either"
-    "`original` or `ssm`",
-    type=click.STRING,
-    default=BastionType.ssm.value,
-)
+@launch_params()
+@regions_params
 @common_params
 def handle_launch_bastion(
     cluster_name: str,
+    bastion_name: str,
+    regions: Optional[str],
     subnet_ids: str,
     security_group_ids: str,
-    authorized_keys: str,
-    bastion_name: str,
+    authorized_keys: Optional[str],
     bastion_timeout: int,
     bastion_type: str,
+    sshd_profile: str,
+    idle_timeout: int,
+    activation_pool: int,
+    no_public_ip: bool,
+    race_zones: bool,
     **kwargs,
 ) -> None:
-    try:
-        bastion_type_enum = BastionType[bastion_type]
-    except KeyError:
-        raise click.ClickException("bastion-type must be one of `original` or `ssm`")
-
-    launched_task_info = launch_fargate_task(
-        cluster_name=cluster_name,
-        subnet_ids=subnet_ids,
-        security_group_ids=security_group_ids,
-        authorized_keys=authorized_keys,
-        instance_name=bastion_name,
-        timeout_minutes=bastion_timeout,
-        bastion_type=bastion_type_enum,
+    launch_config = build_launch_config(
+        cluster_name,
+        subnet_ids,
+        security_group_ids,
+        authorized_keys,
+        bastion_timeout,
+        bastion_type,
+        sshd_profile,
+        idle_timeout,
+        activation_pool,
+        no_public_ip,
+        race_zones,
     )
+    region_list = load_regions(kwargs["region"], regions)
+    region_subnet_ids = load_region_ids(subnet_ids, region_list)
+    region_security_group_ids = load_region_ids(security_group_ids, region_list)
 
-    task_instance_info = launched_task_info["tasks"]
-    task_instance_ips = load_public_ips_from_task_data(task_instance_info)
-    ssm_instance_info = load_instance_ids(bastion_name)
+    def launch_in_region() -> List[InstanceInfo]:
+        region = load_aws_region_name()
+        region_config = attr.evolve(
+            launch_config,
+            subnet_ids=region_subnet_ids.get(region, region_subnet_ids.get("", "")),
+            security_group_ids=region_security_group_ids.get(
+                region,
+                region_security_group_ids.get("", ""),
+            ),
+        )
+        if not region_config.subnet_ids or not region_config.security_group_ids:
+            log_error(f"No subnets or security groups were given for {region}")
+            raise click.Abort()
+        return launch_bastion(region_config, bastion_name)
 
-    instance_info = build_instance_info(
-        task_instance_info,
-        task_instance_ips,
-        ssm_instance_info,
+    results, failed_regions = run_in_each_region(
+        launch_in_region,
+        region_list,
+        "start a bastion",
+    )
+    log_output(
+        json.dumps([i.as_dict for _, info in results for i in info], indent=4),
     )
-    log_output(json.dumps([i.as_dict for i in instance_info], indent=4))
+
+    if failed_regions:
+        log_error(f"Failed to start bastions in {', '.join(failed_regions)}")
+        raise click.Abort()
 
 
 @cli.command(
@@ -241,16 +628,81 @@ def handle_launch_bastion(
     type=click.STRING,
     default=None,
 )
+@regions_params
 @common_params
 def handle_stop_bastion_instances(
     cluster_name: str,
     bastion_name: Optional[str],
     bastion_id: Optional[str],
+    regions: Optional[str],
+    **kwargs,
+) -> None:
+    def stop_in_region() -> List[str]:
+        task_info = load_running_task_info(cluster_name, bastion_name, bastion_id)
+        stop_fargate_tasks(cluster_name, task_info)
+        return [t["taskArn"] for t in task_info]
+
+    results, failed_regions = run_in_each_region(
+        stop_in_region,
+        load_regions(kwargs["region"], regions),
+        "stop bastions",
+    )
+    if failed_regions:
+        for region, task_arns in results:
+            log_output(f"Stopped {len(task_arns)} tasks in {region}")
+            for task_arn in task_arns:
+                log_output(f"  {task_arn}")
+        log_error(f"Failed to stop bastions in {', '.join(failed_regions)}")
+        raise click.Abort()
+
+    log_output(f"Stopped {sum(len(task_arns) for _, task_arns in results)} tasks")
+
+
+@cli.command(
+    "extend-bastion",
+    help="Keeps running bastions alive for longer without relaunching them",
+)
+@click.option(
+    "--cluster-name",
+    help="The name of the Fargate cluster the bastion is running in",
+    type=click.STRING,
+    required=True,
+)
+@click.option(
+    "--bastion-name",
+    help="The name bastion instance to filter by",
+    type=click.STRING,
+    default=None,
+)
+@click.option(
+    "--bastion-id",
+    help="The id bastion instance to filter by",
+    type=click.STRING,
+    default=None,
+)
+@click.option(
+    "--minutes",
+    help="How many minutes from now that the bastion should stay alive for",
+    type=click.INT,
+    required=True,
+)
+@common_params
+def handle_extend_bastion(
+    cluster_name: str,
+    bastion_name: Optional[str],
+    bastion_id: Optional[str],
+    minutes: int,
     **kwargs,
 ) -> None:
+    if not bastion_name and not bastion_id:
+        raise click.ClickException("One of bastion-name or bastion-id is required")
+
     task_info = load_running_task_info(cluster_name, bastion_name, bastion_id)
-    stop_fargate_tasks(cluster_name, task_info)
-    log_output(f"Stopped {len(task_info)} tasks")
+    lease_expires_at = extend_fargate_tasks(task_info, minutes)
+    log_output(
+        f"Extended {len(task_info)} tasks until "
+        f"{datetime.utcfromtimestamp(lease_expires_at)} UTC",
+    )
 
 
 @cli.command(
@@ -259,9 +711,10 @@ def handle_stop_bastion_instances(
 )
 @click.option(
     "--cluster-name",
-    help="The name of the Fargate cluster to check for bastion instances in",
+    help="The name of the Fargate cluster to check for bastion instances in, "
+    "optional with --accounts where every cluster is checked by default",
     type=click.STRING,
-    required=True,
+    default=None,
 )
 @click.option(
     "--bastion-name",
@@ -269,20 +722,1044 @@ def handle_stop_bastion_instances(
     type=click.STRING,
     default=None,
 )
+@click.option(
+    "--no-public-ip",
+    help="Skip looking up public ips, for bastions in private subnets that are "
+    "only reached through ssm",
+    is_flag=True,
+    default=False,
+)
+@click.option(
+    "--accounts",
+    help="A comma separated list of aws account ids to list bastions across "
+    "by assuming --role-name in each of them",
+    type=click.STRING,
+    default=None,
+)
+@click.option(
+    "--role-name",
+    help="The role to assume in each account when using --accounts",
+    type=click.STRING,
+    default=ACCOUNT_ROLE_NAME,
+)
+@click.option(
+    "--max-workers",
+    help="How many accounts to load at once when using --accounts",
+    type=click.INT,
+    default=ACCOUNT_MAX_WORKERS,
+)
+@regions_params
 @common_params
 def handle_list_bastion_instances(
-    cluster_name: str, bastion_name: Optional[str], **kwargs
+    cluster_name: Optional[str],
+    bastion_name: Optional[str],
+    no_public_ip: bool,
+    accounts: Optional[str],
+    role_name: str,
+    max_workers: int,
+    regions: Optional[str],
+    **kwargs,
+) -> None:
+    region_list = load_regions(kwargs["region"], regions)
+
+    if accounts:
+        instance_info = load_multi_account_inventory(
+            [a.strip() for a in accounts.split(",") if a.strip()],
+            role_name,
+            region_list,
+            cluster_name,
+            bastion_name,
+            max_workers,
+        )
+        log_output(json.dumps([i.as_dict for i in instance_info], indent=4))
+        return
+
+    if not cluster_name:
+        raise click.ClickException("cluster-name is required without accounts")
+
+    region_info, failed_regions = run_in_each_region(
+        lambda: load_running_instance_info(
+            cluster_name,
+            bastion_name,
+            load_ips=not no_public_ip,
+        ),
+        region_list,
+        "list bastions",
+    )
+    log_output(
+        json.dumps([i.as_dict for _, info in region_info for i in info], indent=4),
+    )
+
+    if failed_regions:
+        log_error(f"Failed to list bastions in {', '.join(failed_regions)}")
+        raise click.Abort()
+
+
+@cli.command(
+    "reap",
+    help="Stops bastions that overran their timeout & cleans up ssm "
+    "activations and instances left behind by bastions that are gone. "
+    "Safe to run on a schedule, overlapping runs exit without doing anything.",
+)
+@click.option(
+    "--grace-minutes",
+    help="How long past its timeout a bastion is left before it's stopped, "
+    "activations & instances younger than this are never touched",
+    type=click.INT,
+    default=REAP_GRACE_MINUTES,
+)
+@click.option(
+    "--max-age",
+    help="Also stop any bastion older than this many minutes, whatever its "
+    "timeout or lease",
+    type=click.INT,
+    default=None,
+)
+@click.option(
+    "--dry-run",
+    help="Only print what would be cleaned up",
+    is_flag=True,
+    default=False,
+)
+@regions_params
+@common_params
+def handle_reap(
+    grace_minutes: int,
+    max_age: Optional[int],
+    dry_run: bool,
+    regions: Optional[str],
+    **kwargs,
 ) -> None:
-    task_instance_info = load_running_task_info(cluster_name, bastion_name)
-    task_instance_ips = load_public_ips_from_task_data(task_instance_info)
-    ssm_instance_info = load_instance_ids(bastion_name)
-
-    instance_info = build_instance_info(
-        task_instance_info,
-        task_instance_ips,
-        ssm_instance_info,
+    with hold_state_lock("reap.lock") as acquired:
+        if not acquired:
+            log_info("Another reap is already running")
+            return
+
+        def reap_region() -> dict:
+            plan = build_reap_plan(grace_minutes, max_age)
+            if not dry_run and not plan.is_empty:
+                execute_reap_plan(plan)
+            return dict(plan.as_dict, region=load_aws_region_name())
+
+        plans = run_in_regions(reap_region, load_regions(kwargs["region"], regions))
+
+    log_output(json.dumps({"dry_run": dry_run, "regions": plans}, indent=4))
+
+
+def load_fleet_spec_or_fail(fleet_file: str):
+    try:
+        return load_fleet_spec(fleet_file)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+
+@cli.command(
+    "plan",
+    help="Shows the launches & stops needed to bring the running bastions in "
+    "line with a fleet spec without making them",
+)
+@click.argument("fleet_file", type=click.Path(exists=True, dir_okay=False))
+@common_params
+def handle_plan(fleet_file: str, **kwargs) -> None:
+    plans = build_fleet_plan(load_fleet_spec_or_fail(fleet_file))
+    log_output(
+        json.dumps({"applied": False, "groups": [p.as_dict for p in plans]}, indent=4),
+    )
+
+
+@cli.command(
+    "apply",
+    help="Launches & stops bastions so the groups in a fleet spec are running "
+    "with the configured count & settings. Bastions that drifted from the spec "
+    "are replaced, groups that are already up to date are left alone.",
+)
+@click.argument("fleet_file", type=click.Path(exists=True, dir_okay=False))
+@common_params
+def handle_apply(fleet_file: str, **kwargs) -> None:
+    groups = load_fleet_spec_or_fail(fleet_file)
+    plans = build_fleet_plan(groups)
+    if any(not p.is_empty for p in plans):
+        apply_fleet_plan(groups, plans)
+    else:
+        log_info("The fleet is up to date")
+
+    log_output(
+        json.dumps({"applied": True, "groups": [p.as_dict for p in plans]}, indent=4),
     )
-    log_output(json.dumps([i.as_dict for i in instance_info], indent=4))
+
+
+def load_operations_or_fail(operation_id: Optional[str]) -> List[dict]:
+    operations = load_interrupted_operations(operation_id)
+    if operation_id and not operations:
+        raise click.ClickException(f"No interrupted operation {operation_id}")
+    return operations
+
+
+def run_in_operation_scope(func, operation: dict):
+    """
+    Runs against the region & account the operation was started in
+    """
+    scope = {"region": operation["region"], "role_arn": operation["role_arn"]}
+    return run_in_scopes(partial(func, operation), [scope])[0]
+
+
+@cli.command(
+    "resume",
+    help="Finishes launches & stops that were interrupted, using the resources "
+    "they journaled locally rather than scanning for them",
+)
+@click.option(
+    "--operation-id",
+    help="Only resume this operation, by default every interrupted operation "
+    "is resumed",
+    type=click.STRING,
+    default=None,
+)
+@common_params
+def handle_resume(operation_id: Optional[str], **kwargs) -> None:
+    instances = []
+    for operation in load_operations_or_fail(operation_id):
+        log_info(f"Resuming {operation['kind']} {operation['id']}")
+        instances += run_in_operation_scope(resume_operation, operation)
+        remove_operation(operation["id"])
+
+    log_output(json.dumps([i.as_dict for i in instances], indent=4))
+
+
+@cli.command(
+    "rollback",
+    help="Stops the tasks & deletes the ssm activations and instances created "
+    "by interrupted launches, using what they journaled locally",
+)
+@click.option(
+    "--operation-id",
+    help="Only roll back this operation, by default every interrupted launch "
+    "is rolled back",
+    type=click.STRING,
+    default=None,
+)
+@common_params
+def handle_rollback(operation_id: Optional[str], **kwargs) -> None:
+    operations = load_operations_or_fail(operation_id)
+    if not operation_id:
+        operations = [o for o in operations if o["kind"] == "launch"]
+
+    for operation in operations:
+        log_info(f"Rolling back {operation['kind']} {operation['id']}")
+        run_in_operation_scope(rollback_operation, operation)
+        remove_operation(operation["id"])
+
+    log_output(f"Rolled back {len(operations)} operations")
+
+
+@cli.command(
+    "logs",
+    help="Prints a bastion's container logs, works for bastions that have "
+    "recently stopped so failed boots can be debugged",
+)
+@click.option(
+    "--cluster-name",
+    help="The name of the Fargate cluster the bastion runs in, needed with "
+    "bastion-id",
+    type=click.STRING,
+    default=None,
+)
+@click.option(
+    "--bastion-id",
+    help="The id of the bastion to print logs for",
+    type=click.STRING,
+    default=None,
+)
+@click.option(
+    "--task-arn",
+    help="The arn of the bastion task to print logs for",
+    type=click.STRING,
+    default=None,
+)
+@click.option(
+    "--since",
+    help="Only print logs newer than this, such as `30s`, `10m` or `2h`",
+    type=click.STRING,
+    default=None,
+)
+@click.option(
+    "--follow",
+    help="Keep printing new logs as they arrive",
+    is_flag=True,
+    default=False,
+)
+@common_params
+def handle_logs(
+    cluster_name: Optional[str],
+    bastion_id: Optional[str],
+    task_arn: Optional[str],
+    since: Optional[str],
+    follow: bool,
+    **kwargs,
+) -> None:
+    if not task_arn and not (cluster_name and bastion_id):
+        raise click.ClickException(
+            "One of task-arn or cluster-name & bastion-id is required",
+        )
+
+    try:
+        start_time = parse_since(since) if since else None
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    if not task_arn:
+        task_arn = find_bastion_task_arn(cluster_name, bastion_id)  # type: ignore
+        if not task_arn:
+            log_error(f"Unable to find a task for bastion {bastion_id}")
+            raise click.Abort()
+
+    for event in stream_log_events(build_log_stream_name(task_arn), start_time, follow):
+        timestamp = datetime.utcfromtimestamp(event["timestamp"] / 1000)
+        click.echo(f"{timestamp.isoformat(timespec='seconds')} {event['message']}")
+
+
+@cli.command(
+    "metrics",
+    help="Prints bastion fleet metrics in the prometheus text format, or "
+    "serves them for scraping with --serve",
+)
+@click.option(
+    "--cluster-name",
+    "cluster_names",
+    help="A Fargate cluster to report on, can be passed multiple times. "
+    "Every cluster is checked by default.",
+    type=click.STRING,
+    multiple=True,
+)
+@click.option(
+    "--serve",
+    help="Keep running & serve the metrics over http at /metrics",
+    is_flag=True,
+    default=False,
+)
+@click.option(
+    "--port",
+    help="The port to serve metrics on",
+    type=click.INT,
+    default=METRICS_PORT,
+)
+@click.option(
+    "--cache-ttl",
+    help="How many seconds discovery results are reused between scrapes",
+    type=click.INT,
+    default=METRICS_CACHE_TTL,
+)
+@common_params
+def handle_metrics(
+    cluster_names: List[str],
+    serve: bool,
+    port: int,
+    cache_ttl: int,
+    **kwargs,
+) -> None:
+    if serve:
+        run_metrics_exporter(port, list(cluster_names) or None, cache_ttl)
+        return
+
+    click.echo(collect_fleet_metrics(cluster_names or None), nl=False)
+
+
+@cli.command(
+    "connect",
+    help="Writes an ssh config entry for a running bastion & connects to it, "
+    "later connections reuse the same multiplexed ssh session. Exec bastions "
+    "open a shell through ECS Exec instead.",
+)
+@click.option(
+    "--cluster-name",
+    help="The name of the Fargate cluster the bastion is running in",
+    type=click.STRING,
+    required=True,
+)
+@click.option(
+    "--bastion-name",
+    help="The name of the bastion instance to connect to",
+    type=click.STRING,
+    default=None,
+)
+@click.option(
+    "--bastion-id",
+    help="The id of the bastion instance to connect to",
+    type=click.STRING,
+    default=None,
+)
+@click.option(
+    "--identity-file",
+    help="The private key used to authenticate with the bastion",
+    type=click.STRING,
+    default=None,
+)
+@click.option(
+    "--jump-hosts",
+    help="A comma separated list of hosts that should be reached through "
+    "the bastion using ProxyJump",
+    type=click.STRING,
+    default=None,
+)
+@click.option(
+    "--ssh-config",
+    help="The ssh config file to write the bastion entry to",
+    type=click.STRING,
+    default=SSH_CONFIG_PATH,
+)
+@click.option(
+    "--config-only",
+    help="Only write the ssh config entry, don't open a connection",
+    is_flag=True,
+    default=False,
+)
+@selection_params
+@common_params
+def handle_connect(
+    cluster_name: str,
+    bastion_name: Optional[str],
+    bastion_id: Optional[str],
+    identity_file: Optional[str],
+    jump_hosts: Optional[str],
+    ssh_config: str,
+    config_only: bool,
+    strategy: str,
+    **kwargs,
+) -> None:
+    if not bastion_name and not bastion_id:
+        raise click.ClickException("One of bastion-name or bastion-id is required")
+
+    strategy_enum = load_selection_strategy(strategy)
+    instance_info = load_running_instance_info(cluster_name, bastion_name, bastion_id)
+    if not instance_info:
+        log_error("Unable to find a running bastion to connect to")
+        raise click.Abort()
+
+    instance = select_bastion(instance_info, strategy_enum)
+    if BastionType[instance.bastion_type] == BastionType.exec and not config_only:
+        log_info(f"Opening a shell on {instance.bastion_id}...")
+        command = build_execute_command(cluster_name, instance.task_arn)
+        os.execvp(command[0], command)
+
+    alias = build_host_alias(bastion_name or instance.instance_name)
+    block = render_ssh_config_block(
+        alias,
+        instance,
+        identity_file=identity_file,
+        jump_hosts=jump_hosts.split(",") if jump_hosts else None,
+    )
+    write_ssh_config_block(alias, block, ssh_config)
+
+    if config_only:
+        log_output(alias)
+        return
+
+    log_info(f"Connecting to {alias}...")
+    os.execvp("ssh", ["ssh", "-F", os.path.expanduser(ssh_config), alias])
+
+
+@cli.command(
+    "exec",
+    help="Runs a command through a bastion, launching one if none with the name "
+    "is running and stopping it again once the command exits. With --forward "
+    "the command runs locally while the forwards are open, otherwise it runs "
+    "on the bastion.",
+    context_settings={"ignore_unknown_options": True},
+)
+@click.option(
+    "--cluster-name",
+    help="The name of the Fargate cluster the bastion runs in",
+    type=click.STRING,
+    required=True,
+)
+@click.option(
+    "--bastion-name",
+    help="The name of the bastion to reuse or launch",
+    type=click.STRING,
+    required=True,
+)
+@click.option(
+    "--forward",
+    "forwards",
+    help="A port to forward while the command runs in the "
+    "`local_port:remote_host:remote_port` format, can be passed multiple times",
+    type=click.STRING,
+    multiple=True,
+)
+@click.option(
+    "--identity-file",
+    help="The private key used to authenticate with the bastion",
+    type=click.STRING,
+    default=None,
+)
+@click.option(
+    "--keep",
+    help="Leave a bastion launched by this command running afterwards",
+    is_flag=True,
+    default=False,
+)
+@click.argument("command", nargs=-1, required=True, type=click.UNPROCESSED)
+@selection_params
+@launch_params(required=False)
+@common_params
+def handle_exec(
+    cluster_name: str,
+    bastion_name: str,
+    forwards: List[str],
+    identity_file: Optional[str],
+    keep: bool,
+    command: List[str],
+    strategy: str,
+    subnet_ids: Optional[str],
+    security_group_ids: Optional[str],
+    authorized_keys: Optional[str],
+    bastion_timeout: int,
+    bastion_type: str,
+    sshd_profile: str,
+    idle_timeout: int,
+    activation_pool: int,
+    no_public_ip: bool,
+    race_zones: bool,
+    **kwargs,
+) -> None:
+    try:
+        forward_info = [build_forward_info(f) for f in forwards]
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    launch_config = None
+    if subnet_ids and security_group_ids:
+        launch_config = build_launch_config(
+            cluster_name,
+            subnet_ids,
+            security_group_ids,
+            authorized_keys,
+            bastion_timeout,
+            bastion_type,
+            sshd_profile,
+            idle_timeout,
+            activation_pool,
+            no_public_ip,
+            race_zones,
+        )
+
+    instance, launched = claim_or_launch_bastion(
+        cluster_name,
+        bastion_name,
+        launch_config,
+        load_selection_strategy(strategy),
+    )
+    try:
+        exit_code = run_through_bastion(
+            instance,
+            list(command),
+            forward_info,
+            identity_file=identity_file,
+        )
+    finally:
+        if launched and not keep:
+            stop_bastion_in_background(cluster_name, instance.bastion_id)
+
+    click.get_current_context().exit(exit_code)
+
+
+def forward_params(func):
+    @click.option(
+        "--cluster-name",
+        help="The name of the Fargate cluster the bastions are running in",
+        type=click.STRING,
+        required=True,
+    )
+    @click.option(
+        "--bastion-name",
+        help="The name of the bastion to forward through, if more than one "
+        "bastion has this name the forward fails over between them",
+        type=click.STRING,
+        required=True,
+    )
+    @click.option(
+        "--forward",
+        "forwards",
+        help="A forward in `local_port:remote_host:remote_port` format, "
+        "can be passed multiple times",
+        type=click.STRING,
+        multiple=True,
+        required=True,
+    )
+    @click.option(
+        "--identity-file",
+        help="The private key used to authenticate with the bastion",
+        type=click.STRING,
+        default=None,
+    )
+    @click.option(
+        "--name",
+        help="A name for this group of forwards, defaults to the bastion name",
+        type=click.STRING,
+        default=None,
+    )
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+@cli.group(
+    "forward",
+    help="Manages background port forwards through a bastion",
+)
+def forward():
+    pass
+
+
+@forward.command(
+    "start",
+    help="Starts a background daemon that holds port forwards open over one "
+    "ssh connection, reconnecting & failing over when the bastion goes away",
+)
+@forward_params
+@selection_params
+@common_params
+def handle_forward_start(
+    cluster_name: str,
+    bastion_name: str,
+    forwards: List[str],
+    identity_file: Optional[str],
+    name: Optional[str],
+    strategy: str,
+    region: Optional[str],
+    log_level: str,
+    retry_mode: str,
+    max_attempts: int,
+    max_request_rate: float,
+    **kwargs,
+) -> None:
+    load_selection_strategy(strategy)
+    for f in forwards:
+        try:
+            build_forward_info(f)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+
+    name = name or bastion_name
+    run_args = [
+        "--cluster-name",
+        cluster_name,
+        "--bastion-name",
+        bastion_name,
+        "--name",
+        name,
+        "--strategy",
+        strategy,
+        "--log-level",
+        log_level,
+        "--retry-mode",
+        retry_mode,
+        "--max-attempts",
+        str(max_attempts),
+        "--max-request-rate",
+        str(max_request_rate),
+    ]
+    for f in forwards:
+        run_args += ["--forward", f]
+    if identity_file:
+        run_args += ["--identity-file", os.path.abspath(identity_file)]
+    if region:
+        run_args += ["--region", region]
+
+    pid = start_forward_daemon(name, run_args)
+    log_output(f"Started forward {name} with pid {pid}")
+
+
+@forward.command(
+    "run",
+    help="Runs the port forward daemon in the foreground",
+    hidden=True,
+)
+@forward_params
+@selection_params
+@common_params
+def handle_forward_run(
+    cluster_name: str,
+    bastion_name: str,
+    forwards: List[str],
+    identity_file: Optional[str],
+    name: Optional[str],
+    strategy: str,
+    **kwargs,
+) -> None:
+    try:
+        forward_info = [build_forward_info(f) for f in forwards]
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    ForwardDaemon(
+        name=name or bastion_name,
+        cluster_name=cluster_name,
+        bastion_name=bastion_name,
+        forwards=forward_info,
+        identity_file=identity_file,
+        strategy=load_selection_strategy(strategy),
+    ).run()
+
+
+@forward.command(
+    "stop",
+    help="Stops a running port forward daemon",
+)
+@click.option(
+    "--name",
+    help="The name of the forward to stop",
+    type=click.STRING,
+    required=True,
+)
+@common_params
+def handle_forward_stop(name: str, **kwargs) -> None:
+    stop_forward_daemon(name)
+    log_output(f"Stopped forward {name}")
+
+
+@forward.command(
+    "status",
+    help="Shows the health & throughput of port forward daemons",
+)
+@click.option(
+    "--name",
+    help="The name of the forward to show, defaults to all forwards",
+    type=click.STRING,
+    default=None,
+)
+@common_params
+def handle_forward_status(name: Optional[str], **kwargs) -> None:
+    log_output(json.dumps(load_forward_status(name), indent=4))
+
+
+@cli.command(
+    "bench",
+    help="Measures the throughput, channel setup time & round trip latency "
+    "of ssh or ssm channels through a bastion",
+)
+@click.option(
+    "--cluster-name",
+    help="The name of the Fargate cluster the bastion is running in",
+    type=click.STRING,
+    default=None,
+)
+@click.option(
+    "--bastion-name",
+    help="The name of the bastion instance to benchmark",
+    type=click.STRING,
+    default=None,
+)
+@click.option(
+    "--bastion-id",
+    help="The id of the bastion instance to benchmark",
+    type=click.STRING,
+    default=None,
+)
+@click.option(
+    "--host",
+    help="Benchmark a bastion reachable at this host instead of one running "
+    "in Fargate, such as a local container built from this repo",
+    type=click.STRING,
+    default=None,
+)
+@click.option(
+    "--port",
+    help="The ssh port to use with --host",
+    type=click.INT,
+    default=22,
+)
+@click.option(
+    "--identity-file",
+    help="The private key used to authenticate with the bastion",
+    type=click.STRING,
+    default=None,
+)
+@click.option(
+    "--channels",
+    help="How many channels to run in parallel",
+    type=click.INT,
+    default=BENCH_CHANNELS,
+)
+@click.option(
+    "--megabytes",
+    help="How many megabytes to send through each channel",
+    type=click.INT,
+    default=BENCH_MEGABYTES,
+)
+@click.option(
+    "--pings",
+    help="How many round trips to time on each channel",
+    type=click.INT,
+    default=BENCH_PINGS,
+)
+@click.option(
+    "--multiplex",
+    help="Run every channel over one shared ssh connection instead of "
+    "a handshake per channel",
+    is_flag=True,
+    default=False,
+)
+@common_params
+def handle_bench(
+    cluster_name: Optional[str],
+    bastion_name: Optional[str],
+    bastion_id: Optional[str],
+    host: Optional[str],
+    port: int,
+    identity_file: Optional[str],
+    channels: int,
+    megabytes: int,
+    pings: int,
+    multiplex: bool,
+    **kwargs,
+) -> None:
+    alias = build_host_alias("bench")
+    ssh_config = load_state_path("bench.ssh_config")
+
+    if host:
+        block = render_direct_ssh_config_block(alias, host, port, identity_file)
+    else:
+        if not cluster_name or not (bastion_name or bastion_id):
+            raise click.ClickException(
+                "Either host or cluster-name with bastion-name or bastion-id "
+                "is required",
+            )
+
+        instance_info = load_running_instance_info(
+            cluster_name,
+            bastion_name,
+            bastion_id,
+        )
+        if not instance_info:
+            log_error("Unable to find a running bastion to benchmark")
+            raise click.Abort()
+
+        block = render_ssh_config_block(
+            alias,
+            select_bastion(instance_info),
+            identity_file=identity_file,
+        )
+
+    write_ssh_config_block(alias, block, ssh_config)
+    results = run_benchmark(
+        ssh_config,
+        alias,
+        channels=channels,
+        megabytes=megabytes,
+        pings=pings,
+        multiplex=multiplex,
+    )
+    log_output(json.dumps(results, indent=4))
+
+
+@cli.command(
+    "scale",
+    help="Launches or stops bastions in a named group to keep the active "
+    "sessions per bastion within a target",
+)
+@click.option(
+    "--cluster-name",
+    help="The name of the Fargate cluster the bastion group runs in",
+    type=click.STRING,
+    required=True,
+)
+@click.option(
+    "--bastion-name",
+    help="The name shared by the bastions in the group",
+    type=click.STRING,
+    required=True,
+)
+@click.option(
+    "--target-sessions",
+    help="The number of active sessions each bastion should serve",
+    type=click.INT,
+    default=SCALE_TARGET_SESSIONS,
+)
+@click.option(
+    "--min-count",
+    help="The fewest bastions the group should run",
+    type=click.INT,
+    default=SCALE_MIN_COUNT,
+)
+@click.option(
+    "--max-count",
+    help="The most bastions the group should run",
+    type=click.INT,
+    default=SCALE_MAX_COUNT,
+)
+@click.option(
+    "--watch",
+    help="Keep scaling every this many seconds instead of running once",
+    type=click.INT,
+    default=0,
+)
+@launch_params()
+@common_params
+def handle_scale(
+    cluster_name: str,
+    bastion_name: str,
+    target_sessions: int,
+    min_count: int,
+    max_count: int,
+    watch: int,
+    subnet_ids: str,
+    security_group_ids: str,
+    authorized_keys: Optional[str],
+    bastion_timeout: int,
+    bastion_type: str,
+    sshd_profile: str,
+    idle_timeout: int,
+    activation_pool: int,
+    no_public_ip: bool,
+    race_zones: bool,
+    **kwargs,
+) -> None:
+    if min_count > max_count:
+        raise click.ClickException("min-count can't be greater than max-count")
+
+    launch_config = build_launch_config(
+        cluster_name,
+        subnet_ids,
+        security_group_ids,
+        authorized_keys,
+        bastion_timeout,
+        bastion_type,
+        sshd_profile,
+        idle_timeout,
+        activation_pool,
+        no_public_ip,
+        race_zones,
+    )
+
+    while True:
+        try:
+            result = scale_bastion_group(
+                launch_config,
+                bastion_name,
+                target_sessions=target_sessions,
+                min_count=min_count,
+                max_count=max_count,
+            )
+        except (BotoCoreError, ClientError, click.Abort) as e:
+            # One failed pass shouldn't stop a watch, the next pass retries it
+            if not watch:
+                raise
+            if not isinstance(e, click.Abort):
+                log_error(f"Unable to scale {bastion_name}, {e}")
+            log_error(f"Scaling {bastion_name} failed, retrying in {watch} seconds")
+        else:
+            log_output(json.dumps(result, indent=4))
+
+        if not watch:
+            return
+        sleep(watch)
+
+
+@cli.group(
+    "agent",
+    help="Manages a background agent that keeps aws clients, credentials & "
+    "inventory warm so repeated commands return quickly",
+)
+def agent():
+    pass
+
+
+@agent.command(
+    "start",
+    help="Starts the agent in the background, supported commands are sent "
+    "to it while it's running",
+)
+@common_params
+def handle_agent_start(region: Optional[str], log_level: str, **kwargs) -> None:
+    run_args = ["--log-level", log_level]
+    if region:
+        run_args += ["--region", region]
+
+    pid = start_agent(run_args)
+    log_output(f"Started agent with pid {pid}")
+
+
+@agent.command(
+    "run",
+    help="Runs the agent in the foreground",
+    hidden=True,
+)
+@common_params
+def handle_agent_run(**kwargs) -> None:
+    run_agent()
+
+
+@agent.command(
+    "stop",
+    help="Stops the running agent",
+)
+@common_params
+def handle_agent_stop(**kwargs) -> None:
+    stop_agent()
+    log_output("Stopped agent")
+
+
+@agent.command(
+    "status",
+    help="Shows whether the agent is running",
+)
+@common_params
+def handle_agent_status(**kwargs) -> None:
+    log_output(json.dumps(load_agent_status(), indent=4))
+
+
+@cli.group(
+    "activation-pool",
+    help="Manages ssm activations created ahead of time so bastion launches "
+    "don't wait on creating one",
+)
+def activation_pool():
+    pass
+
+
+@activation_pool.command(
+    "fill",
+    help="Tops up the pool for a bastion name & retires activations close "
+    "to expiring",
+)
+@click.option(
+    "--bastion-name",
+    help="The bastion name the activations are for",
+    type=click.STRING,
+    required=True,
+)
+@click.option(
+    "--size",
+    help="How many ready activations to keep",
+    type=click.INT,
+    default=2,
+)
+@common_params
+def handle_activation_pool_fill(bastion_name: str, size: int, **kwargs) -> None:
+    created = fill_activation_pool(bastion_name, size)
+    log_output(f"Created {created} activations")
+
+
+@activation_pool.command(
+    "status",
+    help="Shows how many activations are ready for each bastion name",
+)
+@common_params
+def handle_activation_pool_status(**kwargs) -> None:
+    log_output(json.dumps(load_activation_pool_status(), indent=4))
+
+
+@activation_pool.command(
+    "clear",
+    help="Deletes every pooled activation",
+)
+@common_params
+def handle_activation_pool_clear(**kwargs) -> None:
+    deleted = clear_activation_pool()
+    log_output(f"Deleted {deleted} activations")
 
 
 def main() -> None:
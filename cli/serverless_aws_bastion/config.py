@@ -3,9 +3,104 @@ CLUSTER_PROVISION_TIMEOUT = 60
 TASK_TIMEOUT = 60 * 8
 
 DEFAULT_NAME = "serverless-aws-bastion"
+CREATED_BY = f"{DEFAULT_NAME}:cli"
 TASK_ROLE_NAME = f"{DEFAULT_NAME}-task-role"
 TASK_EXECUTION_ROLE_NAME = f"{DEFAULT_NAME}-task-execution-role"
 SSM_DEREGISTER_POLICY_NAME = f"{DEFAULT_NAME}-deregister-ssm"
 
+RETRY_MAX_ATTEMPTS = 10
+MAX_REQUEST_RATE = 25.0
+MIN_REQUEST_RATE = 0.5
+
+LOG_GROUP_NAME = "/ecs/ssh-bastion"
+LOG_STREAM_PREFIX = "ecs"
+LOGS_MIN_POLL_INTERVAL = 1.0
+LOGS_MAX_POLL_INTERVAL = 10.0
+
+METRICS_PORT = 9464
+METRICS_CACHE_TTL = 30
+METRICS_DURATION_BUCKETS = (5, 10, 20, 30, 45, 60, 90, 120, 300)
+
 TASK_CPU = "256"
 TASK_MEMORY = "512"
+
+SSH_USER = "ssh-user"
+SSH_CONFIG_PATH = "~/.ssh/config"
+SSH_CONTROL_DIR = f"~/.ssh/{DEFAULT_NAME}"
+SSH_CONTROL_PERSIST = "10m"
+
+STATE_DIR = f"~/.{DEFAULT_NAME}"
+
+ACCOUNT_ROLE_NAME = f"{DEFAULT_NAME}-inventory-role"
+ACCOUNT_MAX_WORKERS = 8
+ASSUMED_ROLE_REFRESH_MARGIN = 300
+
+FORWARD_HEALTH_INTERVAL = 5
+FORWARD_CONNECT_TIMEOUT = 30
+FORWARD_MAX_BACKOFF = 60
+
+BENCH_CHANNELS = 4
+BENCH_MEGABYTES = 64
+BENCH_PINGS = 50
+
+AUTHORIZED_KEYS_PARAMETER_PREFIX = f"/{DEFAULT_NAME}/authorized-keys"
+AUTHORIZED_KEYS_MAX_PARAMETER_SIZE = 8192
+
+PREFLIGHT_CACHE_TTL = 60 * 60
+
+# Concurrent describe calls for the same cluster are merged into at most one
+# call per tick, ECS describes up to 100 tasks or clusters per call
+COALESCE_TICK = 1.0
+ECS_DESCRIBE_BATCH_SIZE = 100
+
+# Zones that were out of capacity are tried last for this long
+PLACEMENT_FAILURE_TTL = 10 * 60
+PLACEMENT_MEMORY_TTL = 60 * 60 * 24
+
+ACTIVATION_EXPIRY_MINUTES = 5
+ACTIVATION_POOL_EXPIRY_MINUTES = 30
+ACTIVATION_POOL_MIN_REMAINING = 300
+# The settings that pick the account credentials come from, pools are kept
+# apart by these so launches never need to look the account up
+ACTIVATION_POOL_SCOPE_KEYS = (
+    "AWS_PROFILE",
+    "AWS_DEFAULT_PROFILE",
+    "AWS_ACCESS_KEY_ID",
+    "AWS_SHARED_CREDENTIALS_FILE",
+    "AWS_CONFIG_FILE",
+)
+
+REAP_GRACE_MINUTES = 10
+REAP_BATCH_SIZE = 10
+
+SCALE_TARGET_SESSIONS = 10
+SCALE_MIN_COUNT = 1
+SCALE_MAX_COUNT = 10
+
+AGENT_SOCKET = "agent.sock"
+AGENT_CONNECT_TIMEOUT = 0.2
+AGENT_INVENTORY_TTL = 15
+IDENTITY_CACHE_TTL = 300
+AGENT_ENV_KEYS = (
+    "AWS_PROFILE",
+    "AWS_DEFAULT_PROFILE",
+    "AWS_REGION",
+    "AWS_DEFAULT_REGION",
+    "AWS_ACCESS_KEY_ID",
+    "AWS_SESSION_TOKEN",
+    "AWS_SHARED_CREDENTIALS_FILE",
+    "AWS_CONFIG_FILE",
+)
+AGENT_COMMANDS = (
+    "create-fargate-cluster",
+    "delete-fargate-cluster",
+    "create-bastion-task",
+    "delete-bastion-task",
+    "start-bastion",
+    "stop-bastion-instances",
+    "extend-bastion",
+    "list-bastion-instances",
+)
+# Options of agent commands that take local paths, mapped to the prefix their
+# path follows, the paths are made absolute before a command is forwarded
+AGENT_PATH_OPTIONS = {"--authorized-keys": "file://"}
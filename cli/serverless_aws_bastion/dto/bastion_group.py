@@ -0,0 +1,10 @@
+import attr
+
+from serverless_aws_bastion.dto.launch_config import LaunchConfig
+
+
+@attr.s(auto_attribs=True)
+class BastionGroup:
+    name: str
+    count: int
+    launch_config: LaunchConfig
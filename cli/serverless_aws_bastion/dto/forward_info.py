@@ -0,0 +1,43 @@
+from typing import Optional
+
+import attr
+
+
+@attr.s(auto_attribs=True)
+class ForwardInfo:
+    local_port: int
+    remote_host: str
+    remote_port: int
+    healthy: bool = False
+    active_connections: int = 0
+    total_connections: int = 0
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    bytes_per_second: float = 0.0
+    last_error: Optional[str] = None
+
+    @property
+    def as_dict(self) -> dict:
+        return attr.asdict(self)
+
+    @property
+    def remote_address(self) -> str:
+        return f"{self.remote_host}:{self.remote_port}"
+
+
+def build_forward_info(spec: str) -> ForwardInfo:
+    """
+    Parses a forward in the same `local_port:remote_host:remote_port`
+    format that `ssh -L` uses
+    """
+    try:
+        local_port, remote_host, remote_port = spec.rsplit(":", 2)
+        return ForwardInfo(
+            local_port=int(local_port),
+            remote_host=remote_host.strip("[]"),
+            remote_port=int(remote_port),
+        )
+    except ValueError:
+        raise ValueError(
+            f"Invalid forward {spec}, expected local_port:remote_host:remote_port",
+        )
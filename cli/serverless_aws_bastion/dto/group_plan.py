@@ -0,0 +1,22 @@
+from typing import Dict
+
+import attr
+
+
+@attr.s(auto_attribs=True)
+class GroupPlan:
+    name: str
+    cluster_name: str
+    desired: int
+    running: int
+    launch: int = 0
+    # Task arns to stop mapped to why they're being stopped
+    stop: Dict[str, str] = attr.Factory(dict)
+
+    @property
+    def as_dict(self) -> dict:
+        return attr.asdict(self)
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.launch or self.stop)
@@ -3,28 +3,80 @@ from typing import Dict, List, Optional
 import attr
 from mypy_boto3_ecs.type_defs import TaskTypeDef
 
-from serverless_aws_bastion.utils.aws_utils import get_tag_value
+from serverless_aws_bastion.enum.bastion_type import BastionType
+from serverless_aws_bastion.utils.aws_utils import (
+    find_tag_value,
+    get_tag_value,
+    load_aws_region_name,
+)
 
 
 @attr.s(auto_attribs=True)
 class InstanceInfo:
     bastion_id: str
+    bastion_type: str
     created_at: str
-    public_ip: str
+    public_ip: Optional[str]
     ssm_instance_id: Optional[str]
     instance_name: str
     task_arn: str
+    region: str
+    active_sessions: int = 0
+    account_id: Optional[str] = None
 
     @property
     def as_dict(self) -> dict:
         return attr.asdict(self)
 
 
+def load_bastion_type(task_data: TaskTypeDef) -> BastionType:
+    """
+    Loads the bastion type for a task, tasks launched before the type
+    was tagged are inferred from their activation id
+    """
+    bastion_type = find_tag_value("ecs", task_data["tags"], "BastionType")
+    if bastion_type in BastionType.__members__:
+        return BastionType[bastion_type]  # type: ignore
+
+    activation_id = find_tag_value("ecs", task_data["tags"], "ActivationId")
+    return BastionType.ssm if activation_id else BastionType.original
+
+
+def has_public_ip(task_data: TaskTypeDef) -> bool:
+    """
+    Checks whether a task was launched with a public ip, tasks launched before
+    this was tagged always were
+    """
+    assign_public_ip = find_tag_value("ecs", task_data["tags"], "AssignPublicIp")
+    return assign_public_ip != "DISABLED"
+
+
+def load_task_environment(task_data: TaskTypeDef) -> Dict[str, str]:
+    """
+    Loads the environment variables a task was launched with
+    """
+    return {
+        env["name"]: env.get("value", "")
+        for override in task_data.get("overrides", {}).get("containerOverrides", [])
+        for env in override.get("environment", [])
+    }
+
+
+def load_active_sessions(task_data: TaskTypeDef) -> int:
+    """
+    Loads the session count a task last reported through its tags,
+    tasks that haven't reported yet are treated as idle
+    """
+    active_sessions = find_tag_value("ecs", task_data["tags"], "ActiveSessions")
+    return int(active_sessions) if active_sessions else 0
+
+
 def build_instance_info(
     task_data: List[TaskTypeDef],
     task_ips: Dict[str, str],
     ssm_instance_data: Dict[str, str],
 ) -> List[InstanceInfo]:
+    region = load_aws_region_name()
     instance_info = []
     for data in task_data:
         bastion_id = get_tag_value("ecs", data["tags"], "BastionId")
@@ -37,11 +89,14 @@ def build_instance_info(
         instance_info.append(
             InstanceInfo(
                 task_arn=data["taskArn"],
+                region=region,
                 bastion_id=bastion_id,
+                bastion_type=load_bastion_type(data).value,
                 created_at=created_at,
                 instance_name=instance_name,
-                public_ip=task_ips[bastion_id],
+                public_ip=task_ips.get(bastion_id),
                 ssm_instance_id=ssm_instance_data.get(activation_id, ""),
+                active_sessions=load_active_sessions(data),
             ),
         )
 
@@ -0,0 +1,20 @@
+import attr
+
+from serverless_aws_bastion.config import TASK_TIMEOUT
+from serverless_aws_bastion.enum.bastion_type import BastionType
+from serverless_aws_bastion.enum.sshd_profile import SshdProfile
+
+
+@attr.s(auto_attribs=True)
+class LaunchConfig:
+    cluster_name: str
+    subnet_ids: str
+    security_group_ids: str
+    authorized_keys: str
+    timeout_minutes: int = TASK_TIMEOUT
+    bastion_type: BastionType = BastionType.ssm
+    sshd_profile: SshdProfile = SshdProfile.default
+    idle_timeout_minutes: int = 0
+    activation_pool_size: int = 0
+    public_ip: bool = True
+    race_zones: bool = False
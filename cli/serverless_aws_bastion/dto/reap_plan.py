@@ -0,0 +1,20 @@
+from typing import Dict, List
+
+import attr
+
+
+@attr.s(auto_attribs=True)
+class ReapPlan:
+    task_arns: Dict[str, List[str]] = attr.Factory(dict)
+    activation_ids: List[str] = attr.Factory(list)
+    instance_ids: List[str] = attr.Factory(list)
+
+    @property
+    def as_dict(self) -> dict:
+        return attr.asdict(self)
+
+    @property
+    def is_empty(self) -> bool:
+        return not (
+            any(self.task_arns.values()) or self.activation_ids or self.instance_ids
+        )
@@ -4,3 +4,4 @@ from enum import Enum
 class BastionType(Enum):
     original = "original"
     ssm = "ssm"
+    exec = "exec"
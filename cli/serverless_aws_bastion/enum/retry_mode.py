@@ -0,0 +1,7 @@
+from enum import Enum
+
+
+class RetryMode(Enum):
+    legacy = "legacy"
+    standard = "standard"
+    adaptive = "adaptive"
@@ -0,0 +1,7 @@
+from enum import Enum
+
+
+class SelectionStrategy(Enum):
+    consistent_hash = "consistent_hash"
+    least_recent = "least_recent"
+    least_sessions = "least_sessions"
@@ -0,0 +1,6 @@
+from enum import Enum
+
+
+class SshdProfile(Enum):
+    default = "default"
+    performance = "performance"
@@ -0,0 +1,251 @@
+from functools import partial
+from typing import Any, Dict, List, Optional
+
+import yaml
+from mypy_boto3_ecs.type_defs import TaskTypeDef
+
+from serverless_aws_bastion.aws.ecs import (
+    launch_bastion_task,
+    load_running_task_info,
+    stop_fargate_tasks,
+)
+from serverless_aws_bastion.config import DEFAULT_NAME, TASK_TIMEOUT
+from serverless_aws_bastion.dto.bastion_group import BastionGroup
+from serverless_aws_bastion.dto.group_plan import GroupPlan
+from serverless_aws_bastion.dto.instance_info import (
+    has_public_ip,
+    load_active_sessions,
+    load_bastion_type,
+    load_task_environment,
+)
+from serverless_aws_bastion.dto.launch_config import LaunchConfig
+from serverless_aws_bastion.enum.bastion_type import BastionType
+from serverless_aws_bastion.enum.sshd_profile import SshdProfile
+from serverless_aws_bastion.fleet.reap import build_batches
+from serverless_aws_bastion.utils.aws_utils import find_tag_value
+from serverless_aws_bastion.utils.click_utils import log_info
+from serverless_aws_bastion.utils.thread_utils import run_in_parallel
+
+
+GROUP_KEYS = {
+    "count",
+    "cluster",
+    "subnets",
+    "security_groups",
+    "authorized_keys",
+    "type",
+    "timeout",
+    "sshd_profile",
+    "idle_timeout",
+    "public_ip",
+}
+REQUIRED_GROUP_KEYS = ("cluster", "subnets", "security_groups", "authorized_keys")
+
+
+def join_ids(value: Any) -> str:
+    if isinstance(value, list):
+        return ",".join(str(v) for v in value)
+    return str(value)
+
+
+def build_bastion_group(name: str, values: Dict[str, Any]) -> BastionGroup:
+    unknown = set(values) - GROUP_KEYS
+    if unknown:
+        raise ValueError(f"Unknown keys in group {name}: {', '.join(sorted(unknown))}")
+
+    try:
+        bastion_type = BastionType[values.get("type", BastionType.ssm.value)]
+    except KeyError:
+        raise ValueError(f"type in group {name} must be `original`, `ssm` or `exec`")
+
+    # Exec bastions don't run sshd so have no use for keys
+    missing = [
+        k
+        for k in REQUIRED_GROUP_KEYS
+        if not values.get(k)
+        and not (k == "authorized_keys" and bastion_type == BastionType.exec)
+    ]
+    if missing:
+        raise ValueError(f"Group {name} is missing {', '.join(missing)}")
+
+    try:
+        sshd_profile = SshdProfile[
+            values.get("sshd_profile", SshdProfile.default.value)
+        ]
+    except KeyError:
+        raise ValueError(
+            f"sshd_profile in group {name} must be `default` or `performance`",
+        )
+
+    public_ip = bool(values.get("public_ip", True))
+    if not public_ip and bastion_type == BastionType.original:
+        raise ValueError(f"Group {name} is an original bastion so needs a public ip")
+
+    count = int(values.get("count", 1))
+    if count < 0:
+        raise ValueError(f"count in group {name} can't be negative")
+
+    return BastionGroup(
+        name=name,
+        count=count,
+        launch_config=LaunchConfig(
+            cluster_name=str(values["cluster"]),
+            subnet_ids=join_ids(values["subnets"]),
+            security_group_ids=join_ids(values["security_groups"]),
+            authorized_keys=str(values.get("authorized_keys") or ""),
+            timeout_minutes=int(values.get("timeout", TASK_TIMEOUT)),
+            bastion_type=bastion_type,
+            sshd_profile=sshd_profile,
+            idle_timeout_minutes=int(values.get("idle_timeout", 0)),
+            public_ip=public_ip,
+        ),
+    )
+
+
+def load_fleet_spec(path: str) -> List[BastionGroup]:
+    """
+    Loads the bastion groups from a fleet spec, values under defaults apply
+    to every group that doesn't set them itself:
+
+        defaults:
+          cluster: bastions
+          subnets: [subnet-1, subnet-2]
+          security_groups: [sg-1]
+          authorized_keys: ssm:/team/authorized-keys
+        groups:
+          web:
+            count: 2
+            type: ssm
+            timeout: 480
+    """
+    with open(path) as f:
+        try:
+            spec = yaml.safe_load(f) or {}
+        except yaml.YAMLError as e:
+            raise ValueError(f"{path} isn't valid yaml, {e}")
+
+    if not isinstance(spec, dict) or not isinstance(spec.get("groups"), dict):
+        raise ValueError(f"{path} must have a mapping of groups")
+
+    defaults = spec.get("defaults") or {}
+    if not isinstance(defaults, dict):
+        raise ValueError(f"defaults in {path} must be a mapping")
+
+    groups = []
+    for name, values in spec["groups"].items():
+        values = values or {}
+        if not isinstance(values, dict):
+            raise ValueError(f"Group {name} in {path} must be a mapping")
+        groups.append(build_bastion_group(str(name), dict(defaults, **values)))
+    return groups
+
+
+def load_task_subnet(task: TaskTypeDef) -> Optional[str]:
+    for attachment in task.get("attachments", []):
+        for detail in attachment.get("details", []):
+            if detail.get("name") == "subnetId":
+                return detail.get("value")
+    return None
+
+
+def find_drift(task: TaskTypeDef, launch_config: LaunchConfig) -> Optional[str]:
+    """
+    Describes how a running task differs from its group's spec or returns None
+    if it matches. Settings a task wasn't launched with aren't compared.
+    """
+    bastion_type = load_bastion_type(task)
+    if bastion_type != launch_config.bastion_type:
+        return (
+            f"type is {bastion_type.value}, expected {launch_config.bastion_type.value}"
+        )
+
+    expected_env = {
+        "TIMEOUT": str(launch_config.timeout_minutes * 60),
+        "SSHD_PROFILE": launch_config.sshd_profile.value,
+        "IDLE_TIMEOUT": str(launch_config.idle_timeout_minutes * 60),
+    }
+    env = load_task_environment(task)
+    for key, value in expected_env.items():
+        if key in env and env[key] != value:
+            return f"{key} is {env[key]}, expected {value}"
+
+    subnet_id = load_task_subnet(task)
+    if subnet_id and subnet_id not in launch_config.subnet_ids.split(","):
+        return f"subnet {subnet_id} isn't in the spec"
+
+    if has_public_ip(task) != launch_config.public_ip:
+        return "public ip doesn't match the spec"
+
+    return None
+
+
+def plan_bastion_group(group: BastionGroup, tasks: List[TaskTypeDef]) -> GroupPlan:
+    """
+    Works out the launches & stops that bring a group to its spec. Drifted
+    bastions are replaced & surplus ones are stopped fewest sessions first.
+    """
+    group_tasks = [
+        t
+        for t in tasks
+        if find_tag_value("ecs", t["tags"], "Name") == f"{DEFAULT_NAME}/{group.name}"
+    ]
+
+    plan = GroupPlan(
+        name=group.name,
+        cluster_name=group.launch_config.cluster_name,
+        desired=group.count,
+        running=len(group_tasks),
+    )
+
+    matching = []
+    for task in group_tasks:
+        drift = find_drift(task, group.launch_config)
+        if drift:
+            plan.stop[task["taskArn"]] = drift
+        else:
+            matching.append(task)
+
+    matching.sort(key=lambda t: (load_active_sessions(t), t["createdAt"]))
+    for task in matching[: max(len(matching) - group.count, 0)]:
+        plan.stop[task["taskArn"]] = "surplus"
+
+    plan.launch = max(group.count - len(matching), 0)
+    return plan
+
+
+def build_fleet_plan(groups: List[BastionGroup]) -> List[GroupPlan]:
+    """
+    Diffs the spec against what's running, only listing & describing the
+    tasks in each cluster once
+    """
+    cluster_names = sorted({g.launch_config.cluster_name for g in groups})
+    cluster_tasks = dict(
+        zip(cluster_names, run_in_parallel(load_running_task_info, cluster_names)),
+    )
+    return [
+        plan_bastion_group(g, cluster_tasks[g.launch_config.cluster_name])
+        for g in groups
+    ]
+
+
+def apply_fleet_plan(groups: List[BastionGroup], plans: List[GroupPlan]) -> None:
+    """
+    Launches everything in the plan in parallel & waits for the bastions to
+    start before stopping anything, so drifted bastions are replaced before
+    they're taken away
+    """
+    launches = [
+        (g.launch_config, g.name)
+        for g, p in zip(groups, plans)
+        for _ in range(p.launch)
+    ]
+    if launches:
+        log_info(f"Launching {len(launches)} bastions...")
+        run_in_parallel(lambda launch: launch_bastion_task(*launch), launches)
+
+    for plan in plans:
+        batches = [
+            [{"taskArn": arn} for arn in batch]
+            for batch in build_batches(list(plan.stop))
+        ]
+        run_in_parallel(partial(stop_fargate_tasks, plan.cluster_name), batches)
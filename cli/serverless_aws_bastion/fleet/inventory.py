@@ -0,0 +1,67 @@
+from typing import List, Optional
+
+import attr
+from botocore.exceptions import BotoCoreError, ClientError
+from click import get_current_context
+
+from serverless_aws_bastion.aws.ecs import (
+    list_fargate_clusters,
+    load_running_instance_info,
+)
+from serverless_aws_bastion.config import ACCOUNT_MAX_WORKERS
+from serverless_aws_bastion.dto.instance_info import InstanceInfo
+from serverless_aws_bastion.utils.aws_utils import build_role_arn
+from serverless_aws_bastion.utils.click_utils import log_error
+from serverless_aws_bastion.utils.thread_utils import run_in_scopes
+
+
+def load_account_inventory(
+    account_id: str,
+    cluster_name: Optional[str] = None,
+    instance_name: Optional[str] = None,
+) -> List[InstanceInfo]:
+    """
+    Loads the running bastions in the account & region of the current
+    context, checking every cluster when no cluster name is given
+    """
+    try:
+        cluster_names = [cluster_name] if cluster_name else list_fargate_clusters()
+
+        instance_info = []
+        for name in cluster_names:
+            instance_info += load_running_instance_info(name, instance_name)
+    except (BotoCoreError, ClientError) as e:
+        log_error(f"Unable to load bastions from account {account_id}, {e}")
+        return []
+
+    return [attr.evolve(i, account_id=account_id) for i in instance_info]
+
+
+def load_multi_account_inventory(
+    account_ids: List[str],
+    role_name: str,
+    regions: List[Optional[str]],
+    cluster_name: Optional[str] = None,
+    instance_name: Optional[str] = None,
+    max_workers: int = ACCOUNT_MAX_WORKERS,
+) -> List[InstanceInfo]:
+    """
+    Assumes the role in every account & loads their running bastions in
+    parallel, an account that can't be read is logged & skipped
+    """
+    scopes = [
+        {
+            "role_arn": build_role_arn(account_id, role_name),
+            "region": region,
+            "account_id": account_id,
+        }
+        for account_id in account_ids
+        for region in regions
+    ]
+
+    def load_scope_inventory() -> List[InstanceInfo]:
+        account_id = get_current_context().params["account_id"]
+        return load_account_inventory(account_id, cluster_name, instance_name)
+
+    results = run_in_scopes(load_scope_inventory, scopes, max_workers)
+    return [i for result in results for i in result]
@@ -0,0 +1,313 @@
+import socketserver
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import click
+from mypy_boto3_ecs.type_defs import TaskTypeDef
+
+from serverless_aws_bastion.aws.ecs import (
+    list_fargate_clusters,
+    load_running_task_info,
+)
+from serverless_aws_bastion.aws.ssm import load_bastion_managed_instances
+from serverless_aws_bastion.config import (
+    DEFAULT_NAME,
+    METRICS_CACHE_TTL,
+    METRICS_DURATION_BUCKETS,
+)
+from serverless_aws_bastion.dto.instance_info import (
+    load_active_sessions,
+    load_bastion_type,
+)
+from serverless_aws_bastion.enum.bastion_type import BastionType
+from serverless_aws_bastion.utils.aws_utils import find_tag_value
+from serverless_aws_bastion.utils.cache_utils import enable_inventory_cache
+from serverless_aws_bastion.utils.click_utils import log_info
+from serverless_aws_bastion.utils.thread_utils import run_in_parallel
+
+
+Labels = Tuple[str, ...]
+LABEL_NAMES = ("cluster", "name", "task")
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        for i, bucket in enumerate(self.buckets):
+            if value <= bucket:
+                self.counts[i] += 1
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_labels(labels: Labels, extra: str = "") -> str:
+    rendered = ",".join(
+        f'{name}="{escape_label(value)}"' for name, value in zip(LABEL_NAMES, labels)
+    )
+    return "{" + rendered + (f",{extra}" if extra else "") + "}"
+
+
+def render_gauge(
+    name: str,
+    help_text: str,
+    values: Dict[Labels, float],
+) -> List[str]:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+    for labels, value in sorted(values.items()):
+        lines.append(f"{name}{render_labels(labels)} {value}")
+    return lines
+
+
+def render_histogram(
+    name: str,
+    help_text: str,
+    histograms: Dict[Labels, Histogram],
+) -> List[str]:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for labels, histogram in sorted(histograms.items()):
+        for bucket, count in zip(histogram.buckets, histogram.counts):
+            bucket_labels = render_labels(labels, f'le="{bucket}"')
+            lines.append(f"{name}_bucket{bucket_labels} {count}")
+
+        inf_labels = render_labels(labels, 'le="+Inf"')
+        lines += [
+            f"{name}_bucket{inf_labels} {histogram.count}",
+            f"{name}_sum{render_labels(labels)} {histogram.sum}",
+            f"{name}_count{render_labels(labels)} {histogram.count}",
+        ]
+    return lines
+
+
+class FleetHistory:
+    """
+    Launch histograms kept for the life of the exporter, each task is only
+    observed once so the counts never go down between scrapes
+    """
+
+    def __init__(self) -> None:
+        self.launch_durations: Dict[Labels, Histogram] = {}
+        self.registration_lags: Dict[Labels, Histogram] = {}
+        self.launches_seen: Set[str] = set()
+        self.registrations_seen: Set[str] = set()
+
+    def observe_launch(self, labels: Labels, task_arn: str, seconds: float) -> None:
+        if task_arn not in self.launches_seen:
+            self.launches_seen.add(task_arn)
+            self.launch_durations.setdefault(
+                labels,
+                Histogram(METRICS_DURATION_BUCKETS),
+            ).observe(seconds)
+
+    def observe_registration(
+        self,
+        labels: Labels,
+        task_arn: str,
+        seconds: float,
+    ) -> None:
+        if task_arn not in self.registrations_seen:
+            self.registrations_seen.add(task_arn)
+            self.registration_lags.setdefault(
+                labels,
+                Histogram(METRICS_DURATION_BUCKETS),
+            ).observe(seconds)
+
+    def forget_stopped(self, running_arns: Set[str]) -> None:
+        """
+        Stopped tasks never come back so there's no need to remember them
+        """
+        self.launches_seen &= running_arns
+        self.registrations_seen &= running_arns
+
+
+def load_created_on(task: TaskTypeDef) -> datetime:
+    """
+    Loads when a bastion was launched from its CreatedOn tag, falling back to
+    when ECS created the task
+    """
+    created_on = find_tag_value("ecs", task["tags"], "CreatedOn") or ""
+    for date_format in ("%Y-%m-%d %H:%M:%S.%f", "%Y-%m-%d %H:%M:%S"):
+        try:
+            parsed = datetime.strptime(created_on, date_format)
+            return parsed.replace(tzinfo=timezone.utc)
+        except ValueError:
+            pass
+    return task["createdAt"]
+
+
+def load_bastion_name(task: TaskTypeDef) -> str:
+    name_tag = find_tag_value("ecs", task["tags"], "Name") or ""
+    return name_tag[len(DEFAULT_NAME) + 1 :] if name_tag else ""
+
+
+def collect_fleet_metrics(
+    cluster_names: Optional[Iterable[str]] = None,
+    history: Optional[FleetHistory] = None,
+) -> str:
+    """
+    Discovers the running bastions & renders fleet metrics in the prometheus
+    text format, labelled by cluster & bastion name. Launch histograms are
+    kept in the history so they only grow across scrapes.
+    """
+    started_at = time.monotonic()
+    history = history or FleetHistory()
+    clusters = list(cluster_names or list_fargate_clusters())
+    cluster_tasks = run_in_parallel(load_running_task_info, clusters)
+    registered_at = {
+        i["ActivationId"]: i["RegistrationDate"]
+        for i in load_bastion_managed_instances()
+        if "RegistrationDate" in i
+    }
+
+    now = datetime.now(timezone.utc)
+    running: Dict[Labels, float] = defaultdict(float)
+    sessions: Dict[Labels, float] = defaultdict(float)
+    ages: Dict[Labels, float] = {}
+
+    for cluster, tasks in zip(clusters, cluster_tasks):
+        for task in tasks:
+            labels = (cluster, load_bastion_name(task))
+            task_arn = task["taskArn"]
+
+            running[labels] += 1
+            sessions[labels] += load_active_sessions(task)
+            ages[labels + (task_arn.split("/")[-1],)] = (
+                now - load_created_on(task)
+            ).total_seconds()
+
+            if "startedAt" in task:
+                history.observe_launch(
+                    labels,
+                    task_arn,
+                    (task["startedAt"] - task["createdAt"]).total_seconds(),
+                )
+
+            activation_id = find_tag_value("ecs", task["tags"], "ActivationId")
+            is_ssm = load_bastion_type(task) == BastionType.ssm
+            if is_ssm and activation_id in registered_at:
+                history.observe_registration(
+                    labels,
+                    task_arn,
+                    (registered_at[activation_id] - task["createdAt"]).total_seconds(),
+                )
+
+    history.forget_stopped({t["taskArn"] for tasks in cluster_tasks for t in tasks})
+
+    lines = (
+        render_gauge("sab_bastions_running", "Running bastion tasks", running)
+        + render_gauge(
+            "sab_bastion_active_sessions",
+            "Active sessions reported by running bastions",
+            sessions,
+        )
+        + render_gauge(
+            "sab_bastion_age_seconds",
+            "Time since each running bastion was launched",
+            ages,
+        )
+        + render_histogram(
+            "sab_bastion_launch_duration_seconds",
+            "Time from ECS creating a bastion task to it running",
+            history.launch_durations,
+        )
+        + render_histogram(
+            "sab_bastion_ssm_registration_lag_seconds",
+            "Time from ECS creating an ssm bastion task to it registering with ssm",
+            history.registration_lags,
+        )
+        + [
+            "# HELP sab_discovery_duration_seconds Time taken to discover the fleet",
+            "# TYPE sab_discovery_duration_seconds gauge",
+            f"sab_discovery_duration_seconds {time.monotonic() - started_at:.3f}",
+        ]
+    )
+    return "\n".join(lines) + "\n"
+
+
+class MetricsServer(socketserver.ThreadingMixIn, HTTPServer):
+    """
+    Serves fleet metrics, renders are shared between scrapes for the cache
+    ttl so any number of scrapers make at most one discovery per ttl
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        port: int,
+        ctx: click.Context,
+        cluster_names: Optional[List[str]],
+        ttl: int = METRICS_CACHE_TTL,
+    ):
+        super().__init__(("", port), MetricsRequestHandler)
+        self.ctx = ctx
+        self.cluster_names = cluster_names
+        self.ttl = ttl
+        self.history = FleetHistory()
+
+        self.lock = threading.Lock()
+        self.rendered_at = 0.0
+        self.rendered = ""
+
+    def render(self) -> str:
+        with self.lock:
+            if time.monotonic() - self.rendered_at >= self.ttl:
+                with self.ctx.scope(cleanup=False):
+                    self.rendered = collect_fleet_metrics(
+                        self.cluster_names,
+                        self.history,
+                    )
+                self.rendered_at = time.monotonic()
+            return self.rendered
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+
+        server: MetricsServer = self.server  # type: ignore
+        try:
+            body = server.render().encode()
+        except Exception as e:
+            self.send_error(500, str(e))
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def run_metrics_exporter(
+    port: int,
+    cluster_names: Optional[List[str]] = None,
+    ttl: int = METRICS_CACHE_TTL,
+) -> None:
+    """
+    Serves /metrics until interrupted
+    """
+    enable_inventory_cache(ttl)
+    server = MetricsServer(port, click.get_current_context(), cluster_names, ttl)
+    log_info(f"Serving metrics on :{port}/metrics")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
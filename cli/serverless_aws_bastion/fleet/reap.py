@@ -0,0 +1,124 @@
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from typing import List, Optional
+
+from mypy_boto3_ecs.type_defs import TaskTypeDef
+
+from serverless_aws_bastion.aws.ecs import (
+    list_fargate_clusters,
+    load_running_task_info,
+    stop_fargate_tasks,
+)
+from serverless_aws_bastion.aws.ssm import (
+    delete_activation,
+    deregister_managed_instance,
+    load_bastion_activations,
+    load_bastion_managed_instances,
+)
+from serverless_aws_bastion.config import REAP_BATCH_SIZE, REAP_GRACE_MINUTES
+from serverless_aws_bastion.dto.instance_info import load_task_environment
+from serverless_aws_bastion.dto.reap_plan import ReapPlan
+from serverless_aws_bastion.utils.aws_utils import find_tag_value
+from serverless_aws_bastion.utils.click_utils import log_info
+from serverless_aws_bastion.utils.thread_utils import run_in_parallel
+
+
+def load_task_deadline(task: TaskTypeDef) -> Optional[datetime]:
+    """
+    Works out when a bastion task should have shut itself down from its
+    launch timeout & any lease extension
+    """
+    deadline = None
+    timeout = load_task_environment(task).get("TIMEOUT", "")
+    if timeout.isdigit():
+        deadline = task["createdAt"] + timedelta(seconds=int(timeout))
+
+    lease_expires_at = find_tag_value("ecs", task["tags"], "LeaseExpiresAt")
+    if lease_expires_at and lease_expires_at.isdigit():
+        lease = datetime.fromtimestamp(int(lease_expires_at), timezone.utc)
+        deadline = max(deadline, lease) if deadline else lease
+
+    return deadline
+
+
+def is_task_expired(
+    task: TaskTypeDef,
+    now: datetime,
+    grace: timedelta,
+    max_age: Optional[timedelta] = None,
+) -> bool:
+    if max_age and now - task["createdAt"] > max_age:
+        return True
+
+    deadline = load_task_deadline(task)
+    return deadline is not None and now > deadline + grace
+
+
+def build_reap_plan(
+    grace_minutes: int = REAP_GRACE_MINUTES,
+    max_age_minutes: Optional[int] = None,
+) -> ReapPlan:
+    """
+    Finds bastion tasks that overran their timeout along with activations &
+    ssm instances that no longer belong to a live task. Anything younger than
+    the grace period is left alone so launches in progress are never touched,
+    as are unused activations that haven't expired such as pooled ones.
+    """
+    now = datetime.now(timezone.utc)
+    grace = timedelta(minutes=grace_minutes)
+    max_age = timedelta(minutes=max_age_minutes) if max_age_minutes else None
+
+    plan = ReapPlan()
+    live_activation_ids = set()
+
+    cluster_names = list_fargate_clusters()
+    cluster_tasks = run_in_parallel(load_running_task_info, cluster_names)
+    for cluster_name, tasks in zip(cluster_names, cluster_tasks):
+        for task in tasks:
+            if is_task_expired(task, now, grace, max_age):
+                plan.task_arns.setdefault(cluster_name, []).append(task["taskArn"])
+                continue
+
+            activation_id = find_tag_value("ecs", task["tags"], "ActivationId")
+            if activation_id:
+                live_activation_ids.add(activation_id)
+
+    plan.activation_ids = [
+        a["ActivationId"]
+        for a in load_bastion_activations()
+        if a["ActivationId"] not in live_activation_ids
+        and now - a["CreatedDate"] > grace
+        and (a.get("Expired") or a.get("RegistrationsCount"))
+    ]
+    plan.instance_ids = [
+        i["InstanceId"]
+        for i in load_bastion_managed_instances()
+        if i.get("ActivationId") not in live_activation_ids
+        and now - i.get("RegistrationDate", now) > grace
+    ]
+
+    return plan
+
+
+def build_batches(items: List[str], size: int = REAP_BATCH_SIZE) -> List[List[str]]:
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+def execute_reap_plan(plan: ReapPlan) -> None:
+    """
+    Stops, deletes & deregisters everything in the plan in parallel batches.
+    Items that are already gone are skipped so overlapping runs are harmless.
+    """
+    for cluster_name, task_arns in plan.task_arns.items():
+        batches = [
+            [{"taskArn": arn} for arn in batch] for batch in build_batches(task_arns)
+        ]
+        run_in_parallel(partial(stop_fargate_tasks, cluster_name), batches)
+
+    if plan.activation_ids:
+        log_info(f"Deleting {len(plan.activation_ids)} activations...")
+        run_in_parallel(delete_activation, plan.activation_ids)
+
+    if plan.instance_ids:
+        log_info(f"Deregistering {len(plan.instance_ids)} ssm instances...")
+        run_in_parallel(deregister_managed_instance, plan.instance_ids)
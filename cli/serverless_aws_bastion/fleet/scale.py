@@ -0,0 +1,82 @@
+import math
+from typing import Dict
+
+from serverless_aws_bastion.aws.ecs import (
+    launch_bastion_task,
+    load_running_task_info,
+    stop_fargate_tasks,
+)
+from serverless_aws_bastion.config import (
+    SCALE_MAX_COUNT,
+    SCALE_MIN_COUNT,
+    SCALE_TARGET_SESSIONS,
+)
+from serverless_aws_bastion.dto.instance_info import load_active_sessions
+from serverless_aws_bastion.dto.launch_config import LaunchConfig
+from serverless_aws_bastion.utils.click_utils import log_info
+from serverless_aws_bastion.utils.thread_utils import run_in_parallel
+
+
+def calculate_desired_count(
+    total_sessions: int,
+    target_sessions: int = SCALE_TARGET_SESSIONS,
+    min_count: int = SCALE_MIN_COUNT,
+    max_count: int = SCALE_MAX_COUNT,
+) -> int:
+    """
+    Calculates how many bastions are needed to keep the sessions per
+    bastion at or under the target
+    """
+    desired = math.ceil(total_sessions / max(target_sessions, 1))
+    return min(max(desired, min_count), max_count)
+
+
+def scale_bastion_group(
+    launch_config: LaunchConfig,
+    instance_name: str,
+    target_sessions: int = SCALE_TARGET_SESSIONS,
+    min_count: int = SCALE_MIN_COUNT,
+    max_count: int = SCALE_MAX_COUNT,
+) -> Dict[str, int]:
+    """
+    Launches or stops bastions in a named group based on the sessions each
+    bastion reports. Only idle bastions are stopped when scaling in so no
+    one's session is cut off.
+    """
+    tasks = load_running_task_info(launch_config.cluster_name, instance_name)
+    sessions = {t["taskArn"]: load_active_sessions(t) for t in tasks}
+    total_sessions = sum(sessions.values())
+
+    desired = calculate_desired_count(
+        total_sessions,
+        target_sessions,
+        min_count,
+        max_count,
+    )
+    log_info(
+        f"{instance_name} has {len(tasks)} bastions serving {total_sessions} "
+        f"sessions, desired count is {desired}",
+    )
+
+    launched = 0
+    if desired > len(tasks):
+        launched = desired - len(tasks)
+        run_in_parallel(
+            lambda _: launch_bastion_task(launch_config, instance_name),
+            range(launched),
+        )
+
+    stopped = 0
+    if desired < len(tasks):
+        idle_tasks = [t for t in tasks if sessions[t["taskArn"]] == 0]
+        to_stop = idle_tasks[: len(tasks) - desired]
+        stop_fargate_tasks(launch_config.cluster_name, to_stop)
+        stopped = len(to_stop)
+
+    return {
+        "running": len(tasks),
+        "total_sessions": total_sessions,
+        "desired": desired,
+        "launched": launched,
+        "stopped": stopped,
+    }
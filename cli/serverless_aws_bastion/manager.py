@@ -0,0 +1,141 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, List, Optional
+
+import attr
+import click
+
+from serverless_aws_bastion.aws.ecs import (
+    launch_bastion,
+    load_running_instance_info,
+    stop_fargate_tasks,
+)
+from serverless_aws_bastion.config import TASK_TIMEOUT
+from serverless_aws_bastion.dto.instance_info import InstanceInfo
+from serverless_aws_bastion.dto.launch_config import LaunchConfig
+from serverless_aws_bastion.enum.bastion_type import BastionType
+from serverless_aws_bastion.enum.log_level import LogLevel
+from serverless_aws_bastion.enum.sshd_profile import SshdProfile
+
+
+class BastionManager:
+    """
+    Launches, lists & stops bastions from python without going through the
+    cli. One manager reuses the same aws clients across every call, so a
+    pytest session can share it between fixtures:
+
+        manager = BastionManager("cluster", subnet_ids=..., ...)
+        with manager.bastion("integration-tests") as instance:
+            ...
+        manager.close()
+    """
+
+    def __init__(
+        self,
+        cluster_name: str,
+        subnet_ids: str = "",
+        security_group_ids: str = "",
+        authorized_keys: str = "",
+        region: Optional[str] = None,
+        timeout_minutes: int = TASK_TIMEOUT,
+        bastion_type: BastionType = BastionType.ssm,
+        sshd_profile: SshdProfile = SshdProfile.default,
+        idle_timeout_minutes: int = 0,
+        activation_pool_size: int = 0,
+        public_ip: bool = True,
+        race_zones: bool = False,
+        log_level: LogLevel = LogLevel.error,
+    ):
+        self.launch_config = LaunchConfig(
+            cluster_name=cluster_name,
+            subnet_ids=subnet_ids,
+            security_group_ids=security_group_ids,
+            authorized_keys=authorized_keys,
+            timeout_minutes=timeout_minutes,
+            bastion_type=bastion_type,
+            sshd_profile=sshd_profile,
+            idle_timeout_minutes=idle_timeout_minutes,
+            activation_pool_size=activation_pool_size,
+            public_ip=public_ip,
+            race_zones=race_zones,
+        )
+
+        # The aws helpers read the region & log level from the click context,
+        # so calls are run inside a context holding this manager's settings
+        self.ctx = click.Context(click.Command("bastion-manager"))
+        self.ctx.params = {"region": region, "log_level": log_level.name}
+
+        self.executor = ThreadPoolExecutor(max_workers=4)
+        self.pending_stops: List[Future] = []
+
+    def __enter__(self) -> "BastionManager":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        with self.ctx.scope(cleanup=False):
+            return func(*args, **kwargs)
+
+    def launch(self, instance_name: str, **overrides) -> List[InstanceInfo]:
+        """
+        Launches a bastion & waits for it to start. Any LaunchConfig field
+        can be overridden for this launch.
+        """
+        launch_config = attr.evolve(self.launch_config, **overrides)
+        return self._run(launch_bastion, launch_config, instance_name)
+
+    def list(
+        self,
+        instance_name: Optional[str] = None,
+        bastion_id: Optional[str] = None,
+    ) -> List[InstanceInfo]:
+        return self._run(
+            load_running_instance_info,
+            self.launch_config.cluster_name,
+            instance_name,
+            bastion_id,
+        )
+
+    def stop(self, instances: List[InstanceInfo], wait: bool = False) -> Future:
+        """
+        Stops bastions in the background, returns a future that resolves once
+        ECS has accepted the stop requests
+        """
+        tasks = [{"taskArn": i.task_arn} for i in instances]
+        future = self.executor.submit(
+            self._run,
+            stop_fargate_tasks,
+            self.launch_config.cluster_name,
+            tasks,
+        )
+        self.pending_stops.append(future)
+
+        if wait:
+            future.result()
+        return future
+
+    @contextmanager
+    def bastion(self, instance_name: str, **overrides) -> Iterator[InstanceInfo]:
+        """
+        Launches a bastion on enter & stops it on exit without blocking
+        """
+        instances = self.launch(instance_name, **overrides)
+        if not instances:
+            raise click.ClickException(f"No bastion was launched for {instance_name}")
+
+        try:
+            yield instances[0]
+        finally:
+            self.stop(instances)
+
+    def close(self, wait: bool = True) -> None:
+        """
+        Waits for any background stops to be sent & shuts down the worker pool
+        """
+        if wait:
+            for future in self.pending_stops:
+                future.result()
+        self.pending_stops = []
+        self.executor.shutdown(wait=wait)
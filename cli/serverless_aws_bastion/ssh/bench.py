@@ -0,0 +1,214 @@
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import attr
+from click import Abort
+
+from serverless_aws_bastion.config import (
+    BENCH_CHANNELS,
+    BENCH_MEGABYTES,
+    BENCH_PINGS,
+)
+from serverless_aws_bastion.ssh.master import start_master
+from serverless_aws_bastion.utils.click_utils import log_error, log_info
+
+
+CHUNK_SIZE = 256 * 1024
+PING_PAYLOAD = b"x" * 63 + b"\n"
+READY_SENTINEL = b"ready\n"
+
+
+@attr.s(auto_attribs=True)
+class ChannelResult:
+    setup: float
+    bytes_sent: int
+    elapsed: float
+    round_trips: List[float]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """
+    Returns the nearest rank percentile of a list of values
+    """
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    index = max(int(round(pct / 100 * len(ordered))) - 1, 0)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+def summarize_ms(values: List[float]) -> Dict[str, float]:
+    """
+    Summarizes a list of durations in seconds as millisecond percentiles
+    """
+    return {f"p{pct}": round(percentile(values, pct) * 1000, 2) for pct in (50, 90, 99)}
+
+
+def measure_setup(ssh_command: List[str]) -> float:
+    """
+    Times how long it takes to open a channel & run a no-op command
+    """
+    start = time.monotonic()
+    subprocess.run(
+        ssh_command + ["true"],
+        check=True,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+    )
+    return time.monotonic() - start
+
+
+def measure_throughput(ssh_command: List[str], size_bytes: int) -> Tuple[int, float]:
+    """
+    Streams a number of bytes up through a channel and returns the bytes sent
+    along with how long it took for the remote side to consume them. Timing
+    starts once the remote side says it's ready so the handshake isn't counted.
+    """
+    chunk = b"\0" * CHUNK_SIZE
+    process = subprocess.Popen(
+        ssh_command + ["echo ready && cat > /dev/null"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+    )
+
+    sent = 0
+    try:
+        # The channel closed before the remote command started
+        if process.stdout.readline() != READY_SENTINEL:  # type: ignore
+            raise BrokenPipeError()
+
+        start = time.monotonic()
+        while sent < size_bytes:
+            data = chunk[: min(CHUNK_SIZE, size_bytes - sent)]
+            process.stdin.write(data)  # type: ignore
+            sent += len(data)
+        process.stdin.close()  # type: ignore
+    except BrokenPipeError:
+        # The channel closed early, ssh's exit status says why
+        process.wait()
+        process.stdout.close()  # type: ignore
+        raise subprocess.CalledProcessError(process.returncode, process.args)
+    process.wait()
+    elapsed = time.monotonic() - start
+    process.stdout.close()  # type: ignore
+
+    return sent, elapsed
+
+
+def measure_latency(ssh_command: List[str], pings: int) -> List[float]:
+    """
+    Echos small payloads through a long lived channel & records the round trips
+    """
+    process = subprocess.Popen(
+        ssh_command + ["cat"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        bufsize=0,
+    )
+
+    round_trips: List[float] = []
+    try:
+        for _ in range(pings):
+            start = time.monotonic()
+            process.stdin.write(PING_PAYLOAD)  # type: ignore
+            received = b""
+            while len(received) < len(PING_PAYLOAD):
+                data = process.stdout.read(len(PING_PAYLOAD))  # type: ignore
+                if not data:
+                    return round_trips
+                received += data
+            round_trips.append(time.monotonic() - start)
+    finally:
+        process.stdin.close()  # type: ignore
+        process.wait()
+
+    return round_trips
+
+
+def run_channel(
+    channel: int,
+    ssh_command: List[str],
+    size_bytes: int,
+    pings: int,
+) -> ChannelResult:
+    try:
+        setup = measure_setup(ssh_command)
+        sent, elapsed = measure_throughput(ssh_command, size_bytes)
+        round_trips = measure_latency(ssh_command, pings)
+    except subprocess.CalledProcessError as e:
+        log_error(f"Channel {channel} failed with exit status {e.returncode}")
+        raise
+
+    return ChannelResult(
+        setup=setup,
+        bytes_sent=sent,
+        elapsed=elapsed,
+        round_trips=round_trips,
+    )
+
+
+def run_benchmark(
+    ssh_config_path: str,
+    alias: str,
+    channels: int = BENCH_CHANNELS,
+    megabytes: int = BENCH_MEGABYTES,
+    pings: int = BENCH_PINGS,
+    multiplex: bool = False,
+) -> Dict[str, object]:
+    """
+    Opens a number of parallel channels through a bastion and reports the
+    aggregate throughput, channel setup time & round trip latency percentiles.
+    Channels either each do a full handshake or share one multiplexed master.
+    """
+    base_command = ["ssh", "-F", ssh_config_path, "-o", "BatchMode=yes"]
+    master: Optional[subprocess.Popen] = None
+
+    if multiplex:
+        master = start_master(base_command, alias)
+        channel_command = base_command + ["-o", "ControlMaster=no", alias]
+    else:
+        channel_command = base_command + [
+            "-o",
+            "ControlMaster=no",
+            "-o",
+            "ControlPath=none",
+            alias,
+        ]
+
+    log_info(f"Running {channels} channels through {alias}...")
+    size_bytes = megabytes * 1024 * 1024
+    start = time.monotonic()
+    try:
+        with ThreadPoolExecutor(max_workers=channels) as executor:
+            results = list(
+                executor.map(
+                    lambda i: run_channel(i + 1, channel_command, size_bytes, pings),
+                    range(channels),
+                ),
+            )
+    except subprocess.CalledProcessError:
+        log_error(f"Failed to run every channel through {alias}")
+        raise Abort()
+    finally:
+        if master:
+            master.terminate()
+            master.wait()
+    wall_time = time.monotonic() - start
+
+    total_bytes = sum(r.bytes_sent for r in results)
+    throughput_window = max(r.elapsed for r in results)
+    return {
+        "channels": channels,
+        "multiplexed": multiplex,
+        "megabytes_per_channel": megabytes,
+        "throughput_mb_per_second": round(
+            total_bytes / 1024 / 1024 / throughput_window,
+            2,
+        ),
+        "setup_ms": summarize_ms([r.setup for r in results]),
+        "round_trip_ms": summarize_ms([rtt for r in results for rtt in r.round_trips]),
+        "wall_time_seconds": round(wall_time, 2),
+    }
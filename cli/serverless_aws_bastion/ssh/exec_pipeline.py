@@ -0,0 +1,168 @@
+import os
+import shlex
+import subprocess
+import sys
+from typing import List, Optional, Tuple
+
+import attr
+import click
+
+from serverless_aws_bastion.aws.ecs import (
+    describe_task,
+    launch_bastion,
+    load_running_instance_info,
+)
+from serverless_aws_bastion.aws.placement import discard_tasks
+from serverless_aws_bastion.aws.ssm import wait_for_instance_registration
+from serverless_aws_bastion.config import TASK_BOOT_TIMEOUT
+from serverless_aws_bastion.dto.forward_info import ForwardInfo
+from serverless_aws_bastion.dto.instance_info import InstanceInfo
+from serverless_aws_bastion.dto.launch_config import LaunchConfig
+from serverless_aws_bastion.enum.bastion_type import BastionType
+from serverless_aws_bastion.enum.selection_strategy import SelectionStrategy
+from serverless_aws_bastion.ssh.master import start_master
+from serverless_aws_bastion.ssh.ssh_config import (
+    build_host_alias,
+    render_ssh_config_block,
+    write_ssh_config_block,
+)
+from serverless_aws_bastion.utils.click_utils import log_error, log_info
+from serverless_aws_bastion.utils.selection_utils import select_bastion
+from serverless_aws_bastion.utils.state_utils import load_state_path
+
+
+def claim_or_launch_bastion(
+    cluster_name: str,
+    instance_name: str,
+    launch_config: Optional[LaunchConfig],
+    strategy: SelectionStrategy = SelectionStrategy.consistent_hash,
+) -> Tuple[InstanceInfo, bool]:
+    """
+    Reuses a running bastion with the given name or launches one if there
+    isn't one. Returns the bastion & whether it was launched. Exec bastions
+    don't run sshd so are never used.
+    """
+    instances = [
+        i
+        for i in load_running_instance_info(cluster_name, instance_name)
+        if BastionType[i.bastion_type] != BastionType.exec
+    ]
+    if instances:
+        return select_bastion(instances, strategy), False
+
+    if not launch_config:
+        log_error(
+            f"No running ssm or original bastions named {instance_name}, pass "
+            "the launch options to start one",
+        )
+        raise click.Abort()
+
+    if launch_config.bastion_type == BastionType.exec:
+        log_error(
+            "Exec bastions don't run sshd so aren't supported here, launch an "
+            "ssm or original bastion instead",
+        )
+        raise click.Abort()
+
+    instances = launch_bastion(launch_config, instance_name)
+    if not instances:
+        log_error(f"No bastion was launched for {instance_name}")
+        raise click.Abort()
+
+    # Nothing else will stop the bastion if it never becomes usable
+    instance = instances[0]
+    try:
+        if (
+            BastionType[instance.bastion_type] == BastionType.ssm
+            and not instance.ssm_instance_id
+        ):
+            ssm_instance_ids = wait_for_instance_registration([instance.bastion_id])
+            instance = attr.evolve(
+                instance,
+                ssm_instance_id=list(ssm_instance_ids.values())[0],
+            )
+    except BaseException:
+        task_info = describe_task(cluster_name, [instance.task_arn])
+        discard_tasks(cluster_name, task_info["tasks"] if task_info else [])
+        raise
+
+    return instance, True
+
+
+def stop_bastion_in_background(cluster_name: str, bastion_id: str) -> None:
+    """
+    Hands stopping the bastion off to a detached process so the caller gets
+    its exit code as soon as the command finishes
+    """
+    args = [
+        sys.executable,
+        "-m",
+        "serverless_aws_bastion",
+        "stop-bastion-instances",
+        "--cluster-name",
+        cluster_name,
+        "--bastion-id",
+        bastion_id,
+        "--log-level",
+        "error",
+    ]
+    region = click.get_current_context().params.get("region")
+    if region:
+        args += ["--region", region]
+
+    subprocess.Popen(
+        args,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def run_through_bastion(
+    instance: InstanceInfo,
+    command: List[str],
+    forwards: List[ForwardInfo],
+    identity_file: Optional[str] = None,
+    connect_timeout: int = TASK_BOOT_TIMEOUT,
+) -> int:
+    """
+    Runs a command through a bastion. With forwards the command runs locally
+    while the forwards are held open over one ssh connection, otherwise the
+    command runs on the bastion itself. Output streams straight through.
+    """
+    alias = build_host_alias(f"exec-{instance.bastion_id}")
+    ssh_config = load_state_path("exec", f"{instance.bastion_id}.ssh_config")
+    block = render_ssh_config_block(alias, instance, identity_file=identity_file)
+    write_ssh_config_block(alias, block, ssh_config)
+
+    base_command = [
+        "ssh",
+        "-F",
+        ssh_config,
+        "-o",
+        "BatchMode=yes",
+        "-o",
+        "StrictHostKeyChecking=accept-new",
+    ]
+    forward_args = ["-o", "ExitOnForwardFailure=yes"]
+    for f in forwards:
+        forward_args += ["-L", f"{f.local_port}:{f.remote_address}"]
+
+    log_info(f"Connecting to bastion {instance.bastion_id}...")
+    master = start_master(base_command, alias, forward_args, connect_timeout)
+
+    try:
+        if forwards:
+            env = dict(os.environ, SAB_SSH_CONFIG=ssh_config, SAB_SSH_HOST=alias)
+            return subprocess.call(command, env=env)
+
+        return subprocess.call(
+            base_command
+            + ["-o", "ControlMaster=no", alias, "--"]
+            + [shlex.quote(c) for c in command],
+        )
+    finally:
+        master.terminate()
+        master.wait()
+        os.remove(ssh_config)
@@ -0,0 +1,424 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+from click import Abort
+
+from serverless_aws_bastion.aws.ecs import load_running_instance_info
+from serverless_aws_bastion.config import (
+    FORWARD_CONNECT_TIMEOUT,
+    FORWARD_HEALTH_INTERVAL,
+    FORWARD_MAX_BACKOFF,
+)
+from serverless_aws_bastion.dto.forward_info import ForwardInfo
+from serverless_aws_bastion.dto.instance_info import InstanceInfo
+from serverless_aws_bastion.enum.selection_strategy import SelectionStrategy
+from serverless_aws_bastion.ssh.ssh_config import (
+    build_host_alias,
+    render_ssh_config_block,
+    write_ssh_config_block,
+)
+from serverless_aws_bastion.utils.click_utils import log_error, log_info
+from serverless_aws_bastion.utils.selection_utils import select_bastion
+from serverless_aws_bastion.utils.state_utils import (
+    load_state_path,
+    read_json_state,
+    write_json_state,
+)
+
+
+BUFFER_SIZE = 64 * 1024
+
+
+def load_forward_paths(name: str) -> Dict[str, str]:
+    """
+    Returns the pid, status, log & ssh config file paths for a forward daemon
+    """
+    return {
+        ext: load_state_path("forward", f"{name}.{ext}")
+        for ext in ("pid", "json", "log", "ssh_config")
+    }
+
+
+class ForwardDaemon:
+    """
+    Holds a group of local port forwards open over a single multiplexed ssh
+    connection to a named bastion. Each accepted local connection is carried
+    as an `ssh -W` channel on the shared master, so reconnecting or failing
+    over to another bastion never changes the local ports.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        cluster_name: str,
+        bastion_name: str,
+        forwards: List[ForwardInfo],
+        identity_file: Optional[str] = None,
+        strategy: SelectionStrategy = SelectionStrategy.consistent_hash,
+    ):
+        self.name = name
+        self.cluster_name = cluster_name
+        self.bastion_name = bastion_name
+        self.forwards = forwards
+        self.identity_file = identity_file
+        self.strategy = strategy
+
+        self.paths = load_forward_paths(name)
+        self.alias = build_host_alias(f"{name}-forward")
+        self.instance: Optional[InstanceInfo] = None
+        self.master: Optional[subprocess.Popen] = None
+        self.failed_bastion_ids: List[str] = []
+        self.reconnects = 0
+
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.connected = threading.Event()
+
+    def run(self) -> None:
+        """
+        Runs the daemon until it's sent SIGTERM or SIGINT
+        """
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+
+        with open(self.paths["pid"], "w") as f:
+            f.write(str(os.getpid()))
+
+        listeners = [self._listen(f) for f in self.forwards]
+        backoff = 1
+
+        try:
+            while not self.stopped.is_set():
+                if self._master_alive():
+                    backoff = 1
+                    self._write_status("connected")
+                    self.stopped.wait(FORWARD_HEALTH_INTERVAL)
+                    continue
+
+                self._disconnect()
+                self._write_status("reconnecting")
+                try:
+                    self._connect()
+                except Abort:
+                    log_error(f"Failed to connect, retrying in {backoff} seconds")
+                    self.stopped.wait(backoff)
+                    backoff = min(backoff * 2, FORWARD_MAX_BACKOFF)
+        finally:
+            self._disconnect()
+            for listener in listeners:
+                listener.close()
+            self._write_status("stopped")
+            os.remove(self.paths["pid"])
+
+    def _handle_stop(self, *args) -> None:
+        self.stopped.set()
+
+    def _select_instance(self) -> InstanceInfo:
+        """
+        Picks a running bastion with the configured name, skipping ones that
+        have recently dropped the connection while others are available
+        """
+        instances = load_running_instance_info(self.cluster_name, self.bastion_name)
+        if not instances:
+            log_error(f"No running bastions named {self.bastion_name}")
+            raise Abort()
+
+        running_ids = [i.bastion_id for i in instances]
+        self.failed_bastion_ids = [
+            b for b in self.failed_bastion_ids if b in running_ids
+        ]
+        if len(self.failed_bastion_ids) == len(instances):
+            self.failed_bastion_ids = []
+
+        return select_bastion(
+            instances,
+            self.strategy,
+            exclude_ids=self.failed_bastion_ids,
+        )
+
+    def _connect(self) -> None:
+        """
+        Starts the ssh master connection that all forwards are carried over
+        """
+        self.instance = self._select_instance()
+        block = render_ssh_config_block(
+            self.alias,
+            self.instance,
+            identity_file=self.identity_file,
+        )
+        write_ssh_config_block(self.alias, block, self.paths["ssh_config"])
+
+        log_info(f"Connecting to bastion {self.instance.bastion_id}...")
+        self.master = subprocess.Popen(
+            self._ssh_command(
+                "-N",
+                "-o",
+                "ControlMaster=yes",
+                "-o",
+                "ControlPersist=no",
+                "-o",
+                "StrictHostKeyChecking=accept-new",
+            ),
+            stdin=subprocess.DEVNULL,
+        )
+
+        deadline = time.monotonic() + FORWARD_CONNECT_TIMEOUT
+        while time.monotonic() < deadline and self.master.poll() is None:
+            if self._master_alive():
+                self.connected.set()
+                self.reconnects += 1
+                log_info(f"Connected to bastion {self.instance.bastion_id}")
+                return
+            time.sleep(0.5)
+
+        self.failed_bastion_ids.append(self.instance.bastion_id)
+        self._disconnect()
+        raise Abort()
+
+    def _disconnect(self) -> None:
+        if self.connected.is_set() and self.instance:
+            self.failed_bastion_ids.append(self.instance.bastion_id)
+
+        self.connected.clear()
+        if self.master and self.master.poll() is None:
+            self.master.terminate()
+            self.master.wait()
+        self.master = None
+
+    def _master_alive(self) -> bool:
+        if not self.master or self.master.poll() is not None:
+            return False
+
+        check = subprocess.run(
+            self._ssh_command("-O", "check"),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        return check.returncode == 0
+
+    def _ssh_command(self, *args: str) -> List[str]:
+        return ["ssh", "-F", self.paths["ssh_config"], *args, self.alias]
+
+    def _listen(self, forward: ForwardInfo) -> socket.socket:
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        listener.bind(("127.0.0.1", forward.local_port))
+        listener.listen(64)
+        listener.settimeout(1)
+
+        thread = threading.Thread(
+            target=self._accept_connections,
+            args=(listener, forward),
+            daemon=True,
+        )
+        thread.start()
+        return listener
+
+    def _accept_connections(
+        self,
+        listener: socket.socket,
+        forward: ForwardInfo,
+    ) -> None:
+        while not self.stopped.is_set():
+            try:
+                conn, _ = listener.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+
+            threading.Thread(
+                target=self._handle_connection,
+                args=(conn, forward),
+                daemon=True,
+            ).start()
+
+    def _handle_connection(self, conn: socket.socket, forward: ForwardInfo) -> None:
+        """
+        Carries a single local connection over the shared ssh master
+        """
+        if not self.connected.wait(FORWARD_CONNECT_TIMEOUT):
+            conn.close()
+            return
+
+        channel = subprocess.Popen(
+            self._ssh_command(
+                "-o",
+                "ControlMaster=no",
+                "-W",
+                forward.remote_address,
+            ),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            bufsize=0,
+        )
+        with self.lock:
+            forward.active_connections += 1
+            forward.total_connections += 1
+
+        upstream = threading.Thread(
+            target=self._pipe_to_channel,
+            args=(conn, channel, forward),
+            daemon=True,
+        )
+        upstream.start()
+
+        try:
+            while True:
+                data = channel.stdout.read(BUFFER_SIZE)  # type: ignore
+                if not data:
+                    break
+                conn.sendall(data)
+                with self.lock:
+                    forward.bytes_received += len(data)
+        except OSError:
+            pass
+        finally:
+            conn.close()
+            channel.terminate()
+            channel.wait()
+
+            error = channel.stderr.read().decode().strip()  # type: ignore
+            with self.lock:
+                forward.active_connections -= 1
+                if error:
+                    forward.last_error = error
+
+    def _pipe_to_channel(
+        self,
+        conn: socket.socket,
+        channel: subprocess.Popen,
+        forward: ForwardInfo,
+    ) -> None:
+        try:
+            while True:
+                data = conn.recv(BUFFER_SIZE)
+                if not data:
+                    break
+                channel.stdin.write(data)  # type: ignore
+                with self.lock:
+                    forward.bytes_sent += len(data)
+        except OSError:
+            pass
+        finally:
+            try:
+                channel.stdin.close()  # type: ignore
+            except OSError:
+                pass
+
+    def _write_status(self, state: str) -> None:
+        """
+        Writes the daemon & per forward health and throughput to the status file
+        """
+        previous = read_json_state(self.paths["json"], {})
+        previous_bytes = {
+            f["local_port"]: (f["bytes_sent"] + f["bytes_received"])
+            for f in previous.get("forwards", [])
+        }
+        elapsed = max(time.time() - previous.get("updated_at", 0), 1)
+
+        with self.lock:
+            for forward in self.forwards:
+                total_bytes = forward.bytes_sent + forward.bytes_received
+                transferred = total_bytes - previous_bytes.get(
+                    forward.local_port,
+                    total_bytes,
+                )
+                forward.bytes_per_second = round(max(transferred, 0) / elapsed, 2)
+                forward.healthy = state == "connected"
+
+            write_json_state(
+                self.paths["json"],
+                {
+                    "name": self.name,
+                    "pid": os.getpid(),
+                    "state": state,
+                    "bastion_id": self.instance.bastion_id if self.instance else None,
+                    "reconnects": max(self.reconnects - 1, 0),
+                    "updated_at": time.time(),
+                    "forwards": [f.as_dict for f in self.forwards],
+                },
+            )
+
+
+def start_forward_daemon(name: str, run_args: List[str]) -> int:
+    """
+    Launches `forward run` as a detached background process and returns its pid
+    """
+    if load_forward_pid(name):
+        log_error(f"Forward {name} is already running")
+        raise Abort()
+
+    paths = load_forward_paths(name)
+    with open(paths["log"], "a") as log_file:
+        process = subprocess.Popen(
+            [sys.executable, "-m", "serverless_aws_bastion", "forward", "run"]
+            + run_args,
+            stdin=subprocess.DEVNULL,
+            stdout=log_file,
+            stderr=log_file,
+            start_new_session=True,
+        )
+    return process.pid
+
+
+def load_forward_pid(name: str) -> Optional[int]:
+    """
+    Loads the pid of a running forward daemon, cleaning up stale pid files
+    """
+    pid_path = load_forward_paths(name)["pid"]
+    try:
+        with open(pid_path) as f:
+            pid = int(f.read().strip())
+        os.kill(pid, 0)
+        return pid
+    except (OSError, ValueError):
+        if os.path.exists(pid_path):
+            os.remove(pid_path)
+        return None
+
+
+def stop_forward_daemon(name: str) -> None:
+    """
+    Asks a running forward daemon to close its forwards & exit
+    """
+    pid = load_forward_pid(name)
+    if not pid:
+        log_error(f"Forward {name} isn't running")
+        raise Abort()
+
+    os.kill(pid, signal.SIGTERM)
+
+
+def load_forward_status(name: Optional[str] = None) -> List[dict]:
+    """
+    Loads the last reported status for one or all forward daemons
+    """
+    forward_dir = os.path.dirname(load_state_path("forward", "_"))
+    names = (
+        [name]
+        if name
+        else [
+            f[: -len(".json")]
+            for f in sorted(os.listdir(forward_dir))
+            if f.endswith(".json")
+        ]
+    )
+
+    statuses = []
+    for n in names:
+        status = read_json_state(load_forward_paths(n)["json"])
+        if not status:
+            continue
+        if status["state"] != "stopped" and not load_forward_pid(n):
+            status["state"] = "dead"
+        statuses.append(status)
+
+    return statuses
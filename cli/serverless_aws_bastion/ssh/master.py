@@ -0,0 +1,55 @@
+import subprocess
+import time
+from typing import List, Optional
+
+from click import Abort
+
+from serverless_aws_bastion.config import FORWARD_CONNECT_TIMEOUT
+from serverless_aws_bastion.utils.click_utils import log_error
+
+
+def check_master(base_command: List[str], alias: str) -> bool:
+    """
+    Checks if the shared master connection for a host is up
+    """
+    check = subprocess.run(
+        base_command + ["-O", "check", alias],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    return check.returncode == 0
+
+
+def start_master(
+    base_command: List[str],
+    alias: str,
+    extra_args: Optional[List[str]] = None,
+    timeout_seconds: int = FORWARD_CONNECT_TIMEOUT,
+) -> subprocess.Popen:
+    """
+    Starts a shared master connection to a host. If ssh exits before the
+    connection is up, such as while a freshly started bastion is still booting
+    sshd, it's retried until the timeout.
+    """
+    deadline = time.monotonic() + timeout_seconds
+    while time.monotonic() < deadline:
+        master = subprocess.Popen(
+            base_command
+            + ["-N", "-o", "ControlMaster=yes", "-o", "ControlPersist=no"]
+            + (extra_args or [])
+            + [alias],
+            stdin=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+        while time.monotonic() < deadline and master.poll() is None:
+            if check_master(base_command, alias):
+                return master
+            time.sleep(0.5)
+
+        if master.poll() is None:
+            master.terminate()
+        time.sleep(1)
+
+    log_error(f"Failed to open an ssh connection to {alias}")
+    raise Abort()
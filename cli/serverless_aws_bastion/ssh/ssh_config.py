@@ -0,0 +1,151 @@
+import os
+import re
+from typing import List, Optional
+
+from click import Abort
+
+from serverless_aws_bastion.config import (
+    DEFAULT_NAME,
+    SSH_CONFIG_PATH,
+    SSH_CONTROL_DIR,
+    SSH_CONTROL_PERSIST,
+    SSH_USER,
+)
+from serverless_aws_bastion.dto.instance_info import InstanceInfo
+from serverless_aws_bastion.enum.bastion_type import BastionType
+from serverless_aws_bastion.utils.aws_utils import load_aws_region_name
+from serverless_aws_bastion.utils.click_utils import log_error, log_info
+
+
+def build_host_alias(instance_name: str) -> str:
+    """
+    Builds the ssh host alias used for a named bastion
+    """
+    return f"sab-{instance_name}"
+
+
+def build_control_path() -> str:
+    """
+    Builds the ControlPath used to share one ssh connection per bastion,
+    %C hashes the host, port & user so the path stays short
+    """
+    control_dir = os.path.expanduser(SSH_CONTROL_DIR)
+    os.makedirs(control_dir, mode=0o700, exist_ok=True)
+    return os.path.join(control_dir, "%C")
+
+
+def render_ssh_config_block(
+    alias: str,
+    instance: InstanceInfo,
+    identity_file: Optional[str] = None,
+    jump_hosts: Optional[List[str]] = None,
+) -> str:
+    """
+    Renders an ssh_config block for a bastion instance. Original bastions are
+    reached over their public ip, ssm bastions are proxied through an ssm
+    session. Any jump hosts are routed through the bastion's shared connection.
+    """
+    if BastionType[instance.bastion_type] == BastionType.exec:
+        log_error(
+            f"Bastion {instance.bastion_id} is an exec bastion without sshd, "
+            "open a shell on it with `sab connect`",
+        )
+        raise Abort()
+
+    lines = [f"Host {alias}"]
+
+    if BastionType[instance.bastion_type] == BastionType.ssm:
+        if not instance.ssm_instance_id:
+            log_error(f"Bastion {instance.bastion_id} isn't registered with ssm yet")
+            raise Abort()
+
+        lines += [
+            f"    HostName {instance.ssm_instance_id}",
+            "    ProxyCommand aws ssm start-session --target %h "
+            "--document-name AWS-StartSSHSession --parameters portNumber=%p "
+            f"--region {load_aws_region_name()}",
+        ]
+    elif instance.public_ip:
+        lines.append(f"    HostName {instance.public_ip}")
+    else:
+        log_error(f"Bastion {instance.bastion_id} doesn't have a public ip")
+        raise Abort()
+
+    lines += [
+        f"    User {SSH_USER}",
+        "    ControlMaster auto",
+        f"    ControlPath {build_control_path()}",
+        f"    ControlPersist {SSH_CONTROL_PERSIST}",
+        "    ServerAliveInterval 30",
+    ]
+    if identity_file:
+        lines.append(f"    IdentityFile {identity_file}")
+
+    for jump_host in jump_hosts or []:
+        lines += ["", f"Host {jump_host}", f"    ProxyJump {alias}"]
+
+    return "\n".join(lines) + "\n"
+
+
+def render_direct_ssh_config_block(
+    alias: str,
+    host: str,
+    port: int,
+    identity_file: Optional[str] = None,
+) -> str:
+    """
+    Renders an ssh_config block for a bastion reached directly by host & port,
+    such as a local container built from this repo's Dockerfile
+    """
+    lines = [
+        f"Host {alias}",
+        f"    HostName {host}",
+        f"    Port {port}",
+        f"    User {SSH_USER}",
+        "    StrictHostKeyChecking no",
+        "    UserKnownHostsFile /dev/null",
+        "    LogLevel ERROR",
+        f"    ControlPath {build_control_path()}",
+    ]
+    if identity_file:
+        lines.append(f"    IdentityFile {identity_file}")
+
+    return "\n".join(lines) + "\n"
+
+
+def write_ssh_config_block(
+    alias: str,
+    block: str,
+    config_path: str = SSH_CONFIG_PATH,
+) -> None:
+    """
+    Writes a managed block into the user's ssh config, replacing the
+    previous block for the same alias if there is one
+    """
+    config_path = os.path.expanduser(config_path)
+    begin_marker = f"# BEGIN {DEFAULT_NAME} {alias}"
+    end_marker = f"# END {DEFAULT_NAME} {alias}"
+
+    current_config = ""
+    if os.path.exists(config_path):
+        with open(config_path) as f:
+            current_config = f.read()
+
+    managed_block = f"{begin_marker}\n{block}{end_marker}\n"
+    pattern = re.compile(
+        f"^{re.escape(begin_marker)}\n.*?^{re.escape(end_marker)}\n?",
+        re.MULTILINE | re.DOTALL,
+    )
+
+    if pattern.search(current_config):
+        new_config = pattern.sub(lambda _: managed_block, current_config)
+    else:
+        separator = "\n" if current_config and not current_config.endswith("\n") else ""
+        new_config = f"{current_config}{separator}\n{managed_block}"
+
+    os.makedirs(os.path.dirname(config_path), mode=0o700, exist_ok=True)
+    with open(config_path, "w") as f:
+        f.write(new_config)
+    os.chmod(config_path, 0o600)
+
+    log_info(f"Wrote {alias} to {config_path}")
@@ -1,5 +1,8 @@
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
 
 import boto3
 import click
@@ -7,52 +10,203 @@ from botocore.config import Config
 from click.exceptions import Abort
 from mypy_boto3_sts.client import STSClient
 
+from serverless_aws_bastion.config import (
+    AGENT_ENV_KEYS,
+    ASSUMED_ROLE_REFRESH_MARGIN,
+    CREATED_BY,
+    DEFAULT_NAME,
+    IDENTITY_CACHE_TTL,
+    MAX_REQUEST_RATE,
+    RETRY_MAX_ATTEMPTS,
+)
+from serverless_aws_bastion.enum.retry_mode import RetryMode
 from serverless_aws_bastion.utils.click_utils import log_error
+from serverless_aws_bastion.utils.rate_limit_utils import (
+    attach_rate_limiter,
+    load_rate_limiter,
+)
 
 
 CLIENT_CACHE: Dict[str, Any] = {}
+CLIENT_CACHE_LOCK = threading.Lock()
+ACCOUNT_ID_CACHE: Dict[str, Tuple[float, str]] = {}
+DEFAULT_REGION_CACHE: Dict[str, Tuple[float, Optional[str]]] = {}
+ASSUMED_ROLE_CACHE: Dict[str, Dict[str, Any]] = {}
+ASSUMED_ROLE_CACHE_LOCK = threading.Lock()
 
+T = TypeVar("T")
 
-def fetch_boto3_client(service_name: str):
+
+def fetch_boto3_client(service_name: str, assume_role: bool = True):
     """
     Takes a service name & region and returns a boto3 client for
-    the given service.
+    the given service. When the current context has a role to assume the
+    client uses that role's credentials.
     """
     region_name = load_aws_region_name()
-    cache_key = f"{region_name}-{service_name}"
+    retry_mode, max_attempts, max_request_rate = load_retry_settings()
+    # Commands in one process can ask for different retry settings
+    cache_key = (
+        f"{region_name}-{service_name}-{retry_mode.value}-{max_attempts}-"
+        f"{max_request_rate:g}"
+    )
+
+    role_arn = load_assumed_role_arn() if assume_role else None
+    credentials: Dict[str, Any] = {}
+    if role_arn:
+        assumed = load_assumed_role_credentials(role_arn)
+        credentials = {
+            "aws_access_key_id": assumed["AccessKeyId"],
+            "aws_secret_access_key": assumed["SecretAccessKey"],
+            "aws_session_token": assumed["SessionToken"],
+        }
+        # Keyed by access key so refreshed credentials get a fresh client
+        cache_key = f"{cache_key}-{assumed['AccessKeyId']}"
 
     if CLIENT_CACHE.get(cache_key):
         return CLIENT_CACHE[cache_key]
 
-    config = Config(
-        region_name=region_name,
-        signature_version="v4",
-        retries={"max_attempts": 10, "mode": "standard"},
-    )
-    client = boto3.client(service_name, config=config)  # type: ignore
+    # boto3's default session isn't thread safe when creating clients
+    with CLIENT_CACHE_LOCK:
+        if CLIENT_CACHE.get(cache_key):
+            return CLIENT_CACHE[cache_key]
 
-    CLIENT_CACHE[cache_key] = client
+        config = Config(
+            region_name=region_name,
+            signature_version="v4",
+            retries={"max_attempts": max_attempts, "mode": retry_mode.value},
+        )
+        client = boto3.client(
+            service_name,  # type: ignore
+            config=config,
+            **credentials,
+        )
+        # API limits are per account, so each assumed account gets its own bucket
+        limiter_scope = (
+            f"{region_name}-{role_arn.split(':')[4]}" if role_arn else region_name
+        )
+        attach_rate_limiter(
+            client,
+            load_rate_limiter(service_name, limiter_scope, max_request_rate),
+        )
+
+        CLIENT_CACHE[cache_key] = client
 
     return client
 
 
+def load_retry_settings() -> Tuple[RetryMode, int, float]:
+    """
+    Loads the retry mode, max attempts & max request rate from the current
+    context, falling back to the defaults
+    """
+    ctx = click.get_current_context(silent=True)
+    params = ctx.params if ctx else {}
+
+    try:
+        retry_mode = RetryMode[params.get("retry_mode") or RetryMode.standard.value]
+    except KeyError:
+        retry_mode = RetryMode.standard
+
+    return (
+        retry_mode,
+        params.get("max_attempts") or RETRY_MAX_ATTEMPTS,
+        params.get("max_request_rate") or MAX_REQUEST_RATE,
+    )
+
+
 def load_aws_region_name() -> str:
     """
     Uses boto3 to load the current region set in the aws cli config
     """
-    session = boto3.session.Session()
-    region_name = (
-        click.get_current_context().params.get("region") or session.region_name
+    region_name = click.get_current_context().params.get("region")
+    if region_name:
+        return region_name
+
+    return load_cached_identity(  # type: ignore
+        DEFAULT_REGION_CACHE,
+        load_environment_scope(),
+        lambda: boto3.session.Session().region_name,
     )
-    return region_name
 
 
 def load_aws_account_id() -> str:
     """
     Uses boto3 to load the current account id
     """
-    client: STSClient = fetch_boto3_client("sts")
-    return client.get_caller_identity()["Account"]
+
+    def load() -> str:
+        client: STSClient = fetch_boto3_client("sts")
+        return client.get_caller_identity()["Account"]
+
+    cache_key = f"{load_environment_scope()}\n{load_assumed_role_arn() or ''}"
+    return load_cached_identity(ACCOUNT_ID_CACHE, cache_key, load)
+
+
+def load_environment_scope() -> str:
+    """
+    Returns a key for the aws settings in the environment, the region &
+    account they resolve to are looked up again whenever they change
+    """
+    return "\n".join(f"{k}={os.environ.get(k, '')}" for k in AGENT_ENV_KEYS)
+
+
+def load_cached_identity(
+    cache: Dict[str, Tuple[float, T]],
+    cache_key: str,
+    load: Callable[[], T],
+) -> T:
+    """
+    Caches a lookup for the identity ttl, profiles & credential files can be
+    edited without the environment changing
+    """
+    cached = cache.get(cache_key)
+    if cached and time.monotonic() - cached[0] < IDENTITY_CACHE_TTL:
+        return cached[1]
+
+    value = load()
+    cache[cache_key] = (time.monotonic(), value)
+    return value
+
+
+def load_assumed_role_arn() -> Optional[str]:
+    ctx = click.get_current_context(silent=True)
+    return ctx.params.get("role_arn") if ctx else None
+
+
+def load_client_scope() -> str:
+    """
+    Returns a key for the region & role that clients in the current context
+    are using, so cached lookups from different accounts never mix
+    """
+    return f"{load_aws_region_name()}-{load_assumed_role_arn() or ''}"
+
+
+def build_role_arn(account_id: str, role_name: str) -> str:
+    return f"arn:aws:iam::{account_id}:role/{role_name}"
+
+
+def load_assumed_role_credentials(role_arn: str) -> Dict[str, Any]:
+    """
+    Assumes a role with the caller's own credentials & caches the session
+    credentials until shortly before they expire
+    """
+    with ASSUMED_ROLE_CACHE_LOCK:
+        cached = ASSUMED_ROLE_CACHE.get(role_arn)
+    if cached:
+        remaining = cached["Expiration"] - datetime.now(timezone.utc)
+        if remaining.total_seconds() > ASSUMED_ROLE_REFRESH_MARGIN:
+            return cached
+
+    client: STSClient = fetch_boto3_client("sts", assume_role=False)
+    credentials = client.assume_role(
+        RoleArn=role_arn,
+        RoleSessionName=DEFAULT_NAME,
+    )["Credentials"]
+
+    with ASSUMED_ROLE_CACHE_LOCK:
+        ASSUMED_ROLE_CACHE[role_arn] = dict(credentials)
+    return dict(credentials)
 
 
 def capitalize_tag_kv(service: str) -> bool:
@@ -65,7 +219,7 @@ def capitalize_tag_kv(service: str) -> bool:
 
 def build_tags(service: str, extra_tags: dict = None) -> List[Any]:
     tags = {
-        "CreatedBy": "serverless-aws-bastion:cli",
+        "CreatedBy": CREATED_BY,
         "CreatedOn": str(datetime.utcnow()),
     }
     if extra_tags:
@@ -81,6 +235,22 @@ def build_tags(service: str, extra_tags: dict = None) -> List[Any]:
     ]
 
 
+def find_tag_value(
+    service: str,
+    tags: List[Any],
+    tag_key: str,
+) -> Optional[str]:
+    """
+    Given a list of tags in key value format, returns a matching
+    tag value or None if the tag isn't present.
+    """
+    capitalize = capitalize_tag_kv(service)
+    for t in tags:
+        if t[f"{'K' if capitalize else 'k'}ey"] == tag_key:
+            return t[f"{'V' if capitalize else 'v'}alue"]
+    return None
+
+
 def get_tag_value(
     service: str,
     tags: List[Any],
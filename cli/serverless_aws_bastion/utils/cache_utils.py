@@ -0,0 +1,55 @@
+import threading
+import time
+from functools import wraps
+from typing import Any, Callable, Dict, Tuple
+
+
+INVENTORY_CACHE: Dict[Tuple[str, ...], Tuple[float, Any]] = {}
+INVENTORY_CACHE_LOCK = threading.Lock()
+INVENTORY_CACHE_TTL = {"seconds": 0}
+
+
+def enable_inventory_cache(ttl_seconds: int) -> None:
+    """
+    Turns on inventory caching for long lived processes such as the agent,
+    one off cli calls always read live state
+    """
+    INVENTORY_CACHE_TTL["seconds"] = ttl_seconds
+
+
+def clear_inventory_cache() -> None:
+    with INVENTORY_CACHE_LOCK:
+        INVENTORY_CACHE.clear()
+
+
+def cached_inventory(key_func: Callable[[], Any]) -> Callable:
+    """
+    Caches the result of an inventory lookup for the configured ttl. The key
+    function scopes entries, such as by region, on top of the call arguments.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            ttl = INVENTORY_CACHE_TTL["seconds"]
+            if not ttl:
+                return func(*args, **kwargs)
+
+            key = (
+                func.__name__,
+                str(key_func()),
+                repr((args, sorted(kwargs.items()))),
+            )
+            with INVENTORY_CACHE_LOCK:
+                cached = INVENTORY_CACHE.get(key)
+            if cached and time.monotonic() - cached[0] < ttl:
+                return cached[1]
+
+            result = func(*args, **kwargs)
+            with INVENTORY_CACHE_LOCK:
+                INVENTORY_CACHE[key] = (time.monotonic(), result)
+            return result
+
+        return wrapper
+
+    return decorator
@@ -7,7 +7,8 @@ def _get_log_level() -> LogLevel:
     """
     Fetches and returns the log level from the current context
     """
-    log_level = get_current_context().params.get("log_level")
+    ctx = get_current_context(silent=True)
+    log_level = ctx.params.get("log_level") if ctx else None
 
     if not log_level:
         return LogLevel.info
@@ -26,6 +27,14 @@ def log_info(message: str) -> None:
         secho(message, fg="green")
 
 
+def log_debug(message: str) -> None:
+    """
+    Formats and prints out a debug level message to the console
+    """
+    if _get_log_level() >= LogLevel.debug:
+        secho(message, fg="blue")
+
+
 def log_error(message: str) -> None:
     """
     Formats and prints out an error level message to the console
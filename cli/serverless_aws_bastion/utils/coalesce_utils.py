@@ -0,0 +1,72 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set
+
+from serverless_aws_bastion.config import COALESCE_TICK
+
+
+class Batch:
+    def __init__(self) -> None:
+        self.items: Set[str] = set()
+        self.done = threading.Event()
+        self.results: Dict[str, Any] = {}
+        self.error: Optional[BaseException] = None
+
+
+class Coalescer:
+    """
+    Merges concurrent lookups that share a key, such as tasks in the same
+    cluster & region, into one batched fetch of every item asked for. Only
+    one fetch per key is in flight at a time & fetches start at most once per
+    tick, callers that arrive meanwhile all join the next fetch so api volume
+    stays flat however many threads are polling.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[Any, List[str]], Dict[str, Any]],
+        tick: float = COALESCE_TICK,
+    ):
+        self.fetch = fetch
+        self.tick = tick
+        self.lock = threading.Lock()
+        self.queued: Dict[Hashable, Batch] = {}
+        self.flight_locks: Dict[Hashable, threading.Lock] = {}
+        self.last_started: Dict[Hashable, float] = {}
+
+    def load(self, key: Hashable, items: List[str]) -> Dict[str, Any]:
+        """
+        Returns the fetched result for each item, items the fetch didn't
+        return a result for are left out
+        """
+        with self.lock:
+            batch = self.queued.get(key)
+            is_leader = batch is None
+            if batch is None:
+                batch = self.queued[key] = Batch()
+            batch.items.update(items)
+            flight_lock = self.flight_locks.setdefault(key, threading.Lock())
+
+        if is_leader:
+            with flight_lock:
+                wait = self.last_started.get(key, 0) + self.tick - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+
+                # Callers after this point start the next batch
+                with self.lock:
+                    del self.queued[key]
+                    self.last_started[key] = time.monotonic()
+
+                try:
+                    batch.results = self.fetch(key, sorted(batch.items))
+                except BaseException as e:
+                    batch.error = e
+                finally:
+                    batch.done.set()
+        else:
+            batch.done.wait()
+
+        if batch.error:
+            raise batch.error
+        return {i: batch.results[i] for i in items if i in batch.results}
@@ -0,0 +1,150 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+from uuid import uuid4
+
+from serverless_aws_bastion.utils.aws_utils import (
+    load_assumed_role_arn,
+    load_aws_region_name,
+)
+from serverless_aws_bastion.utils.click_utils import log_error
+from serverless_aws_bastion.utils.state_utils import (
+    hold_state_lock,
+    load_state_path,
+    read_json_state,
+    write_json_state,
+)
+
+
+CURRENT_OPERATION = threading.local()
+
+
+def load_journal_path(operation_id: str) -> str:
+    return load_state_path("journal", f"{operation_id}.json")
+
+
+def load_current_operation() -> Optional[str]:
+    return getattr(CURRENT_OPERATION, "operation_id", None)
+
+
+@contextmanager
+def journal_operation(kind: str, **details: Any) -> Iterator[str]:
+    """
+    Journals an operation before it creates anything so an interrupted run
+    can be resumed or rolled back later. The entry is removed once the
+    operation finishes, operations started inside another one on the same
+    thread are journaled as part of it.
+    """
+    current = load_current_operation()
+    if current:
+        yield current
+        return
+
+    operation_id = str(uuid4())
+    path = load_journal_path(operation_id)
+    write_json_state(
+        path,
+        dict(
+            details,
+            id=operation_id,
+            kind=kind,
+            pid=os.getpid(),
+            started_at=time.time(),
+            region=load_aws_region_name(),
+            role_arn=load_assumed_role_arn(),
+            resources={},
+        ),
+    )
+
+    CURRENT_OPERATION.operation_id = operation_id
+    try:
+        yield operation_id
+    except BaseException:
+        if update_operation(operation_id, interrupted=True).get("resources"):
+            log_error(
+                f"Operation {operation_id} didn't finish, run `sab resume` or "
+                "`sab rollback` to pick up what it created",
+            )
+        else:
+            remove_operation(operation_id)
+        raise
+    else:
+        remove_operation(operation_id)
+    finally:
+        CURRENT_OPERATION.operation_id = None
+
+
+def record_operation(operation_id: Optional[str], **resources: List[str]) -> None:
+    """
+    Adds the ids of resources an operation created to its journal entry,
+    writes are locked since raced launches record from several threads
+    """
+    if not operation_id:
+        return
+
+    path = load_journal_path(operation_id)
+    with hold_state_lock("journal.lock", wait=True):
+        operation = read_json_state(path)
+        if operation is None:
+            return
+
+        for key, ids in resources.items():
+            recorded = operation["resources"].setdefault(key, [])
+            for i in ids:
+                if i and i not in recorded:
+                    recorded.append(i)
+        write_json_state(path, operation)
+
+
+def update_operation(operation_id: str, **fields: Any) -> Dict[str, Any]:
+    path = load_journal_path(operation_id)
+    with hold_state_lock("journal.lock", wait=True):
+        operation = read_json_state(path, {})
+        if operation:
+            operation.update(fields)
+            write_json_state(path, operation)
+    return operation
+
+
+def remove_operation(operation_id: str) -> None:
+    try:
+        os.remove(load_journal_path(operation_id))
+    except FileNotFoundError:
+        pass
+
+
+def is_operation_running(operation: Dict[str, Any]) -> bool:
+    """
+    Operations are still running if they weren't interrupted & the process
+    that started them is alive, long lived processes such as the agent mark
+    the operations that fail in them
+    """
+    if operation.get("interrupted"):
+        return False
+
+    try:
+        os.kill(operation["pid"], 0)
+    except OSError:
+        return False
+    return True
+
+
+def load_interrupted_operations(
+    operation_id: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Loads journaled operations whose process is gone, oldest first
+    """
+    journal_dir = os.path.dirname(load_journal_path("_"))
+    operations = [
+        read_json_state(os.path.join(journal_dir, name))
+        for name in os.listdir(journal_dir)
+        if name.endswith(".json")
+        and (not operation_id or name == f"{operation_id}.json")
+    ]
+    return sorted(
+        [o for o in operations if o and not is_operation_running(o)],
+        key=lambda o: o["started_at"],
+    )
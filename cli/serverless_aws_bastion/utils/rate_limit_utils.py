@@ -0,0 +1,136 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from serverless_aws_bastion.config import MAX_REQUEST_RATE, MIN_REQUEST_RATE
+from serverless_aws_bastion.utils.click_utils import log_debug, log_info
+
+
+THROTTLE_ERROR_CODES = {
+    "Throttling",
+    "ThrottlingException",
+    "ThrottledException",
+    "RequestThrottledException",
+    "TooManyRequestsException",
+    "RequestLimitExceeded",
+    "RequestThrottled",
+    "SlowDown",
+}
+
+RATE_LIMITERS: Dict[str, "TokenBucket"] = {}
+RATE_LIMITERS_LOCK = threading.Lock()
+
+
+class TokenBucket:
+    """
+    A thread safe token bucket shared by every client for a service & region.
+    The refill rate is halved whenever AWS throttles a request and creeps back
+    up towards the max rate as requests succeed, so concurrent workers settle
+    on the highest rate the api will sustain.
+    """
+
+    def __init__(self, max_rate: float):
+        self.max_rate = max_rate
+        self.rate = max_rate
+        self.tokens = max(max_rate, 1.0)
+        self.updated_at = time.monotonic()
+
+        self.requests = 0
+        self.throttles = 0
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """
+        Blocks until a token is available & takes it
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                capacity = max(self.rate, 1.0)
+                self.tokens = min(
+                    self.tokens + (now - self.updated_at) * self.rate,
+                    capacity,
+                )
+                self.updated_at = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    self.requests += 1
+                    return
+
+                wait = (1 - self.tokens) / self.rate
+
+            time.sleep(wait)
+
+    def record_throttle(self) -> None:
+        with self.lock:
+            self.throttles += 1
+            self.rate = max(self.rate / 2, MIN_REQUEST_RATE)
+
+    def record_success(self) -> None:
+        with self.lock:
+            self.rate = min(self.rate + self.max_rate / 100, self.max_rate)
+
+
+def load_rate_limiter(
+    service_name: str,
+    region_name: str,
+    max_rate: float = MAX_REQUEST_RATE,
+) -> TokenBucket:
+    """
+    Returns the shared token bucket for a service, region & max rate,
+    creating it if this is the first client for them
+    """
+    cache_key = f"{region_name}-{service_name}-{max_rate:g}"
+    with RATE_LIMITERS_LOCK:
+        if cache_key not in RATE_LIMITERS:
+            RATE_LIMITERS[cache_key] = TokenBucket(max_rate)
+        return RATE_LIMITERS[cache_key]
+
+
+def is_throttle_response(response: Optional[Any]) -> bool:
+    if not response:
+        return False
+
+    _, parsed = response
+    error_code = parsed.get("Error", {}).get("Code")
+    status_code = parsed.get("ResponseMetadata", {}).get("HTTPStatusCode")
+    return error_code in THROTTLE_ERROR_CODES or status_code == 429
+
+
+def attach_rate_limiter(client: Any, bucket: TokenBucket) -> None:
+    """
+    Hooks a token bucket into a boto3 client. Every http attempt, including
+    retries, waits on the bucket and every response adjusts its rate.
+    """
+
+    def before_send(**kwargs) -> None:
+        bucket.acquire()
+
+    def needs_retry(response: Optional[Any] = None, **kwargs) -> None:
+        if is_throttle_response(response):
+            bucket.record_throttle()
+        elif response:
+            bucket.record_success()
+
+    client.meta.events.register("before-send", before_send)
+    client.meta.events.register("needs-retry", needs_retry)
+
+
+def log_rate_limiter_stats() -> None:
+    """
+    Prints request & throttle counts for each service & region, throttles are
+    always surfaced while the full breakdown is only shown in debug mode
+    """
+    with RATE_LIMITERS_LOCK:
+        limiters = dict(RATE_LIMITERS)
+
+    for cache_key, bucket in sorted(limiters.items()):
+        message = (
+            f"{cache_key}: {bucket.requests} requests, {bucket.throttles} "
+            f"throttled, settled at {bucket.rate:.1f} requests/second"
+        )
+        if bucket.throttles:
+            log_info(message)
+        else:
+            log_debug(message)
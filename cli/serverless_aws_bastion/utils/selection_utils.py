@@ -0,0 +1,112 @@
+import getpass
+import hashlib
+import time
+from typing import Dict, List, Optional
+
+from click import Abort
+
+from serverless_aws_bastion.aws.ssm import load_active_session_counts
+from serverless_aws_bastion.dto.instance_info import InstanceInfo
+from serverless_aws_bastion.enum.selection_strategy import SelectionStrategy
+from serverless_aws_bastion.utils.click_utils import log_error, log_info
+from serverless_aws_bastion.utils.state_utils import (
+    load_state_path,
+    read_json_state,
+    write_json_state,
+)
+
+
+def load_user_key() -> str:
+    """
+    Returns the key used to consistently assign the current user to a bastion
+    """
+    return getpass.getuser()
+
+
+def hash_score(user_key: str, bastion_id: str) -> int:
+    """
+    Scores a user & bastion pair for rendezvous hashing, each user picks
+    the bastion with the highest score
+    """
+    digest = hashlib.sha256(f"{user_key}/{bastion_id}".encode()).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+def select_by_hash(instances: List[InstanceInfo], user_key: str) -> InstanceInfo:
+    """
+    Rendezvous hashing only reassigns the users of a bastion that's removed,
+    and only moves users onto a bastion that's added
+    """
+    return max(instances, key=lambda i: hash_score(user_key, i.bastion_id))
+
+
+def select_least_recent(instances: List[InstanceInfo]) -> InstanceInfo:
+    """
+    Picks the bastion that this machine chose the longest time ago
+    """
+    state_path = load_state_path("selection.json")
+    last_chosen: Dict[str, float] = read_json_state(state_path, {})
+
+    instance = min(instances, key=lambda i: last_chosen.get(i.bastion_id, 0))
+
+    running_ids = [i.bastion_id for i in instances]
+    last_chosen = {k: v for k, v in last_chosen.items() if k in running_ids}
+    last_chosen[instance.bastion_id] = time.time()
+    write_json_state(state_path, last_chosen)
+
+    return instance
+
+
+def select_least_sessions(
+    instances: List[InstanceInfo],
+    user_key: str,
+) -> InstanceInfo:
+    """
+    Picks the bastion with the fewest active sessions, ties are broken with
+    rendezvous hashing so users spread evenly across idle bastions. Bastions
+    that haven't reported any sessions fall back to their active ssm sessions.
+    """
+    session_counts = load_active_session_counts(
+        [i.ssm_instance_id for i in instances if i.ssm_instance_id],
+    )
+    return min(
+        instances,
+        key=lambda i: (
+            i.active_sessions or session_counts.get(i.ssm_instance_id or "", 0),
+            -hash_score(user_key, i.bastion_id),
+        ),
+    )
+
+
+def select_bastion(
+    instances: List[InstanceInfo],
+    strategy: SelectionStrategy = SelectionStrategy.consistent_hash,
+    user_key: Optional[str] = None,
+    exclude_ids: Optional[List[str]] = None,
+) -> InstanceInfo:
+    """
+    Spreads users across multiple running bastions that share a name. Any
+    excluded bastions are only used when there's nothing else to pick.
+    """
+    if not instances:
+        log_error("Unable to find a running bastion")
+        raise Abort()
+
+    candidates = [i for i in instances if i.bastion_id not in (exclude_ids or [])]
+    candidates = candidates or instances
+    user_key = user_key or load_user_key()
+
+    if strategy == SelectionStrategy.least_recent:
+        instance = select_least_recent(candidates)
+    elif strategy == SelectionStrategy.least_sessions:
+        instance = select_least_sessions(candidates, user_key)
+    else:
+        instance = select_by_hash(candidates, user_key)
+
+    if len(instances) > 1:
+        log_info(
+            f"Selected bastion {instance.bastion_id} of {len(instances)} "
+            f"using {strategy.value}",
+        )
+
+    return instance
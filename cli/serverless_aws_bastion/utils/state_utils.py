@@ -0,0 +1,59 @@
+import fcntl
+import json
+import os
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+from serverless_aws_bastion.config import STATE_DIR
+
+
+def load_state_path(*parts: str) -> str:
+    """
+    Builds a path inside of the local state directory, creating any
+    missing parent directories
+    """
+    path = os.path.join(os.path.expanduser(STATE_DIR), *parts)
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    return path
+
+
+def read_json_state(path: str, default: Any = None) -> Any:
+    """
+    Reads a json state file, returning the default if the file is
+    missing or only partially written
+    """
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def write_json_state(path: str, data: Any) -> None:
+    """
+    Atomically writes a json state file so readers never see a
+    partially written file
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=4)
+    os.replace(tmp_path, path)
+
+
+@contextmanager
+def hold_state_lock(name: str, wait: bool = False) -> Iterator[bool]:
+    """
+    Takes an exclusive lock on a file in the state directory, yields whether
+    the lock was acquired. Without wait it gives up if the lock is held.
+    """
+    with open(load_state_path(name), "w") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX if wait else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
@@ -0,0 +1,65 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, TypeVar
+
+from click import Context, get_current_context
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+MAX_WORKERS = 8
+
+
+def run_in_parallel(
+    func: Callable[[T], R],
+    items: Iterable[T],
+    max_workers: int = MAX_WORKERS,
+) -> List[R]:
+    """
+    Runs a function over a list of items in a thread pool, returning the
+    results in order. The current click context is pushed into each worker
+    so logging & region lookups behave the same as on the main thread.
+    """
+    ctx = get_current_context(silent=True)
+
+    def run(item: T) -> R:
+        if ctx is None:
+            return func(item)
+        with ctx.scope(cleanup=False):
+            return func(item)
+
+    items = list(items)
+    if len(items) <= 1:
+        return [func(i) for i in items]
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        return list(executor.map(run, items))
+
+
+def run_in_scopes(
+    func: Callable[[], R],
+    scopes: List[Dict[str, Any]],
+    max_workers: int = MAX_WORKERS,
+) -> List[R]:
+    """
+    Runs a function once per scope concurrently, returning the results in
+    order. Each run gets its own context with the scope's params, such as a
+    region or role, swapped in so the aws helpers pick the matching clients.
+    """
+    ctx = get_current_context()
+
+    def run(scope: Dict[str, Any]) -> R:
+        scope_ctx = Context(ctx.command, parent=ctx, info_name=ctx.info_name)
+        scope_ctx.params = dict(ctx.params, **scope)
+        with scope_ctx.scope(cleanup=False):
+            return func()
+
+    return run_in_parallel(run, scopes, max_workers)
+
+
+def run_in_regions(
+    func: Callable[[], R],
+    regions: List[Optional[str]],
+    max_workers: int = MAX_WORKERS,
+) -> List[R]:
+    return run_in_scopes(func, [{"region": r} for r in regions], max_workers)
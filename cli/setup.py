@@ -24,16 +24,17 @@ setup(
     include_package_data=True,
     entry_points={
         "console_scripts": [
-            "sab = serverless_aws_bastion.cli:main",
-            "serverless-aws-bastion =  serverless_aws_bastion.cli:main",
+            "sab = serverless_aws_bastion.agent.client:main",
+            "serverless-aws-bastion =  serverless_aws_bastion.agent.client:main",
         ],
     },
     install_requires=[
         "attrs==20.3.0",
         "boto3==1.16.28",
-        "boto3-stubs[ec2,ecs,iam,ssm,sts]==1.16.28.0",
+        "boto3-stubs[ec2,ecs,iam,logs,ssm,sts]==1.16.28.0",
         "click==8.0.0a1",
         "colorama==0.4.4",
+        "PyYAML==5.3.1",
     ],
     extras_require={
         "test": [
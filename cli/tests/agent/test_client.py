@@ -0,0 +1,27 @@
+import os
+
+from serverless_aws_bastion.agent.client import resolve_path_args
+
+
+def test_resolve_path_args_makes_key_files_absolute(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    keys = os.path.join(str(tmp_path), "id.pub")
+
+    assert resolve_path_args(
+        ["start-bastion", "--authorized-keys", "file://./id.pub"],
+    ) == ["start-bastion", "--authorized-keys", f"file://{keys}"]
+    assert resolve_path_args(["start-bastion", "--authorized-keys=file://id.pub"]) == [
+        "start-bastion",
+        f"--authorized-keys=file://{keys}",
+    ]
+
+
+def test_resolve_path_args_leaves_other_values_alone():
+    argv = [
+        "start-bastion",
+        "--authorized-keys",
+        "ssm:/team/keys",
+        "--bastion-name",
+        "file://web",
+    ]
+    assert resolve_path_args(argv) == argv
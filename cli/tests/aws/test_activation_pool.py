@@ -0,0 +1,37 @@
+import click
+import pytest
+
+from serverless_aws_bastion.aws import activation_pool
+
+
+@pytest.fixture
+def ctx():
+    ctx = click.Context(click.Command("test"))
+    ctx.params = {"region": "us-east-1"}
+    with ctx.scope(cleanup=False):
+        yield ctx
+
+
+def test_pools_are_kept_apart_per_credentials(ctx, monkeypatch):
+    monkeypatch.setenv("AWS_PROFILE", "dev")
+    dev = activation_pool.load_pool_scope()
+    assert activation_pool.load_pool_scope() == dev
+    assert dev.startswith("us-east-1-")
+
+    monkeypatch.setenv("AWS_PROFILE", "prod")
+    prod = activation_pool.load_pool_scope()
+    assert prod != dev
+
+    ctx.params["role_arn"] = "arn:aws:iam::222:role/bastions"
+    assert activation_pool.load_pool_scope() not in (dev, prod)
+
+
+def test_pool_scope_never_looks_up_the_account(ctx, monkeypatch):
+    def fetch_boto3_client(service_name):
+        raise AssertionError(f"called {service_name}")
+
+    monkeypatch.setattr(
+        "serverless_aws_bastion.utils.aws_utils.fetch_boto3_client",
+        fetch_boto3_client,
+    )
+    activation_pool.load_pool_scope()
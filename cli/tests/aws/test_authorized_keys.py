@@ -0,0 +1,19 @@
+from serverless_aws_bastion.aws.authorized_keys import (
+    build_keys_parameter_name,
+)
+from serverless_aws_bastion.config import AUTHORIZED_KEYS_PARAMETER_PREFIX
+
+
+def test_build_keys_parameter_name_differs_by_directory():
+    team = build_keys_parameter_name("/teams/web/authorized_keys")
+    other_team = build_keys_parameter_name("/teams/data/authorized_keys")
+
+    assert team != other_team
+    assert team.startswith(f"{AUTHORIZED_KEYS_PARAMETER_PREFIX}/authorized_keys-")
+
+
+def test_build_keys_parameter_name_is_stable_for_relative_paths(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert build_keys_parameter_name("keys.pub") == build_keys_parameter_name(
+        str(tmp_path / "keys.pub"),
+    )
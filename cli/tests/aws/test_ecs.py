@@ -1,2 +1,51 @@
+import pytest
+from click import Abort
+
+from serverless_aws_bastion.aws import ecs
+from serverless_aws_bastion.enum.cluster_status import ClusterStatus
+from serverless_aws_bastion.utils.coalesce_utils import Coalescer
+
+
 def test_fake():
     assert 1 == 1
+
+
+class FakeECSClient:
+    def describe_clusters(self, clusters):
+        return {
+            "clusters": [
+                {
+                    "clusterName": "bastions",
+                    "clusterArn": "arn:aws:ecs:us-east-1:123:cluster/bastions",
+                    "status": "ACTIVE",
+                },
+            ],
+            "failures": [],
+        }
+
+
+def test_describe_fargate_cluster_accepts_names_and_arns(monkeypatch):
+    monkeypatch.setattr(ecs, "fetch_boto3_client", lambda service: FakeECSClient())
+    monkeypatch.setattr(ecs, "load_client_scope", lambda: "us-east-1-")
+    monkeypatch.setattr(
+        ecs,
+        "CLUSTER_DESCRIPTIONS",
+        Coalescer(ecs.fetch_cluster_descriptions, tick=0),
+    )
+
+    by_name = ecs.describe_fargate_cluster("bastions")
+    by_arn = ecs.describe_fargate_cluster("arn:aws:ecs:us-east-1:123:cluster/bastions")
+    assert by_name["clusters"] == by_arn["clusters"]
+    assert len(by_arn["clusters"]) == 1
+
+
+def test_wait_for_cluster_status_fails_without_clusters(monkeypatch):
+    monkeypatch.setattr(
+        ecs,
+        "describe_fargate_cluster",
+        lambda cluster_name: {"clusters": [], "failures": []},
+    )
+    monkeypatch.setattr(ecs, "sleep", lambda seconds: None)
+
+    with pytest.raises(Abort):
+        ecs.wait_for_fargate_cluster_status("bastions", ClusterStatus.ACTIVE, 4)
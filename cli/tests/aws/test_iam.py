@@ -0,0 +1,76 @@
+import json
+from datetime import datetime
+
+from serverless_aws_bastion.aws import iam
+
+
+POLICY_ARN = "arn:aws:iam::123:policy/serverless-aws-bastion-deregister-ssm"
+
+
+class FakeIAMClient:
+    def __init__(self, document, version_count=1):
+        self.document = document
+        self.versions = [
+            {
+                "VersionId": f"v{i + 1}",
+                "IsDefaultVersion": i == version_count - 1,
+                "CreateDate": datetime(2020, 1, i + 1),
+            }
+            for i in range(version_count)
+        ]
+        self.deleted = []
+        self.created = []
+
+    def get_policy(self, PolicyArn):
+        return {"Policy": {"DefaultVersionId": self.versions[-1]["VersionId"]}}
+
+    def get_policy_version(self, PolicyArn, VersionId):
+        return {"PolicyVersion": {"Document": self.document}}
+
+    def list_policy_versions(self, PolicyArn):
+        return {"Versions": self.versions}
+
+    def delete_policy_version(self, PolicyArn, VersionId):
+        self.deleted.append(VersionId)
+
+    def create_policy_version(self, PolicyArn, PolicyDocument, SetAsDefault):
+        self.created.append(json.loads(PolicyDocument))
+
+
+def test_s3_reads_are_scoped_to_the_keys_locations():
+    document = iam.build_deregister_ssm_policy(
+        "123",
+        ["s3://keys-bucket", "s3://shared/team/keys"],
+    )
+    s3_statements = [s for s in document["Statement"] if "s3:GetObject" in s["Action"]]
+    assert s3_statements[0]["Resource"] == [
+        "arn:aws:s3:::keys-bucket/*",
+        "arn:aws:s3:::shared/team/keys*",
+    ]
+    assert all(s["Resource"] != "*" for s in s3_statements)
+
+
+def test_s3_reads_are_only_granted_when_asked_for():
+    document = iam.build_deregister_ssm_policy("123")
+    actions = [a for s in document["Statement"] for a in s["Action"]]
+    assert "s3:GetObject" not in actions
+    assert "ecs:TagResource" in actions
+
+
+def test_changed_policies_get_a_new_default_version(monkeypatch):
+    client = FakeIAMClient({"Version": "2012-10-17", "Statement": []}, 5)
+    monkeypatch.setattr(iam, "fetch_boto3_client", lambda service: client)
+
+    document = iam.build_deregister_ssm_policy("123")
+    iam.update_policy_document(POLICY_ARN, document)
+    assert client.created == [document]
+    assert client.deleted == ["v1"]
+
+
+def test_unchanged_policies_are_left_alone(monkeypatch):
+    document = iam.build_deregister_ssm_policy("123")
+    client = FakeIAMClient(document)
+    monkeypatch.setattr(iam, "fetch_boto3_client", lambda service: client)
+
+    iam.update_policy_document(POLICY_ARN, document)
+    assert client.created == []
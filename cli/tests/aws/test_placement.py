@@ -0,0 +1,121 @@
+import time
+
+import pytest
+from click import Abort
+
+from serverless_aws_bastion.aws import placement
+from serverless_aws_bastion.config import PLACEMENT_FAILURE_TTL
+
+
+@pytest.fixture
+def subnet_zones(monkeypatch):
+    zones = {"subnet-a": "use1-az1", "subnet-b": "use1-az2", "subnet-c": "use1-az3"}
+    monkeypatch.setattr(placement, "load_subnet_zones", lambda ids: zones)
+    return zones
+
+
+def test_group_subnets_by_zone_keeps_order_without_history(state_dir, subnet_zones):
+    groups = placement.group_subnets_by_zone(["subnet-a", "subnet-b", "subnet-c"])
+    assert [z for z, _ in groups] == ["use1-az1", "use1-az2", "use1-az3"]
+
+
+def test_group_subnets_by_zone_prefers_recent_success(state_dir, subnet_zones):
+    placement.record_zone_result("use1-az3", True)
+    placement.record_zone_result("use1-az1", False)
+
+    groups = placement.group_subnets_by_zone(["subnet-a", "subnet-b", "subnet-c"])
+    assert [z for z, _ in groups] == ["use1-az3", "use1-az2", "use1-az1"]
+
+
+def test_group_subnets_by_zone_retries_failed_zone_after_ttl(
+    state_dir,
+    subnet_zones,
+    monkeypatch,
+):
+    placement.record_zone_result("use1-az1", False)
+    now = time.time()
+    monkeypatch.setattr(
+        placement.time,
+        "time",
+        lambda: now + PLACEMENT_FAILURE_TTL + 1,
+    )
+
+    groups = placement.group_subnets_by_zone(["subnet-a", "subnet-b"])
+    assert [z for z, _ in groups] == ["use1-az1", "use1-az2"]
+
+
+def test_place_task_fails_over_on_capacity(state_dir, subnet_zones):
+    calls = []
+
+    def launch(subnets):
+        calls.append(subnets)
+        if subnets == ["subnet-a"]:
+            return {"tasks": [], "failures": [{"reason": "Capacity is unavailable"}]}
+        return {"tasks": [{"taskArn": "task-b"}], "failures": []}
+
+    response = placement.place_task("cluster", ["subnet-a", "subnet-b"], launch)
+    assert response["tasks"][0]["taskArn"] == "task-b"
+    assert calls == [["subnet-a"], ["subnet-b"]]
+
+
+def test_place_task_aborts_on_other_failures(state_dir, subnet_zones):
+    def launch(subnets):
+        return {"tasks": [], "failures": [{"reason": "MISSING"}]}
+
+    with pytest.raises(Abort):
+        placement.place_task("cluster", ["subnet-a", "subnet-b"], launch)
+
+
+def test_race_zones_discards_placed_task_when_other_racer_fails(
+    state_dir,
+    subnet_zones,
+    monkeypatch,
+):
+    discarded = []
+    monkeypatch.setattr(
+        placement,
+        "discard_task",
+        lambda cluster, task: discarded.append(task["taskArn"]),
+    )
+
+    def failing_launch(subnets):
+        raise Abort()
+
+    def placed_launch(subnets):
+        return {"tasks": [{"taskArn": "task-b"}], "failures": []}
+
+    with pytest.raises(Abort):
+        placement.race_zones(
+            "cluster",
+            [("use1-az1", ["subnet-a"]), ("use1-az2", ["subnet-b"])],
+            [failing_launch, placed_launch],
+        )
+    assert discarded == ["task-b"]
+
+
+def test_race_zones_keeps_winner_when_discard_fails(
+    state_dir,
+    subnet_zones,
+    monkeypatch,
+):
+    from botocore.exceptions import ClientError
+
+    def discard_task(cluster, task):
+        raise ClientError({"Error": {"Code": "Throttling"}}, "StopTask")
+
+    monkeypatch.setattr(placement, "discard_task", discard_task)
+    monkeypatch.setattr(
+        placement,
+        "wait_for_first_task",
+        lambda cluster, tasks: "task-a",
+    )
+
+    def launch(arn):
+        return lambda subnets: {"tasks": [{"taskArn": arn}], "failures": []}
+
+    response = placement.race_zones(
+        "cluster",
+        [("use1-az1", ["subnet-a"]), ("use1-az2", ["subnet-b"])],
+        [launch("task-a"), launch("task-b")],
+    )
+    assert response["tasks"][0]["taskArn"] == "task-a"
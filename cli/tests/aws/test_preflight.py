@@ -0,0 +1,81 @@
+import pytest
+from click import Abort
+
+from serverless_aws_bastion.aws import preflight
+
+
+@pytest.fixture
+def checks(state_dir, monkeypatch):
+    calls = {"count": 0, "errors": []}
+
+    def check_cluster(cluster_name):
+        calls["count"] += 1
+        return calls["errors"]
+
+    monkeypatch.setattr(preflight, "check_cluster", check_cluster)
+    monkeypatch.setattr(preflight, "check_network", lambda subnets, groups: [])
+    monkeypatch.setattr(preflight, "check_task_definition", lambda: [])
+    monkeypatch.setattr(preflight, "load_client_scope", lambda: "us-east-1-")
+    monkeypatch.setattr(preflight, "load_aws_account_id", lambda: "111")
+    return calls
+
+
+def test_passing_checks_are_cached(checks):
+    preflight.run_preflight_checks("bastions", "subnet-1", "sg-1")
+    preflight.run_preflight_checks("bastions", "subnet-1", "sg-1")
+    assert checks["count"] == 1
+
+    preflight.run_preflight_checks("bastions", "subnet-2", "sg-1")
+    assert checks["count"] == 2
+
+
+def test_checks_are_cached_per_account(checks, monkeypatch):
+    preflight.run_preflight_checks("bastions", "subnet-1", "sg-1")
+    monkeypatch.setattr(preflight, "load_aws_account_id", lambda: "222")
+    preflight.run_preflight_checks("bastions", "subnet-1", "sg-1")
+    assert checks["count"] == 2
+
+
+def test_failing_checks_are_not_cached(checks):
+    checks["errors"] = ["Cluster bastions doesn't exist or isn't active"]
+    for _ in range(2):
+        with pytest.raises(Abort):
+            preflight.run_preflight_checks("bastions", "subnet-1", "sg-1")
+    assert checks["count"] == 2
+
+
+def test_checks_always_run_without_a_ttl(checks):
+    preflight.run_preflight_checks("bastions", "subnet-1", "sg-1", ttl=0)
+    preflight.run_preflight_checks("bastions", "subnet-1", "sg-1", ttl=0)
+    assert checks["count"] == 2
+
+
+class FakeECSClient:
+    class exceptions:
+        ClientException = Exception
+
+    def describe_task_definition(self, taskDefinition):
+        return {
+            "taskDefinition": {
+                "taskRoleArn": "arn:aws:iam::111:role/custom/bastion-task",
+                "executionRoleArn": "arn:aws:iam::222:role/shared-execution",
+            },
+        }
+
+
+def test_task_definition_roles_are_checked(monkeypatch):
+    checked = []
+
+    def fetch_role_arn(role_name):
+        checked.append(role_name)
+        return None
+
+    monkeypatch.setattr(preflight, "fetch_boto3_client", lambda s: FakeECSClient())
+    monkeypatch.setattr(preflight, "load_aws_account_id", lambda: "111")
+    monkeypatch.setattr(preflight, "fetch_role_arn", fetch_role_arn)
+
+    assert preflight.check_task_definition() == [
+        "Role arn:aws:iam::111:role/custom/bastion-task used by the bastion task "
+        "definition doesn't exist",
+    ]
+    assert checked == ["bastion-task"]
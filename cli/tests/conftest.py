@@ -0,0 +1,10 @@
+import pytest
+
+
+@pytest.fixture
+def state_dir(tmp_path, monkeypatch):
+    """
+    Points the local state directory at a temporary home directory
+    """
+    monkeypatch.setenv("HOME", str(tmp_path))
+    return tmp_path
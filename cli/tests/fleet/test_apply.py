@@ -0,0 +1,93 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from serverless_aws_bastion.config import DEFAULT_NAME
+from serverless_aws_bastion.fleet.apply import (
+    load_fleet_spec,
+    plan_bastion_group,
+)
+
+
+DEFAULTS = """
+defaults:
+  cluster: bastions
+  subnets: [subnet-1, subnet-2]
+  security_groups: [sg-1]
+  authorized_keys: ssm:/team/authorized-keys
+"""
+
+
+def write_spec(tmp_path, content: str) -> str:
+    path = tmp_path / "fleet.yml"
+    path.write_text(content)
+    return str(path)
+
+
+def build_task(arn: str, sessions: int = 0, bastion_type: str = "ssm") -> dict:
+    return {
+        "taskArn": arn,
+        "createdAt": datetime(2020, 1, 1, tzinfo=timezone.utc),
+        "tags": [
+            {"key": "Name", "value": f"{DEFAULT_NAME}/web"},
+            {"key": "BastionType", "value": bastion_type},
+            {"key": "ActiveSessions", "value": str(sessions)},
+        ],
+    }
+
+
+def test_load_fleet_spec_applies_defaults(tmp_path):
+    path = write_spec(tmp_path, DEFAULTS + "groups:\n  web:\n    count: 2\n  db:\n")
+    web, db = load_fleet_spec(path)
+
+    assert (web.name, web.count, db.count) == ("web", 2, 1)
+    assert web.launch_config.subnet_ids == "subnet-1,subnet-2"
+    assert db.launch_config.cluster_name == "bastions"
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        "groups: [web",
+        "groups:\n  web: 3\n",
+        "defaults: [cluster]\ngroups:\n  web:\n",
+        DEFAULTS + "groups:\n  web:\n    colour: blue\n",
+        DEFAULTS + "groups:\n  web:\n    type: lambda\n",
+        "groups:\n  web:\n    count: 1\n",
+    ],
+)
+def test_load_fleet_spec_rejects_invalid_specs(tmp_path, content):
+    with pytest.raises(ValueError):
+        load_fleet_spec(write_spec(tmp_path, content))
+
+
+def test_plan_stops_surplus_bastions_with_fewest_sessions(tmp_path):
+    path = write_spec(tmp_path, DEFAULTS + "groups:\n  web:\n    count: 1\n")
+    (group,) = load_fleet_spec(path)
+
+    plan = plan_bastion_group(group, [build_task("busy", 3), build_task("idle")])
+    assert plan.launch == 0
+    assert plan.stop == {"idle": "surplus"}
+
+
+def test_plan_replaces_drifted_bastions(tmp_path):
+    path = write_spec(tmp_path, DEFAULTS + "groups:\n  web:\n    count: 2\n")
+    (group,) = load_fleet_spec(path)
+
+    plan = plan_bastion_group(
+        group,
+        [build_task("current"), build_task("old", bastion_type="original")],
+    )
+    assert plan.launch == 1
+    assert plan.stop == {"old": "type is original, expected ssm"}
+    assert not plan.is_empty
+
+
+def test_exec_groups_dont_need_authorized_keys(tmp_path):
+    path = write_spec(
+        tmp_path,
+        "groups:\n  ops:\n    type: exec\n    cluster: bastions\n"
+        "    subnets: subnet-1\n    security_groups: sg-1\n",
+    )
+    (group,) = load_fleet_spec(path)
+    assert group.launch_config.authorized_keys == ""
@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from serverless_aws_bastion.config import DEFAULT_NAME
+from serverless_aws_bastion.fleet import metrics
+
+
+CREATED_AT = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+
+def build_task(arn: str, boot_seconds: int) -> dict:
+    return {
+        "taskArn": f"arn:aws:ecs:us-east-1:123:task/bastions/{arn}",
+        "createdAt": CREATED_AT,
+        "startedAt": CREATED_AT + timedelta(seconds=boot_seconds),
+        "tags": [
+            {"key": "Name", "value": f"{DEFAULT_NAME}/web"},
+            {"key": "BastionType", "value": "ssm"},
+            {"key": "ActivationId", "value": f"activation-{arn}"},
+        ],
+    }
+
+
+@pytest.fixture
+def fleet(monkeypatch):
+    tasks = [build_task("a", 10)]
+    monkeypatch.setattr(metrics, "load_running_task_info", lambda cluster: tasks)
+    monkeypatch.setattr(
+        metrics,
+        "load_bastion_managed_instances",
+        lambda: [
+            {
+                "ActivationId": f"activation-{arn}",
+                "RegistrationDate": CREATED_AT + timedelta(seconds=30),
+            }
+            for arn in ("a", "b")
+        ],
+    )
+    return tasks
+
+
+def find_sample(rendered: str, prefix: str) -> str:
+    return next(
+        line.split(" ")[-1] for line in rendered.splitlines() if line.startswith(prefix)
+    )
+
+
+def test_launch_histograms_observe_each_task_once(fleet):
+    history = metrics.FleetHistory()
+    metrics.collect_fleet_metrics(["bastions"], history)
+    rendered = metrics.collect_fleet_metrics(["bastions"], history)
+    assert find_sample(rendered, "sab_bastion_launch_duration_seconds_count") == "1"
+
+    fleet[:] = [build_task("b", 20)]
+    rendered = metrics.collect_fleet_metrics(["bastions"], history)
+    assert find_sample(rendered, "sab_bastion_launch_duration_seconds_count") == "2"
+    assert find_sample(rendered, "sab_bastion_launch_duration_seconds_sum") == "30.0"
+    assert (
+        find_sample(rendered, "sab_bastion_ssm_registration_lag_seconds_count") == "2"
+    )
+
+
+def test_age_is_a_gauge_per_bastion(fleet):
+    fleet.append(build_task("b", 20))
+    rendered = metrics.collect_fleet_metrics(["bastions"])
+
+    ages = [
+        line
+        for line in rendered.splitlines()
+        if line.startswith("sab_bastion_age_seconds{")
+    ]
+    assert len(ages) == 2
+    assert 'task="a"' in ages[0] and 'task="b"' in ages[1]
+    assert all('name="web"' in line for line in ages)
+    assert "# TYPE sab_bastion_age_seconds gauge" in rendered
@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from serverless_aws_bastion.fleet import reap
+
+
+NOW = datetime.now(timezone.utc)
+
+
+def build_task(
+    arn: str,
+    age: timedelta,
+    timeout: timedelta,
+    activation_id: str = "",
+    lease_expires_at: datetime = None,
+) -> dict:
+    tags = [{"key": "ActivationId", "value": activation_id}]
+    if lease_expires_at:
+        tags.append(
+            {"key": "LeaseExpiresAt", "value": str(int(lease_expires_at.timestamp()))},
+        )
+
+    return {
+        "taskArn": arn,
+        "createdAt": NOW - age,
+        "tags": tags,
+        "overrides": {
+            "containerOverrides": [
+                {
+                    "environment": [
+                        {"name": "TIMEOUT", "value": str(int(timeout.total_seconds()))},
+                    ],
+                },
+            ],
+        },
+    }
+
+
+@pytest.fixture
+def fleet(monkeypatch):
+    state = {"tasks": [], "activations": [], "instances": []}
+    monkeypatch.setattr(reap, "list_fargate_clusters", lambda: ["bastions"])
+    monkeypatch.setattr(reap, "load_running_task_info", lambda c: state["tasks"])
+    monkeypatch.setattr(reap, "load_bastion_activations", lambda: state["activations"])
+    monkeypatch.setattr(
+        reap,
+        "load_bastion_managed_instances",
+        lambda: state["instances"],
+    )
+    return state
+
+
+def test_tasks_are_reaped_after_their_timeout_and_grace(fleet):
+    fleet["tasks"] = [
+        build_task("overran", timedelta(hours=2), timedelta(hours=1)),
+        build_task("in-grace", timedelta(minutes=65), timedelta(hours=1)),
+        build_task("running", timedelta(minutes=5), timedelta(hours=1)),
+        build_task(
+            "extended",
+            timedelta(hours=2),
+            timedelta(hours=1),
+            lease_expires_at=NOW + timedelta(hours=1),
+        ),
+    ]
+
+    plan = reap.build_reap_plan(grace_minutes=10)
+    assert plan.task_arns == {"bastions": ["overran"]}
+
+
+def test_max_age_reaps_tasks_regardless_of_timeout(fleet):
+    fleet["tasks"] = [build_task("old", timedelta(hours=3), timedelta(hours=8))]
+
+    assert reap.build_reap_plan().is_empty
+    assert reap.build_reap_plan(max_age_minutes=120).task_arns == {
+        "bastions": ["old"],
+    }
+
+
+def test_only_orphaned_activations_and_instances_are_reaped(fleet):
+    old = NOW - timedelta(hours=1)
+    fleet["tasks"] = [
+        build_task("live", timedelta(minutes=5), timedelta(hours=1), "act-live"),
+        build_task("dead", timedelta(hours=2), timedelta(hours=1), "act-dead"),
+    ]
+    fleet["activations"] = [
+        {"ActivationId": "act-live", "CreatedDate": old, "RegistrationsCount": 1},
+        {"ActivationId": "act-dead", "CreatedDate": old, "RegistrationsCount": 1},
+        {"ActivationId": "act-expired", "CreatedDate": old, "Expired": True},
+        {"ActivationId": "act-pooled", "CreatedDate": old, "RegistrationsCount": 0},
+        {"ActivationId": "act-new", "CreatedDate": NOW, "RegistrationsCount": 1},
+    ]
+    fleet["instances"] = [
+        {"InstanceId": "mi-live", "ActivationId": "act-live", "RegistrationDate": old},
+        {"InstanceId": "mi-dead", "ActivationId": "act-dead", "RegistrationDate": old},
+        {"InstanceId": "mi-new", "ActivationId": "act-new", "RegistrationDate": NOW},
+    ]
+
+    plan = reap.build_reap_plan(grace_minutes=10)
+    assert plan.activation_ids == ["act-dead", "act-expired"]
+    assert plan.instance_ids == ["mi-dead"]
+
+
+def test_build_batches():
+    assert reap.build_batches(["a", "b", "c"], size=2) == [["a", "b"], ["c"]]
+    assert reap.build_batches([]) == []
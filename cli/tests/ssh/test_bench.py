@@ -0,0 +1,27 @@
+import subprocess
+
+import pytest
+
+from serverless_aws_bastion.ssh.bench import measure_throughput
+
+
+# Runs the remote command locally the way ssh would, after a fake handshake
+SSH_COMMAND = ["sh", "-c", 'sleep "$1" && eval "$2"', "ssh"]
+
+
+def test_measure_throughput_reports_a_closed_channel():
+    with pytest.raises(subprocess.CalledProcessError) as e:
+        measure_throughput(["sh", "-c", "exit 3"], 64 * 1024 * 1024)
+    assert e.value.returncode == 3
+
+
+def test_measure_throughput_counts_bytes_sent():
+    sent, elapsed = measure_throughput(SSH_COMMAND + ["0"], 1024)
+    assert sent == 1024
+    assert elapsed >= 0
+
+
+def test_measure_throughput_skips_the_handshake():
+    sent, elapsed = measure_throughput(SSH_COMMAND + ["0.5"], 1024)
+    assert sent == 1024
+    assert elapsed < 0.5
@@ -0,0 +1,90 @@
+import attr
+import pytest
+from click import Abort
+
+from serverless_aws_bastion.dto.instance_info import InstanceInfo
+from serverless_aws_bastion.dto.launch_config import LaunchConfig
+from serverless_aws_bastion.enum.bastion_type import BastionType
+from serverless_aws_bastion.ssh import exec_pipeline
+
+
+LAUNCH_CONFIG = LaunchConfig(
+    cluster_name="bastions",
+    subnet_ids="subnet-1",
+    security_group_ids="sg-1",
+    authorized_keys="ssh-ed25519 AAAA",
+    timeout_minutes=60,
+    bastion_type=BastionType.ssm,
+)
+
+
+@pytest.fixture
+def launched(monkeypatch):
+    instance = InstanceInfo(
+        bastion_id="bastion-1",
+        bastion_type="ssm",
+        created_at="",
+        public_ip="1.2.3.4",
+        ssm_instance_id=None,
+        instance_name="db",
+        task_arn="task-1",
+        region="us-east-1",
+    )
+    discarded = []
+    monkeypatch.setattr(exec_pipeline, "load_running_instance_info", lambda c, n: [])
+    monkeypatch.setattr(exec_pipeline, "launch_bastion", lambda c, n: [instance])
+    monkeypatch.setattr(
+        exec_pipeline,
+        "describe_task",
+        lambda cluster, arns: {"tasks": [{"taskArn": a} for a in arns]},
+    )
+    monkeypatch.setattr(
+        exec_pipeline,
+        "discard_tasks",
+        lambda cluster, tasks: discarded.extend(t["taskArn"] for t in tasks),
+    )
+    return discarded
+
+
+def test_launched_bastion_is_stopped_when_it_never_registers(launched, monkeypatch):
+    def wait_for_instance_registration(bastion_ids):
+        raise Abort()
+
+    monkeypatch.setattr(
+        exec_pipeline,
+        "wait_for_instance_registration",
+        wait_for_instance_registration,
+    )
+
+    with pytest.raises(Abort):
+        exec_pipeline.claim_or_launch_bastion("bastions", "db", LAUNCH_CONFIG)
+    assert launched == ["task-1"]
+
+
+def test_launched_bastion_is_returned_once_registered(launched, monkeypatch):
+    monkeypatch.setattr(
+        exec_pipeline,
+        "wait_for_instance_registration",
+        lambda bastion_ids: {"activation-1": "mi-1"},
+    )
+
+    instance, was_launched = exec_pipeline.claim_or_launch_bastion(
+        "bastions",
+        "db",
+        LAUNCH_CONFIG,
+    )
+    assert (instance.ssm_instance_id, was_launched) == ("mi-1", True)
+    assert launched == []
+
+
+def test_exec_bastions_are_rejected_before_launching(launched, monkeypatch):
+    def launch_bastion(config, name):
+        raise AssertionError("launched an exec bastion")
+
+    monkeypatch.setattr(exec_pipeline, "launch_bastion", launch_bastion)
+    with pytest.raises(Abort):
+        exec_pipeline.claim_or_launch_bastion(
+            "bastions",
+            "db",
+            attr.evolve(LAUNCH_CONFIG, bastion_type=BastionType.exec),
+        )
@@ -0,0 +1,94 @@
+import click
+import pytest
+from botocore.exceptions import ClientError
+from click.testing import CliRunner
+
+from serverless_aws_bastion import cli as cli_module
+from serverless_aws_bastion.cli import build_launch_config
+from serverless_aws_bastion.enum.bastion_type import BastionType
+
+
+def build_config(bastion_type: str, authorized_keys=None):
+    return build_launch_config(
+        "bastions",
+        "subnet-1",
+        "sg-1",
+        authorized_keys,
+        480,
+        bastion_type,
+        "default",
+        0,
+        0,
+        False,
+        False,
+    )
+
+
+def test_exec_bastions_launch_without_authorized_keys():
+    assert build_config("exec").bastion_type == BastionType.exec
+
+
+@pytest.mark.parametrize("bastion_type", ["ssm", "original"])
+def test_other_bastions_need_authorized_keys(bastion_type):
+    with pytest.raises(click.ClickException, match="authorized-keys"):
+        build_config(bastion_type)
+
+    assert build_config(bastion_type, "ssh-ed25519 AAAA").authorized_keys
+
+
+def test_forward_start_passes_retry_options_to_the_daemon(monkeypatch):
+    started = {}
+
+    def start_forward_daemon(name, run_args):
+        started[name] = run_args
+        return 123
+
+    monkeypatch.setattr(cli_module, "start_forward_daemon", start_forward_daemon)
+    result = CliRunner().invoke(
+        cli_module.cli,
+        [
+            "forward",
+            "start",
+            "--cluster-name",
+            "bastions",
+            "--bastion-name",
+            "db",
+            "--forward",
+            "5432:db.internal:5432",
+            "--max-attempts",
+            "7",
+            "--max-request-rate",
+            "5",
+        ],
+    )
+
+    assert result.exit_code == 0, result.output
+    run_args = started["db"]
+    assert run_args[run_args.index("--retry-mode") + 1] == "standard"
+    assert run_args[run_args.index("--max-attempts") + 1] == "7"
+    assert run_args[run_args.index("--max-request-rate") + 1] == "5.0"
+
+
+def test_stop_reports_the_regions_that_failed(monkeypatch):
+    def load_running_task_info(cluster_name, bastion_name, bastion_id):
+        if cli_module.load_aws_region_name() == "us-west-2":
+            raise ClientError({"Error": {"Code": "AccessDenied"}}, "ListTasks")
+        return [{"taskArn": "arn:aws:ecs:us-east-1:1:task/bastions/abc"}]
+
+    monkeypatch.setattr(cli_module, "load_running_task_info", load_running_task_info)
+    monkeypatch.setattr(cli_module, "stop_fargate_tasks", lambda *args: None)
+    result = CliRunner().invoke(
+        cli_module.cli,
+        [
+            "stop-bastion-instances",
+            "--cluster-name",
+            "bastions",
+            "--regions",
+            "us-east-1,us-west-2",
+        ],
+    )
+
+    assert result.exit_code == 1
+    assert "Stopped 1 tasks in us-east-1" in result.output
+    assert "arn:aws:ecs:us-east-1:1:task/bastions/abc" in result.output
+    assert "Failed to stop bastions in us-west-2" in result.output
@@ -0,0 +1,14 @@
+import click
+import pytest
+
+from serverless_aws_bastion import manager
+
+
+def test_bastion_fails_clearly_when_nothing_launched(monkeypatch):
+    monkeypatch.setattr(manager, "launch_bastion", lambda config, name: [])
+    bastions = manager.BastionManager("bastions")
+
+    with pytest.raises(click.ClickException, match="No bastion was launched"):
+        with bastions.bastion("integration-tests"):
+            pass
+    bastions.close()
@@ -0,0 +1,50 @@
+import click
+
+from serverless_aws_bastion.utils import aws_utils
+
+
+class FakeSTSClient:
+    def __init__(self):
+        self.calls = 0
+
+    def get_caller_identity(self):
+        self.calls += 1
+        return {"Account": str(self.calls)}
+
+
+def test_account_id_is_reloaded_when_the_environment_changes(monkeypatch):
+    client = FakeSTSClient()
+    monkeypatch.setattr(aws_utils, "fetch_boto3_client", lambda service: client)
+    monkeypatch.setattr(aws_utils, "ACCOUNT_ID_CACHE", {})
+    monkeypatch.setenv("AWS_PROFILE", "dev")
+
+    assert aws_utils.load_aws_account_id() == aws_utils.load_aws_account_id() == "1"
+
+    monkeypatch.setenv("AWS_PROFILE", "prod")
+    assert aws_utils.load_aws_account_id() == "2"
+
+
+def test_account_id_is_reloaded_after_the_ttl(monkeypatch):
+    client = FakeSTSClient()
+    monkeypatch.setattr(aws_utils, "fetch_boto3_client", lambda service: client)
+    monkeypatch.setattr(aws_utils, "ACCOUNT_ID_CACHE", {})
+    monkeypatch.setattr(aws_utils, "IDENTITY_CACHE_TTL", 0)
+
+    aws_utils.load_aws_account_id()
+    aws_utils.load_aws_account_id()
+    assert client.calls == 2
+
+
+def test_clients_are_cached_per_retry_settings(monkeypatch):
+    monkeypatch.setattr(aws_utils, "CLIENT_CACHE", {})
+    ctx = click.Context(click.Command("test"))
+    ctx.params = {"region": "us-east-1", "max_attempts": 3}
+
+    with ctx.scope(cleanup=False):
+        client = aws_utils.fetch_boto3_client("ecs")
+        assert aws_utils.fetch_boto3_client("ecs") is client
+
+        ctx.params["max_attempts"] = 10
+        retrying_client = aws_utils.fetch_boto3_client("ecs")
+
+    assert retrying_client is not client
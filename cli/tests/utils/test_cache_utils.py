@@ -0,0 +1,52 @@
+import pytest
+
+from serverless_aws_bastion.utils import cache_utils
+
+
+@pytest.fixture
+def scope(monkeypatch):
+    monkeypatch.setitem(cache_utils.INVENTORY_CACHE_TTL, "seconds", 0)
+    cache_utils.clear_inventory_cache()
+    current = {"scope": "us-east-1"}
+    yield current
+    cache_utils.clear_inventory_cache()
+
+
+def build_lookup(scope: dict) -> tuple:
+    calls = []
+
+    @cache_utils.cached_inventory(lambda: scope["scope"])
+    def list_clusters(prefix: str = "") -> list:
+        calls.append(prefix)
+        return [f"{prefix}{len(calls)}"]
+
+    return list_clusters, calls
+
+
+def test_lookups_are_live_until_the_cache_is_enabled(scope):
+    list_clusters, calls = build_lookup(scope)
+    list_clusters()
+    list_clusters()
+    assert len(calls) == 2
+
+
+def test_lookups_are_cached_per_scope_and_arguments(scope):
+    cache_utils.enable_inventory_cache(60)
+    list_clusters, calls = build_lookup(scope)
+
+    assert list_clusters() == list_clusters() == ["1"]
+    assert list_clusters(prefix="bastion-") == ["bastion-2"]
+
+    scope["scope"] = "us-west-2"
+    assert list_clusters() == ["3"]
+    assert len(calls) == 3
+
+
+def test_clearing_the_cache_reloads(scope):
+    cache_utils.enable_inventory_cache(60)
+    list_clusters, calls = build_lookup(scope)
+
+    list_clusters()
+    cache_utils.clear_inventory_cache()
+    list_clusters()
+    assert len(calls) == 2
@@ -0,0 +1,99 @@
+import threading
+import time
+from typing import Dict, List
+
+from serverless_aws_bastion.utils.coalesce_utils import Coalescer
+
+
+class BlockingFetch:
+    """
+    Holds the first fetch open so every later caller queues into one batch
+    """
+
+    def __init__(self, error: Exception = None):
+        self.error = error
+        self.calls: List[List[str]] = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, key: str, items: List[str]) -> Dict[str, str]:
+        self.calls.append(items)
+        if len(self.calls) == 1:
+            self.started.set()
+            self.release.wait(5)
+        elif self.error:
+            raise self.error
+        return {i: i.upper() for i in items if i != "missing"}
+
+
+def load_concurrently(fetch: BlockingFetch, waiters: List[List[str]]) -> list:
+    coalescer = Coalescer(fetch, tick=0)
+    results: list = [None] * (len(waiters) + 1)
+
+    def load(i: int, items: List[str]) -> None:
+        try:
+            results[i] = coalescer.load("cluster", items)
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=load, args=(0, ["first"]))]
+    threads[0].start()
+    assert fetch.started.wait(5)
+
+    threads += [
+        threading.Thread(target=load, args=(i + 1, items))
+        for i, items in enumerate(waiters)
+    ]
+    for thread in threads[1:]:
+        thread.start()
+
+    expected = {i for items in waiters for i in items}
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        with coalescer.lock:
+            batch = coalescer.queued.get("cluster")
+            if batch and batch.items == expected:
+                break
+        time.sleep(0.01)
+
+    fetch.release.set()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+def test_concurrent_waiters_share_one_fetch():
+    fetch = BlockingFetch()
+    load_concurrently(fetch, [[f"task-{i}"] for i in range(8)])
+
+    assert len(fetch.calls) == 2
+    assert fetch.calls[1] == sorted(f"task-{i}" for i in range(8))
+
+
+def test_each_waiter_only_gets_its_own_items():
+    fetch = BlockingFetch()
+    results = load_concurrently(fetch, [["a", "b"], ["b", "c"], ["missing"]])
+
+    assert results[0] == {"first": "FIRST"}
+    assert results[1:] == [{"a": "A", "b": "B"}, {"b": "B", "c": "C"}, {}]
+
+
+def test_fetch_error_reaches_every_waiter():
+    error = RuntimeError("throttled")
+    fetch = BlockingFetch(error)
+    results = load_concurrently(fetch, [["a"], ["b"], ["c"]])
+
+    assert results[0] == {"first": "FIRST"}
+    assert results[1:] == [error, error, error]
+
+
+def test_sequential_loads_wait_for_the_tick():
+    fetch = BlockingFetch()
+    fetch.release.set()
+    coalescer = Coalescer(fetch, tick=0.2)
+
+    started_at = time.monotonic()
+    coalescer.load("cluster", ["a"])
+    coalescer.load("cluster", ["b"])
+    assert time.monotonic() - started_at >= 0.2
+    assert fetch.calls == [["a"], ["b"]]
@@ -0,0 +1,64 @@
+import click
+import pytest
+
+from serverless_aws_bastion.utils import journal_utils
+
+
+@pytest.fixture(autouse=True)
+def region(state_dir):
+    ctx = click.Context(click.Command("test"))
+    ctx.params = {"region": "us-east-1"}
+    with ctx.scope(cleanup=False):
+        yield
+
+
+def test_finished_operations_are_removed():
+    with journal_utils.journal_operation("launch") as operation_id:
+        journal_utils.record_operation(operation_id, task_arns=["task-1"])
+        assert journal_utils.load_interrupted_operations() == []
+
+    path = journal_utils.load_journal_path(operation_id)
+    assert journal_utils.read_json_state(path) is None
+
+
+def test_interrupted_operations_keep_what_they_created():
+    with pytest.raises(click.Abort):
+        with journal_utils.journal_operation("launch", cluster_name="bastions") as op:
+            journal_utils.record_operation(op, task_arns=["task-1", "task-1"])
+            journal_utils.record_operation(op, task_arns=["task-2", ""])
+            raise click.Abort()
+
+    (operation,) = journal_utils.load_interrupted_operations()
+    assert operation["id"] == op
+    assert operation["cluster_name"] == "bastions"
+    assert operation["region"] == "us-east-1"
+    assert operation["resources"] == {"task_arns": ["task-1", "task-2"]}
+    assert journal_utils.load_interrupted_operations(op) == [operation]
+    assert journal_utils.load_interrupted_operations("other") == []
+
+
+def test_interrupted_operations_that_created_nothing_are_removed():
+    with pytest.raises(click.Abort):
+        with journal_utils.journal_operation("launch"):
+            raise click.Abort()
+
+    assert journal_utils.load_interrupted_operations() == []
+
+
+def test_nested_operations_join_the_outer_one():
+    with journal_utils.journal_operation("launch") as outer:
+        with journal_utils.journal_operation("stop") as inner:
+            assert inner == outer
+        assert journal_utils.load_current_operation() == outer
+    assert journal_utils.load_current_operation() is None
+
+
+def test_operations_of_live_processes_are_still_running():
+    with journal_utils.journal_operation("launch") as operation_id:
+        journal_utils.record_operation(operation_id, task_arns=["task-1"])
+        operation = journal_utils.update_operation(operation_id)
+        assert journal_utils.is_operation_running(operation)
+
+        operation["pid"] = 2**22 + 1
+        assert not journal_utils.is_operation_running(operation)
+        assert not journal_utils.is_operation_running(dict(operation, interrupted=True))
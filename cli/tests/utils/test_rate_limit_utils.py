@@ -0,0 +1,63 @@
+import time
+
+import pytest
+
+from serverless_aws_bastion.config import MIN_REQUEST_RATE
+from serverless_aws_bastion.utils.rate_limit_utils import (
+    TokenBucket,
+    is_throttle_response,
+    load_rate_limiter,
+)
+
+
+def test_bucket_allows_a_burst_then_waits_for_tokens():
+    bucket = TokenBucket(20.0)
+    started_at = time.monotonic()
+    for _ in range(25):
+        bucket.acquire()
+
+    assert time.monotonic() - started_at >= 0.2
+    assert bucket.requests == 25
+
+
+def test_throttles_halve_the_rate_down_to_the_minimum():
+    bucket = TokenBucket(8.0)
+    bucket.record_throttle()
+    assert bucket.rate == 4.0
+
+    for _ in range(10):
+        bucket.record_throttle()
+    assert bucket.rate == MIN_REQUEST_RATE
+    assert bucket.throttles == 11
+
+
+def test_successes_recover_the_rate_up_to_the_max():
+    bucket = TokenBucket(10.0)
+    bucket.record_throttle()
+    bucket.record_success()
+    assert bucket.rate == pytest.approx(5.1)
+
+    for _ in range(100):
+        bucket.record_success()
+    assert bucket.rate == 10.0
+
+
+def test_buckets_are_shared_per_service_and_region():
+    bucket = load_rate_limiter("ecs", "eu-west-3")
+    assert load_rate_limiter("ecs", "eu-west-3") is bucket
+    assert load_rate_limiter("ssm", "eu-west-3") is not bucket
+
+
+def test_buckets_are_separate_per_max_rate():
+    bucket = load_rate_limiter("ecs", "eu-west-2", 5.0)
+    assert load_rate_limiter("ecs", "eu-west-2", 5.0) is bucket
+    assert load_rate_limiter("ecs", "eu-west-2", 10.0).max_rate == 10.0
+
+
+def test_is_throttle_response():
+    assert is_throttle_response((None, {"Error": {"Code": "ThrottlingException"}}))
+    assert is_throttle_response((None, {"ResponseMetadata": {"HTTPStatusCode": 429}}))
+    assert not is_throttle_response(
+        (None, {"ResponseMetadata": {"HTTPStatusCode": 200}})
+    )
+    assert not is_throttle_response(None)
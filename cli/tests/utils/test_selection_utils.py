@@ -0,0 +1,31 @@
+from serverless_aws_bastion.dto.instance_info import InstanceInfo
+from serverless_aws_bastion.utils.selection_utils import select_by_hash
+
+
+def build_instance(bastion_id: str) -> InstanceInfo:
+    return InstanceInfo(
+        bastion_id=bastion_id,
+        bastion_type="original",
+        created_at="",
+        public_ip="",
+        ssm_instance_id=None,
+        instance_name="bastion",
+        task_arn=bastion_id,
+        region="us-east-1",
+    )
+
+
+def test_select_by_hash_is_stable_when_bastions_change():
+    instances = [build_instance(f"bastion-{i}") for i in range(4)]
+    users = [f"user-{i}" for i in range(200)]
+    before = {u: select_by_hash(instances, u).bastion_id for u in users}
+
+    assert len(set(before.values())) == 4
+
+    removed = instances[1:]
+    after_remove = {u: select_by_hash(removed, u).bastion_id for u in users}
+    assert all(after_remove[u] == before[u] for u in users if before[u] != "bastion-0")
+
+    added = instances + [build_instance("bastion-4")]
+    after_add = {u: select_by_hash(added, u).bastion_id for u in users}
+    assert all(after_add[u] in (before[u], "bastion-4") for u in users)
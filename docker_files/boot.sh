@@ -11,11 +11,136 @@ cleanup() {
 }
 trap cleanup EXIT SIGTERM SIGKILL
 
-echo "Adding ssh key to authorized keys..."
-echo ${AUTHORIZED_SSH_KEYS} >> /home/ssh-user/.ssh/authorized_keys
+STATUS_FILE=/var/run/bastion-status.json
+IDLE_TIMEOUT=${IDLE_TIMEOUT:-0}
+LEASE_POLL_INTERVAL=${LEASE_POLL_INTERVAL:-60}
 
-echo "Starting ssh..."
-/usr/sbin/sshd -f /etc/ssh/sshd_config &
+TASK_ARN=$(
+    wget -qO- ${ECS_CONTAINER_METADATA_URI_V4}/task \
+    | python3 -c 'import json, sys; print(json.load(sys.stdin)["TaskARN"])'
+) || TASK_ARN=""
+
+count_processes() {
+    ps -o args | grep -cE "$1" || true
+}
+
+# SSH over SSM (AWS-StartSSHSession) is a port forward to sshd, so its
+# session worker has no child processes & is already counted as an ssh
+# session. Only workers running a shell are counted as ssm sessions.
+count_ssm_shell_sessions() {
+    ps -o pid,ppid,args | awk '
+        $3 ~ /(^|\/)ssm-session-worker$/ { workers[$1] = 1 }
+        { children[$2] = 1 }
+        END {
+            count = 0
+            for (pid in workers) if (pid in children) count++
+            print count
+        }
+    '
+}
+
+count_sessions() {
+    SSH_SESSIONS=$(count_processes '^sshd(-session)?: [^ ]+@')
+    SSM_SESSIONS=$(count_ssm_shell_sessions)
+    SESSIONS=$((SSH_SESSIONS + SSM_SESSIONS))
+}
+
+load_lease_expiry() {
+    if [ -z "${TASK_ARN}" ]
+    then
+        return
+    fi
+
+    aws ecs list-tags-for-resource --resource-arn ${TASK_ARN} \
+        --query "tags[?key=='LeaseExpiresAt'].value | [0]" \
+        --output text --region ${AWS_REGION} 2> /dev/null || true
+}
+
+AUTHORIZED_KEYS_FILE=/home/ssh-user/.ssh/authorized_keys
+
+fetch_authorized_keys() {
+    case "${AUTHORIZED_KEYS_SOURCE}" in
+        ssm:*)
+            aws ssm get-parameter --name "${AUTHORIZED_KEYS_SOURCE#ssm:}" \
+                --with-decryption --query Parameter.Value \
+                --output text --region ${AWS_REGION}
+            ;;
+        s3://*)
+            aws s3 cp "${AUTHORIZED_KEYS_SOURCE}" - --region ${AWS_REGION}
+            ;;
+    esac
+}
+
+# Only swaps the keys in when the fetch worked & returned something, so a
+# failed refresh never locks everyone out
+refresh_authorized_keys() {
+    fetch_authorized_keys > ${AUTHORIZED_KEYS_FILE}.tmp 2> /dev/null || return 0
+    if [ -s ${AUTHORIZED_KEYS_FILE}.tmp ] && ! cmp -s ${AUTHORIZED_KEYS_FILE}.tmp ${AUTHORIZED_KEYS_FILE}
+    then
+        chmod 600 ${AUTHORIZED_KEYS_FILE}.tmp
+        chown ssh-user ${AUTHORIZED_KEYS_FILE}.tmp
+        mv ${AUTHORIZED_KEYS_FILE}.tmp ${AUTHORIZED_KEYS_FILE}
+        echo "Updated authorized keys from ${AUTHORIZED_KEYS_SOURCE}"
+    fi
+    rm -f ${AUTHORIZED_KEYS_FILE}.tmp
+}
+
+watch_authorized_keys() {
+    while true
+    do
+        sleep ${AUTHORIZED_KEYS_REFRESH_INTERVAL:-300}
+        refresh_authorized_keys
+    done
+}
+
+report_sessions() {
+    LAST_REPORTED=""
+
+    while true
+    do
+        count_sessions
+
+        echo "{\"ssh_sessions\": ${SSH_SESSIONS}, \"ssm_sessions\": ${SSM_SESSIONS}, \"updated_at\": $(date +%s)}" > ${STATUS_FILE}.tmp
+        mv ${STATUS_FILE}.tmp ${STATUS_FILE}
+
+        # Only tag on changes so idle bastions don't spend ECS api calls
+        if [ -n "${TASK_ARN}" ] && [ "${SESSIONS}" != "${LAST_REPORTED}" ]
+        then
+            aws ecs tag-resource --resource-arn ${TASK_ARN} \
+                --tags key=ActiveSessions,value=${SESSIONS} \
+                --region ${AWS_REGION} > /dev/null \
+                && LAST_REPORTED=${SESSIONS} || true
+        fi
+
+        sleep ${SESSION_REPORT_INTERVAL:-30}
+    done
+}
+
+# Exec bastions are reached through ECS Exec, so sshd isn't needed
+if [ $BASTION_TYPE != "exec" ]
+then
+  if [ -n "${AUTHORIZED_KEYS_SOURCE}" ]
+  then
+    echo "Loading authorized keys from ${AUTHORIZED_KEYS_SOURCE}..."
+    refresh_authorized_keys
+    watch_authorized_keys &
+  else
+    echo "Adding ssh key to authorized keys..."
+    echo ${AUTHORIZED_SSH_KEYS} >> ${AUTHORIZED_KEYS_FILE}
+  fi
+
+  SSHD_PROFILE=${SSHD_PROFILE:-default}
+  if [ ! -f /etc/ssh/sshd_profiles/${SSHD_PROFILE}.conf ]
+  then
+    echo "Unknown sshd profile ${SSHD_PROFILE}, falling back to default"
+    SSHD_PROFILE=default
+  fi
+  echo "Applying ${SSHD_PROFILE} sshd profile..."
+  cp /etc/ssh/sshd_profiles/${SSHD_PROFILE}.conf /etc/ssh/sshd_config.d/profile.conf
+
+  echo "Starting ssh..."
+  /usr/sbin/sshd -f /etc/ssh/sshd_config &
+fi
 
 if [ $BASTION_TYPE = "ssm" ]
 then
@@ -24,8 +149,37 @@ then
   /usr/bin/amazon-ssm-agent &
 fi
 
+echo "Reporting active sessions..."
+report_sessions &
+
 echo "Running bastion server for ${TIMEOUT} seconds..."
-sleep ${TIMEOUT}
+DEADLINE=$(($(date +%s) + TIMEOUT))
+LAST_ACTIVE=$(date +%s)
+
+while [ $(date +%s) -lt ${DEADLINE} ]
+do
+    REMAINING=$((DEADLINE - $(date +%s)))
+    sleep $((REMAINING < LEASE_POLL_INTERVAL ? REMAINING : LEASE_POLL_INTERVAL))
+    NOW=$(date +%s)
+
+    count_sessions
+    if [ ${SESSIONS} -gt 0 ]
+    then
+        LAST_ACTIVE=${NOW}
+    elif [ ${IDLE_TIMEOUT} -gt 0 ] && [ $((NOW - LAST_ACTIVE)) -ge ${IDLE_TIMEOUT} ]
+    then
+        echo "No active sessions for ${IDLE_TIMEOUT} seconds..."
+        break
+    fi
+
+    # Leases are extended by the cli tagging the task with a new expiry
+    LEASE_EXPIRES_AT=$(load_lease_expiry)
+    if [[ "${LEASE_EXPIRES_AT}" =~ ^[0-9]+$ ]] && [ ${LEASE_EXPIRES_AT} -gt ${DEADLINE} ]
+    then
+        echo "Lease extended by $((LEASE_EXPIRES_AT - DEADLINE)) seconds..."
+        DEADLINE=${LEASE_EXPIRES_AT}
+    fi
+done
 
 echo "Shutting down server..."
 exit 0